@@ -3,4 +3,8 @@ from libs_utils import hash_password
 from .account import *
 from .transaction import *
 from .reports import *
-from .user import *
\ No newline at end of file
+from .user import *
+from .closing import *
+from .stock import *
+from .costing import *
+from .opname import *
\ No newline at end of file
@@ -0,0 +1,156 @@
+import io
+import os
+import pstats
+import tracemalloc
+import streamlit as st
+from libs import inject_css, top_bar, back_to_dashboard
+from models import query_log, profiler, memory
+
+def _query_tab():
+    st.caption(
+        f"Statistik sejak server dimulai (atau direset). Query di atas {query_log.SLOW_QUERY_MS} ms "
+        f"ditulis ke {query_log.SLOW_LOG_PATH}."
+    )
+    if st.button("Reset statistik query"):
+        query_log.reset_stats()
+
+    top = query_log.top_queries(limit=st.number_input("Tampilkan", min_value=5, max_value=200, value=20, step=5))
+    if not top:
+        st.info("Belum ada query yang tercatat.")
+    else:
+        st.markdown("**Query teratas menurut total waktu**")
+        st.dataframe(
+            [{
+                "Total (ms)": round(q["total_ms"], 1),
+                "Panggilan": q["calls"],
+                "Rata-rata (ms)": round(q["avg_ms"], 2),
+                "Maks (ms)": round(q["max_ms"], 1),
+                "Baris": q["rows"],
+                "Halaman": ", ".join(q["pages"]),
+                "Parameter": q["params"],
+                "SQL": q["sql"],
+            } for q in top],
+            use_container_width=True,
+            hide_index=True,
+        )
+
+    pages = query_log.page_stats()
+    if pages:
+        st.markdown("**Query per halaman**")
+        st.dataframe(
+            sorted(
+                [{"Halaman": p, "Query": s["queries"], "Total (ms)": round(s["total_ms"], 1)} for p, s in pages.items()],
+                key=lambda r: r["Total (ms)"],
+                reverse=True,
+            ),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+    slow = query_log.read_slow_log()
+    if slow:
+        st.markdown("**Query lambat terakhir**")
+        st.dataframe(slow, use_container_width=True, hide_index=True)
+
+def _render_tab():
+    st.caption(
+        f"Rata-rata {profiler.HISTORY} render terakhir per halaman. Rincian fase ada di panel Debug "
+        "di bawah setiap halaman; ?profile=1 pada URL merekam profil cProfile rerun tersebut."
+    )
+    summary = profiler.page_summary()
+    if not summary:
+        st.info("Belum ada render yang tercatat.")
+    else:
+        st.dataframe(
+            [{
+                "Halaman": s["page"],
+                "Render": s["renders"],
+                "Rata-rata (ms)": round(s["avg_ms"], 1),
+                "Maks (ms)": round(s["max_ms"], 1),
+                "Query rata-rata (ms)": round(s["avg_query_ms"], 1),
+                "Jumlah query rata-rata": round(s["avg_queries"], 1),
+            } for s in summary],
+            use_container_width=True,
+            hide_index=True,
+        )
+
+    dumps = profiler.profile_dumps()
+    if dumps:
+        st.markdown("**Profil cProfile**")
+        path = st.selectbox("File profil", dumps, format_func=os.path.basename)
+        out = io.StringIO()
+        pstats.Stats(path, stream=out).sort_stats("cumulative").print_stats(30)
+        st.code(out.getvalue(), language=None)
+        with open(path, "rb") as f:
+            st.download_button("Unduh .prof", data=f.read(), file_name=os.path.basename(path))
+
+def _mb(n):
+    return f"{n / 1024 / 1024:,.1f} MB"
+
+def _memory_tab():
+    data = memory.report()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Total ditahan", _mb(data["total"]), help=f"Anggaran global {_mb(data['global_budget'])}")
+    with col2:
+        st.metric("Sesi aktif", len(data["sessions"]), help=f"Anggaran per sesi {_mb(data['session_budget'])}")
+    with col3:
+        st.metric("Dibuang", f"{data['evictions']} ({_mb(data['evicted_bytes'])})")
+
+    if data["sessions"]:
+        st.markdown("**Per sesi**")
+        st.dataframe(
+            [{
+                "Sesi": a["session_id"][:8],
+                "Pengguna": a["user"],
+                "Session state": _mb(a["bytes"]),
+                "Cache sesi": _mb(a["cache_bytes"]),
+                "Objek terbesar": ", ".join(f"{k} ({_mb(v)})" for k, v in a["top"]),
+            } for a in data["sessions"]],
+            use_container_width=True,
+            hide_index=True,
+        )
+    st.markdown("**Cache bersama**")
+    st.dataframe(
+        [{"Cache": name, "Ukuran": _mb(n)} for name, n in data["shared"].items()],
+        use_container_width=True,
+        hide_index=True,
+    )
+    if st.button("Terapkan anggaran sekarang"):
+        st.success(f"{memory.enforce_global()} entri dibuang.")
+
+    st.markdown("**tracemalloc**")
+    top = memory.tracemalloc_top()
+    if top is None:
+        st.caption(f"Tidak aktif. Jalankan dengan {memory.TRACEMALLOC_ENV}=1 atau nyalakan untuk proses ini.")
+        if st.button("Nyalakan tracemalloc"):
+            tracemalloc.start(10)
+            st.rerun()
+    else:
+        st.caption(f"Saat ini {_mb(top['current'])}, puncak {_mb(top['peak'])}")
+        st.dataframe(
+            [{"Lokasi": loc, "Ukuran": _mb(size), "Alokasi": count} for loc, size, count in top["top"]],
+            use_container_width=True,
+            hide_index=True,
+        )
+        if st.button("Matikan tracemalloc"):
+            tracemalloc.stop()
+            st.rerun()
+
+def page_admin():
+    inject_css()
+    top_bar()
+
+    st.markdown('<div class="report-shell">', unsafe_allow_html=True)
+    st.markdown('<div class="report-header-box">Admin</div>', unsafe_allow_html=True)
+    back_to_dashboard()
+
+    tab_query, tab_render, tab_memory = st.tabs(["Query", "Render", "Memori"])
+    with tab_query:
+        _query_tab()
+    with tab_render:
+        _render_tab()
+    with tab_memory:
+        _memory_tab()
+
+    st.markdown("</div>", unsafe_allow_html=True)
@@ -1,25 +1,67 @@
+import importlib
 import streamlit as st
 
 from models.database import init_db
-from libs import inject_css
-
-from screens.login import page_login
-from screens.dashboard import page_dashboard
-from screens.transactions import page_transaksi
-from screens.penjualan import page_penjualan
-from screens.pembelian import page_pembelian
-from screens.pembantu_piutang import page_buku_pembantu_piutang
-from screens.pembantu_utang import page_buku_pembantu_utang
-from screens.journal import page_jurnal
-from screens.ledger import page_buku_besar
-from screens.trial_balance import page_neraca_saldo
-from screens.income_statement import page_laba_rugi
-from screens.accounts import page_akun
-from screens.posisi_keuangan import page_posisi_keuangan   
-from screens.jurnal_penyesuaian import page_jurnal_penyesuaian
-from screens.inventory import main as page_inventory
-from screens.jurnal_penutup import page_jurnal_penutup
-
+from models import query_log, profiler, metrics, memory
+from libs import inject_css, reset_css, debug_panel, page_cache, session_id
+
+# Registry halaman: nama menu -> (modul screen, fungsi halaman, hak akses).
+# Modul baru di-import saat halaman pertama kali dibuka, bukan saat start,
+# sehingga halaman login tidak ikut memuat seluruh screen beserta
+# dependensinya. Urutan di sini = urutan menu sidebar.
+#   "public" : boleh dibuka tanpa login (tidak tampil di menu)
+#   "user"   : semua pengguna yang sudah login
+#   "admin"  : hanya pengguna di ADMIN_USERS
+PAGES = {
+    "Login": ("screens.login", "page_login", "public"),
+    "Dashboard": ("screens.dashboard", "page_dashboard", "user"),
+    "Transaksi": ("screens.transactions", "page_transaksi", "user"),
+    "Penjualan": ("screens.penjualan", "page_penjualan", "user"),
+    "Pembelian": ("screens.pembelian", "page_pembelian", "user"),
+    "Buku Pembantu Piutang": ("screens.pembantu_piutang", "page_buku_pembantu_piutang", "user"),
+    "Buku Pembantu Utang": ("screens.pembantu_utang", "page_buku_pembantu_utang", "user"),
+    "Jurnal": ("screens.journal", "page_jurnal", "user"),
+    "Persediaan": ("screens.inventory", "main", "user"),
+    "Kartu Persediaan": ("screens.kartu_persediaan", "page_kartu_persediaan", "user"),
+    "Stock Opname": ("screens.stock_opname", "page_stock_opname", "user"),
+    "Nilai Persediaan": ("screens.nilai_persediaan", "page_nilai_persediaan", "user"),
+    "Jurnal Penyesuaian": ("screens.jurnal_penyesuaian", "page_jurnal_penyesuaian", "user"),
+    "Buku Besar": ("screens.ledger", "page_buku_besar", "user"),
+    "Neraca Saldo": ("screens.trial_balance", "page_neraca_saldo", "user"),
+    "Neraca Lajur": ("screens.neraca_lajur", "page_neraca_lajur", "user"),
+    "Laba Rugi": ("screens.income_statement", "page_laba_rugi", "user"),
+    "Laba Rugi Komparatif": ("screens.laba_rugi_komparatif", "page_laba_rugi_komparatif", "user"),
+    "Laporan Posisi Keuangan": ("screens.posisi_keuangan", "page_posisi_keuangan", "user"),
+    "Posisi Keuangan Komparatif": ("screens.posisi_keuangan_komparatif", "page_posisi_keuangan_komparatif", "user"),
+    "Akun": ("screens.accounts", "page_akun", "user"),
+    "Jurnal Penutup": ("screens.jurnal_penutup", "page_jurnal_penutup", "user"),
+    "Admin": ("screens.admin", "page_admin", "admin"),
+}
+
+ADMIN_USERS = {"admin"}
+
+_loaded = {}
+
+
+def load_page(name):
+    """Import modul screen saat pertama dibutuhkan dan simpan fungsi halamannya."""
+    if name not in _loaded:
+        module, func, _ = PAGES[name]
+        _loaded[name] = getattr(importlib.import_module(module), func)
+    return _loaded[name]
+
+
+def can_open(name):
+    access = PAGES[name][2]
+    if access == "public":
+        return True
+    if not st.session_state.get("logged_in"):
+        return False
+    return access == "user" or st.session_state.get("username") in ADMIN_USERS
+
+
+def menu_pages():
+    return [name for name, (_, _, access) in PAGES.items() if access != "public" and can_open(name)]
 
 def rerun():
     """Simple wrapper to trigger a Streamlit rerun using the public API."""
@@ -35,6 +77,9 @@ def main():
 
     # --- inisialisasi database ---
     init_db()
+    # endpoint Prometheus /metrics (sekali per proses, lihat models.metrics)
+    metrics.start_server()
+    reset_css()
 
     # --- inisialisasi session state login ---
     if "logged_in" not in st.session_state:
@@ -44,74 +89,17 @@ def main():
 
     # --- kalau belum login, tampilkan halaman login saja ---
     if not st.session_state.logged_in:
-        page_login()
+        load_page("Login")()
         return
 
     # --- CSS global ---
     inject_css()
 
-    # --- Sidebar button style injection to adjust width and font ---
-    st.markdown(
-        """
-        <style>
-        .sidebar .sidebar-content button.sidebar-button,
-        .sidebar .sidebar-content button.sidebar-button-selected {
-            font-family: 'Poppins', sans-serif;
-            min-width: 200px;
-            max-width: 220px;
-            height: auto;
-            padding: 8px 12px;
-            white-space: normal; /* Allow wrapping */
-            overflow-wrap: break-word;
-            display: -webkit-box;
-            -webkit-line-clamp: 2;
-            -webkit-box-orient: vertical;
-            line-clamp: 2;
-            box-orient: vertical;
-            text-align: left;
-            border-radius: 6px;
-            margin-bottom: 6px;
-            border: none;
-            cursor: pointer;
-            color: #333333;
-            background-color: #f0f0f0;
-            transition: background-color 0.3s ease;
-        }
-        .sidebar .sidebar-content button.sidebar-button-selected {
-            background-color: #70577a;
-            color: white;
-            font-weight: 600;
-        }
-        .sidebar .sidebar-content button.sidebar-button:hover {
-            background-color: #d8bfd8;
-            color: #4a2c68;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-
     # ================= SIDEBAR MENU =================
     with st.sidebar:
         st.title("Menu")
 
-        menu_items = [
-            "Dashboard",
-            "Transaksi",
-            "Penjualan",
-            "Pembelian",
-            "Buku Pembantu Piutang",
-            "Buku Pembantu Utang",
-            "Jurnal",
-            "Persediaan",
-            "Jurnal Penyesuaian",
-            "Buku Besar",
-            "Neraca Saldo",
-            "Laba Rugi",
-            "Laporan Posisi Keuangan",   
-            "Akun",
-            "Jurnal Penutup",
-        ]
+        menu_items = menu_pages()
 
         # halaman aktif terakhir (supaya tetap kepilih setelah rerun)
         current_page = (
@@ -141,39 +129,25 @@ def main():
 
     # ================= ROUTING HALAMAN =================
     p = st.session_state.page
-
-    if p == "Dashboard":
-        page_dashboard()
-    elif p == "Transaksi":
-        page_transaksi()
-    elif p == "Penjualan":
-        page_penjualan()
-    elif p == "Pembelian":
-        page_pembelian()
-    elif p == "Buku Pembantu Piutang":
-        page_buku_pembantu_piutang()
-    elif p == "Buku Pembantu Utang":
-        page_buku_pembantu_utang()
-    elif p == "Jurnal":
-        page_jurnal()
-    elif p == "Persediaan":
-        page_inventory()
-    elif p == "Jurnal Penyesuaian":
-        page_jurnal_penyesuaian()
-    elif p == "Buku Besar":
-        page_buku_besar()
-    elif p == "Neraca Saldo":
-        page_neraca_saldo()
-    elif p == "Laba Rugi":
-        page_laba_rugi()
-    elif p == "Laporan Posisi Keuangan":   
-        page_posisi_keuangan()
-    elif p == "Akun":
-        page_akun()
-    elif p == "Jurnal Penutup":
-        page_jurnal_penutup()
-    else:
-        page_dashboard()
+    if p not in menu_items:
+        p = "Dashboard"
+    # query selama render dicatat atas nama halaman ini (lihat query_log);
+    # profil cProfile lewat MERPATI_PROFILE=1, atau ?profile=1 untuk admin
+    is_admin = can_open("Admin")
+    profile = profiler.profile_env() or (is_admin and st.query_params.get("profile") == "1")
+    token = query_log.set_page(p)
+    try:
+        with profiler.render(p, profile=profile) as prof:
+            load_page(p)()
+    finally:
+        query_log.reset_page(token)
+
+    # ukur objek yang ditahan sesi ini untuk panel admin (models.memory)
+    page_cache()
+    memory.account_session(session_id(), st.session_state, st.session_state.get("username", ""))
+
+    if is_admin:
+        debug_panel(prof)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,146 @@
+import os
+import sys
+from models.database import (
+    get_conn, create_lock_triggers, drop_lock_triggers, create_balance_triggers, drop_balance_triggers,
+)
+
+ARCHIVE_DIR = "arsip"
+
+TRANSACTION_COLUMNS = "id, tx_date, description, debit_account_id, credit_account_id, amount, entry_type"
+
+def archive_file(year):
+    return os.path.join(ARCHIVE_DIR, f"sia_merpati_{int(year)}.db")
+
+def get_archives(cur, start_date=None, end_date=None):
+    """Daftar (year, archive_path) tahun terarsip yang beririsan dengan rentang tanggal."""
+    sql = "SELECT year, archive_path FROM fiscal_periods WHERE archive_path IS NOT NULL"
+    params = []
+    if start_date:
+        sql += " AND end_date >= ?"
+        params.append(str(start_date))
+    if end_date:
+        sql += " AND start_date <= ?"
+        params.append(str(end_date))
+    sql += " ORDER BY year"
+    cur.execute(sql, params)
+    return [(r["year"], r["archive_path"]) for r in cur.fetchall()]
+
+def connect_range(start_date=None, end_date=None):
+    """
+    Koneksi untuk laporan historis.
+
+    Arsip tahun yang beririsan dengan rentang di-ATTACH, lalu view TEMP
+    `transactions` menggabungkan main.transactions dengan arsip tersebut.
+    Nama TEMP didahulukan SQLite, jadi query yang ada tetap membaca
+    `FROM transactions` apa adanya. Tanpa rentang sama sekali tidak ada arsip
+    yang dibuka. SQLite membatasi 10 database ter-ATTACH per koneksi.
+    """
+    conn = get_conn()
+    if not start_date and not end_date:
+        return conn
+    cur = conn.cursor()
+    archives = get_archives(cur, start_date, end_date)
+    if not archives:
+        return conn
+
+    selects = [f"SELECT {TRANSACTION_COLUMNS} FROM main.transactions"]
+    for year, path in archives:
+        alias = f"arsip_{year}"
+        cur.execute(f"ATTACH DATABASE ? AS {alias}", (path,))
+        selects.append(f"SELECT {TRANSACTION_COLUMNS} FROM {alias}.transactions")
+    cur.execute("CREATE TEMP VIEW transactions AS " + " UNION ALL ".join(selects))
+    return conn
+
+def archive_year(year):
+    """
+    Pindahkan transaksi satu tahun fiskal yang sudah tutup buku ke file
+    SQLite tersendiri (dipadatkan dengan VACUUM INTO), lalu hapus dari
+    database utama. Saldo awal tahun berikutnya tetap di database utama.
+
+    Returns:
+    - int: jumlah transaksi yang diarsipkan
+    """
+    year = int(year)
+    start_date, end_date = f"{year}-01-01", f"{year}-12-31"
+
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT status, archive_path FROM fiscal_periods WHERE year = ?", (year,))
+        period = cur.fetchone()
+        if period is None or period["status"] != "locked":
+            raise ValueError(f"Tahun {year} belum dikunci.")
+        if period["archive_path"]:
+            raise ValueError(f"Tahun {year} sudah diarsipkan.")
+        cur.execute("SELECT 1 FROM opening_balances WHERE fiscal_year = ? LIMIT 1", (year + 1,))
+        if cur.fetchone() is None:
+            raise ValueError(f"Tahun {year} belum tutup buku.")
+
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        path = archive_file(year)
+        tmp_path = path + ".tmp"
+        for p in (path, tmp_path):
+            if os.path.exists(p):
+                os.remove(p)
+
+        # Salin ke file sementara, lalu padatkan ke file arsip final
+        cur.execute("ATTACH DATABASE ? AS arsip", (tmp_path,))
+        cur.execute(
+            f"""
+            CREATE TABLE arsip.transactions AS
+            SELECT {TRANSACTION_COLUMNS} FROM main.transactions
+            WHERE tx_date BETWEEN ? AND ?
+            """,
+            (start_date, end_date),
+        )
+        cur.execute("CREATE INDEX arsip.idx_transactions_tx_date ON transactions(tx_date)")
+        cur.execute("CREATE TABLE arsip.accounts AS SELECT * FROM main.accounts")
+        cur.execute(
+            "CREATE TABLE arsip.opening_balances AS SELECT * FROM main.opening_balances WHERE fiscal_year IN (?, ?)",
+            (year, year + 1),
+        )
+        conn.commit()
+        cur.execute("VACUUM arsip INTO ?", (path,))
+        cur.execute("DETACH DATABASE arsip")
+        os.remove(tmp_path)
+
+        cur.execute("ATTACH DATABASE ? AS arsip", (path,))
+        cur.execute("SELECT COUNT(*) AS c FROM arsip.transactions")
+        archived = cur.fetchone()["c"]
+        cur.execute("DETACH DATABASE arsip")
+        cur.execute(
+            "SELECT COUNT(*) AS c FROM main.transactions WHERE tx_date BETWEEN ? AND ?",
+            (start_date, end_date),
+        )
+        if cur.fetchone()["c"] != archived:
+            raise RuntimeError(f"Arsip {path} tidak lengkap, database utama tidak diubah.")
+
+        # Periode terkunci: trigger kunci dilepas sementara di dalam transaksi yang sama.
+        # Trigger saldo juga dilepas supaya balance_daily tetap memuat tahun terarsip.
+        conn.isolation_level = None
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            drop_lock_triggers(cur)
+            drop_balance_triggers(cur)
+            cur.execute(
+                "DELETE FROM main.transactions WHERE tx_date BETWEEN ? AND ?",
+                (start_date, end_date),
+            )
+            cur.execute("UPDATE fiscal_periods SET archive_path = ? WHERE year = ?", (path, year))
+            create_lock_triggers(cur)
+            create_balance_triggers(cur)
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+        cur.execute("VACUUM")
+    finally:
+        conn.close()
+
+    return archived
+
+if __name__ == "__main__":
+    # python -m models.archive <tahun> [<tahun> ...]
+    for arg in sys.argv[1:]:
+        n = archive_year(arg)
+        print(f"Tahun {arg}: {n} transaksi diarsipkan ke {archive_file(arg)}")
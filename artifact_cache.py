@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import threading
+from models.database import get_conn
+from models.closing import is_range_locked, data_version, lock_generation
+from models import metrics
+
+CACHE_DIR = "cache_laporan"
+MAX_BYTES = 200 * 1024 * 1024
+# Laporan persediaan: mutasi persediaan tidak dijaga trigger kunci periode,
+# jadi kuncinya selalu data_version + metode harga pokok, bukan status kunci
+INVENTORY_REPORTS = {"inventory_valuation_csv"}
+
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+_lock = threading.Lock()
+
+def _count(name, n=1):
+    with _lock:
+        _stats[name] += n
+
+def artifact_key(report, params, start_date=None, end_date=None):
+    """
+    Kunci file hasil render: jenis laporan, parameter, dan versi data.
+
+    Seperti cached_report(), rentang yang seluruhnya terkunci memakai
+    generasi kunci sehingga filenya tetap berlaku walau data periode lain
+    berubah, sampai ada periode yang dikunci/dibuka lagi; selain itu memakai
+    data_version saat ini. Laporan persediaan (INVENTORY_REPORTS) selalu
+    memakai data_version ditambah metode harga pokok.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    if report in INVENTORY_REPORTS:
+        cur.execute("SELECT value FROM settings WHERE key = 'costing_method'")
+        row = cur.fetchone()
+        version = [data_version(cur), row["value"] if row else None]
+    elif is_range_locked(cur, start_date, end_date):
+        version = ["locked", lock_generation(cur)]
+    else:
+        version = data_version(cur)
+    conn.close()
+    raw = json.dumps([report, params, version], sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def artifact_path(key, ext):
+    return os.path.join(CACHE_DIR, f"{key}.{ext}")
+
+def get_artifact(key, ext):
+    """Path file cache bila ada (hit, waktu akses diperbarui untuk LRU), atau None."""
+    path = artifact_path(key, ext)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        _count("misses")
+        return None
+    _count("hits")
+    return path
+
+def put_artifact(key, ext, src_path):
+    """Pindahkan file hasil render ke cache, lalu evict bila melebihi MAX_BYTES."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = artifact_path(key, ext)
+    os.replace(src_path, path)
+    _count("stores")
+    evict(keep=path)
+    return path
+
+def evict(max_bytes=None, keep=None):
+    """Hapus file yang paling lama tidak diakses sampai total ukuran cache <= max_bytes."""
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    if not os.path.isdir(CACHE_DIR):
+        return 0
+    files = [e for e in os.scandir(CACHE_DIR) if e.is_file() and not e.name.endswith(".tmp")]
+    files = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in files]
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        total -= size
+        removed += 1
+    _count("evictions", removed)
+    return removed
+
+def cached_artifact(report, params, ext, render, start_date=None, end_date=None):
+    """
+    Ambil file laporan dari cache atau render sekali lalu simpan.
+    render(path) menulis file ke path yang diberikan.
+
+    Returns:
+    - str: path file di cache
+    """
+    key = artifact_key(report, params, start_date, end_date)
+    path = get_artifact(key, ext)
+    if path:
+        return path
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = artifact_path(key, ext) + f".{threading.get_ident()}.tmp"
+    try:
+        render(tmp_path)
+        return put_artifact(key, ext, tmp_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _collect_metrics():
+    stats = cache_stats()
+    return [
+        ("merpati_artifact_cache_total", "counter", "Lookup/penyimpanan/evict file laporan di cache",
+         [({"event": k}, stats[k]) for k in ("hits", "misses", "stores", "evictions")]),
+        ("merpati_artifact_cache_files", "gauge", "Jumlah file di cache laporan", [({}, stats["files"])]),
+        ("merpati_artifact_cache_bytes", "gauge", "Ukuran cache laporan (byte)", [({}, stats["bytes"])]),
+    ]
+
+def cache_stats():
+    with _lock:
+        stats = dict(_stats)
+    files, size = 0, 0
+    if os.path.isdir(CACHE_DIR):
+        for e in os.scandir(CACHE_DIR):
+            if e.is_file() and not e.name.endswith(".tmp"):
+                files += 1
+                size += e.stat().st_size
+    lookups = stats["hits"] + stats["misses"]
+    stats.update(files=files, bytes=size, hit_rate=stats["hits"] / lookups if lookups else 0.0)
+    return stats
+
+metrics.register_collector(_collect_metrics)
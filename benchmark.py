@@ -0,0 +1,271 @@
+"""
+Benchmark fungsi model dan jalur data halaman terhadap jurnal sintetis.
+
+Database dibuat sekali per ukuran oleh synthetic_ledger.generate() dan
+disimpan di BENCH_DIR. Beberapa kasus menulis (balance_daily, cost_dirty,
+biaya persediaan), jadi setiap run memakai salinan sementaranya yang
+dimigrasi init_db(); file di BENCH_DIR tidak pernah berubah. Setiap
+kasus dijalankan sekali untuk pemanasan lalu --runs kali; median dan
+minimum (ms) ditulis ke JSON dan dibandingkan dengan baseline. Kasus yang
+median-nya lebih lambat dari baseline x --threshold (dan selisihnya di
+atas MIN_DELTA_MS) ditandai regresi.
+
+    python benchmark.py --sizes 10k 100k
+    python benchmark.py --sizes 100k --save hasil.json
+    python benchmark.py --sizes 10k 100k --update-baseline
+
+Keluar dengan kode 1 bila ada regresi.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from models import database, synthetic_ledger
+
+BENCH_DIR = "bench_data"
+BASELINE_PATH = "benchmark_baseline.json"
+THRESHOLD = 1.25
+# Selisih di bawah ini dianggap derau, berapa pun rasionya
+MIN_DELTA_MS = 5.0
+SEED = 42
+
+def _ctx(cur):
+    """Rentang tanggal dan barang yang dipakai kasus-kasus benchmark."""
+    cur.execute("SELECT MIN(tx_date) AS lo, MAX(tx_date) AS hi FROM transactions")
+    row = cur.fetchone()
+    lo, hi = date.fromisoformat(row["lo"]), date.fromisoformat(row["hi"])
+    cur.execute("SELECT kode_barang FROM inventory GROUP BY kode_barang ORDER BY COUNT(*) DESC LIMIT 1")
+    item = cur.fetchone()
+    return {
+        "start": lo,
+        "end": hi,
+        # satu bulan di tengah data, seperti filter yang biasa dipakai pengguna
+        "month_start": date(hi.year, hi.month, 1),
+        "month_end": hi,
+        "year_start": date(hi.year, 1, 1),
+        "item": item["kode_barang"] if item else None,
+    }
+
+def _clear_report_cache():
+    from models import reports
+    reports._report_cache.clear()
+
+def _mark_costs_dirty():
+    conn = database.get_conn()
+    conn.execute("INSERT OR REPLACE INTO cost_dirty(kode_barang, from_date) SELECT DISTINCT kode_barang, '' FROM inventory")
+    conn.commit()
+    conn.close()
+
+def _cases():
+    """
+    Daftar (nama, setup, fungsi). setup dipanggil sebelum setiap run dan
+    tidak ikut diukur; fungsi menerima ctx dan mengembalikan hasilnya.
+    """
+    from models import transaction, reports, costing, stock
+
+    def drain(rows):
+        return sum(1 for _ in rows)
+
+    def period_ends(start, end, freq):
+        # sama dengan posisi_keuangan_komparatif.period_ends, tanpa mengimpor streamlit
+        import pandas as pd
+        return [min(p.end_time.date(), end) for p in pd.period_range(start, end, freq=freq)]
+
+    return [
+        # fungsi model
+        ("transaction.trial_balance", None, lambda c: transaction.trial_balance()),
+        ("transaction.trial_balance_after_adjustment", None, lambda c: transaction.trial_balance_after_adjustment()),
+        ("transaction.worksheet", None, lambda c: transaction.worksheet()),
+        ("transaction.income_statement", None, lambda c: transaction.income_statement()),
+        ("transaction.ledger_per_account", None, lambda c: transaction.ledger_per_account()),
+        ("transaction.ledger_per_account[bulan]", None,
+         lambda c: transaction.ledger_per_account(c["month_start"], c["month_end"])),
+        ("transaction.get_transactions", None, lambda c: transaction.get_transactions()),
+        ("transaction.iter_transactions", None, lambda c: drain(transaction.iter_transactions())),
+        ("transaction.iter_ledger", None, lambda c: drain(transaction.iter_ledger())),
+        ("transaction.balance_sheet", None, lambda c: transaction.balance_sheet()),
+        ("transaction.balance_sheet[as_of]", None, lambda c: transaction.balance_sheet(c["year_start"])),
+        ("reports.income_statement[dingin]", _clear_report_cache,
+         lambda c: reports.income_statement(c["start"], c["end"])),
+        ("reports.income_statement[cache]", None, lambda c: reports.income_statement(c["start"], c["end"])),
+        ("costing.update_costs[semua]", _mark_costs_dirty, lambda c: costing.update_costs()),
+        ("costing.inventory_valuation", None, lambda c: costing.inventory_valuation()),
+        ("stock.get_stock_levels", None, lambda c: stock.get_stock_levels()),
+        ("stock.stock_card", None, lambda c: stock.stock_card(c["item"])),
+        # jalur data halaman (yang dipanggil halaman sebelum merender)
+        ("halaman.jurnal", None,
+         lambda c: transaction.transactions_to_df(transaction.get_transactions(None, c["month_start"], c["month_end"]))),
+        ("halaman.buku_besar", None, lambda c: transaction.ledger_per_account(c["month_start"], c["month_end"])),
+        ("halaman.neraca_lajur", None, lambda c: transaction.worksheet()),
+        ("halaman.laba_rugi_komparatif", _clear_report_cache,
+         lambda c: reports.comparative_income_statement(c["year_start"], c["end"], "month")),
+        ("halaman.posisi_keuangan_komparatif", None,
+         lambda c: transaction.balance_sheet_comparative(period_ends(c["year_start"], c["end"], "M"))),
+        ("halaman.nilai_persediaan", None,
+         lambda c: (costing.inventory_valuation_summary(c["month_start"], c["month_end"]),
+                    costing.inventory_valuation(c["month_start"], c["month_end"], limit=100))),
+        ("halaman.kartu_persediaan", None,
+         lambda c: (stock.get_stock_levels(), stock.stock_card(c["item"], c["month_start"], c["month_end"]))),
+    ]
+
+def _rows(result):
+    if isinstance(result, int):
+        return result
+    if isinstance(result, tuple):
+        return sum(_rows(r) or 0 for r in result)
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+def ensure_db(size):
+    """Path database sintetis untuk size, dibuat bila belum ada."""
+    n = synthetic_ledger.parse_size(size)
+    path = os.path.join(BENCH_DIR, f"ledger_{n}_s{SEED}.db")
+    if not os.path.exists(path):
+        print(f"Membuat {path} ({n:,} transaksi)...", file=sys.stderr)
+        result = synthetic_ledger.generate(path + ".tmp", n, seed=SEED)
+        os.replace(path + ".tmp", path)
+        print(f"  selesai dalam {result['seconds']:.1f} detik", file=sys.stderr)
+    return path
+
+def run_size(size, runs, only=None):
+    """
+    Jalankan semua kasus pada database ukuran size.
+
+    Returns:
+    - dict: nama kasus -> {median_ms, min_ms, rows}
+    """
+    source = ensure_db(size)
+    old_path = database.DB_PATH
+    fd, work = tempfile.mkstemp(prefix=f"benchmark_{size}_", suffix=".db")
+    os.close(fd)
+    try:
+        shutil.copyfile(source, work)
+        database.DB_PATH = work
+        database.init_db()
+        conn = database.get_conn()
+        ctx = _ctx(conn.cursor())
+        conn.close()
+        results = {}
+        for name, setup, fn in _cases():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            times = []
+            for i in range(runs + 1):
+                if setup:
+                    setup()
+                t0 = time.perf_counter()
+                result = fn(ctx)
+                elapsed = (time.perf_counter() - t0) * 1000
+                if i:
+                    times.append(elapsed)
+            results[name] = {
+                "median_ms": round(statistics.median(times), 3),
+                "min_ms": round(min(times), 3),
+                "rows": _rows(result),
+            }
+            print(f"  {size:>5} {name:<45} {results[name]['median_ms']:>10.1f} ms", file=sys.stderr)
+        return results
+    finally:
+        database.DB_PATH = old_path
+        _clear_report_cache()
+        for path in (work, work + "-wal", work + "-shm", work + "-journal"):
+            if os.path.exists(path):
+                os.remove(path)
+
+def compare(current, baseline, threshold=THRESHOLD, min_delta_ms=MIN_DELTA_MS):
+    """
+    Bandingkan hasil dengan baseline (struktur {ukuran: {kasus: {...}}}).
+
+    Returns:
+    - list[dict]: size, case, baseline_ms, current_ms, ratio, status
+      ("regresi", "lebih cepat", "ok", atau "baru")
+    """
+    rows = []
+    for size, cases in current.items():
+        for case, res in cases.items():
+            base = baseline.get(size, {}).get(case)
+            if base is None:
+                rows.append({"size": size, "case": case, "baseline_ms": None,
+                             "current_ms": res["median_ms"], "ratio": None, "status": "baru"})
+                continue
+            ratio = res["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+            delta = res["median_ms"] - base["median_ms"]
+            if ratio > threshold and delta > min_delta_ms:
+                status = "regresi"
+            elif ratio < 1 / threshold and -delta > min_delta_ms:
+                status = "lebih cepat"
+            else:
+                status = "ok"
+            rows.append({"size": size, "case": case, "baseline_ms": base["median_ms"],
+                         "current_ms": res["median_ms"], "ratio": round(ratio, 3), "status": status})
+    return rows
+
+def _meta(runs):
+    return {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "seed": SEED,
+        "runs": runs,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark SIA MERPATI pada jurnal sintetis.")
+    parser.add_argument("--sizes", nargs="+", default=["10k", "100k"], help="mis. 10k 100k 1M 10M")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--only", nargs="+", help="hanya kasus yang namanya memuat teks ini")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="rasio median yang dianggap regresi")
+    parser.add_argument("--save", help="simpan hasil ke file JSON ini")
+    parser.add_argument("--update-baseline", action="store_true", help="tulis hasil sebagai baseline baru")
+    args = parser.parse_args(argv)
+
+    results = {size: run_size(size, args.runs, args.only) for size in args.sizes}
+    report = {"meta": _meta(args.runs), "results": results}
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {"meta": report["meta"], "results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline["results"] = json.load(f)["results"]
+        for size, cases in results.items():
+            baseline["results"].setdefault(size, {}).update(cases)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline diperbarui: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Baseline {args.baseline} belum ada; jalankan dengan --update-baseline.")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    rows = compare(results, baseline, args.threshold)
+    print(f"{'ukuran':>6}  {'kasus':<45} {'baseline':>10} {'sekarang':>10} {'rasio':>7}  status")
+    for r in rows:
+        base = f"{r['baseline_ms']:.1f}" if r["baseline_ms"] is not None else "-"
+        ratio = f"{r['ratio']:.2f}x" if r["ratio"] is not None else "-"
+        print(f"{r['size']:>6}  {r['case']:<45} {base:>10} {r['current_ms']:>10.1f} {ratio:>7}  {r['status']}")
+    regressions = [r for r in rows if r["status"] == "regresi"]
+    if regressions:
+        print(f"\n{len(regressions)} regresi (ambang {args.threshold}x dan > {MIN_DELTA_MS} ms).")
+        return 1
+    print("\nTidak ada regresi.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+from datetime import datetime
+from models.database import get_conn, create_lock_triggers, drop_lock_triggers
+
+# Akun nominal (pendapatan, HPP, beban, lain-lain) ditutup ke ekuitas tiap akhir tahun
+NOMINAL_PREFIXES = ("4", "5", "6", "7")
+
+class PeriodLockedError(ValueError):
+    """Raised when a write touches a transaction date in a locked fiscal period."""
+
+def is_date_locked(cur, tx_date):
+    """True bila tanggal ada di periode terkunci atau sebelum saldo awal tutup buku terakhir."""
+    cur.execute(
+        """
+        SELECT 1 WHERE EXISTS (
+            SELECT 1 FROM fiscal_periods WHERE status = 'locked' AND :d BETWEEN start_date AND end_date
+        ) OR :d < (SELECT MAX(fiscal_year) || '-01-01' FROM opening_balances)
+        """,
+        {"d": str(tx_date)},
+    )
+    return cur.fetchone() is not None
+
+def assert_dates_open(cur, *tx_dates):
+    for tx_date in tx_dates:
+        if tx_date and is_date_locked(cur, tx_date):
+            raise PeriodLockedError(f"Periode untuk tanggal {tx_date} sudah dikunci.")
+
+def is_range_locked(cur, start_date=None, end_date=None):
+    """
+    True when every fiscal year touched by [start_date, end_date] is locked,
+    i.e. the result of a report over that range can never change again.
+    Without start_date the range starts at the first transaction.
+    """
+    if not end_date:
+        return False
+    if not start_date:
+        cur.execute("SELECT MIN(tx_date) AS d FROM transactions")
+        start_date = cur.fetchone()["d"] or str(end_date)
+    first, last = int(str(start_date)[:4]), int(str(end_date)[:4])
+    cur.execute(
+        "SELECT COUNT(*) AS c FROM fiscal_periods WHERE status = 'locked' AND year BETWEEN ? AND ?",
+        (first, last),
+    )
+    return cur.fetchone()["c"] == last - first + 1
+
+def data_version(cur):
+    cur.execute("SELECT version FROM data_version WHERE id = 1")
+    row = cur.fetchone()
+    return row["version"] if row else 0
+
+def lock_generation(cur):
+    """Naik setiap ada periode yang dikunci atau dibuka (trigger di fiscal_periods)."""
+    cur.execute("SELECT lock_generation FROM data_version WHERE id = 1")
+    row = cur.fetchone()
+    return row["lock_generation"] if row else 0
+
+def lock_period(year):
+    year = int(year)
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        INSERT INTO fiscal_periods(year, start_date, end_date, status, locked_at)
+        VALUES (?, ?, ?, 'locked', ?)
+        ON CONFLICT(year) DO UPDATE SET status='locked', locked_at=excluded.locked_at
+        """,
+        (year, f"{year}-01-01", f"{year}-12-31", datetime.now().isoformat(timespec="seconds")),
+    )
+    conn.commit()
+    conn.close()
+
+def unlock_period(year):
+    """Buka kembali periode yang dikunci manual; tahun yang sudah tutup buku tidak bisa dibuka."""
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT 1 FROM opening_balances WHERE fiscal_year = ? LIMIT 1", (int(year) + 1,))
+    if cur.fetchone() is not None:
+        conn.close()
+        raise ValueError(f"Tahun {year} sudah tutup buku dan tidak bisa dibuka kembali.")
+    cur.execute(
+        "UPDATE fiscal_periods SET status='open', locked_at=NULL WHERE year=?",
+        (int(year),),
+    )
+    conn.commit()
+    conn.close()
+
+def latest_opening(cur, as_of=None):
+    """
+    Return (fiscal_year, start_date) of the most recent opening balance
+    (on or before the year of as_of, if given), or (None, None) when no
+    such year has been closed.
+    """
+    if as_of:
+        cur.execute(
+            "SELECT MAX(fiscal_year) AS y FROM opening_balances WHERE fiscal_year <= ?",
+            (int(str(as_of)[:4]),),
+        )
+    else:
+        cur.execute("SELECT MAX(fiscal_year) AS y FROM opening_balances")
+    year = cur.fetchone()["y"]
+    if year is None:
+        return None, None
+    return year, f"{year}-01-01"
+
+def get_fiscal_periods():
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT * FROM fiscal_periods ORDER BY year")
+    rows = cur.fetchall()
+    conn.close()
+    return rows
+
+def get_opening_balances(fiscal_year):
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT a.code, a.name, ob.balance
+        FROM opening_balances ob
+        JOIN accounts a ON a.id = ob.account_id
+        WHERE ob.fiscal_year = ?
+        ORDER BY a.code
+        """,
+        (fiscal_year,),
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return rows
+
+def closing_entries(year=None):
+    """Jurnal penutup (entry_type 'closing'), opsional untuk satu tahun."""
+    sql = """
+        SELECT t.id, t.tx_date, t.description,
+               da.code AS debit_code, da.name AS debit_name,
+               ca.code AS credit_code, ca.name AS credit_name,
+               t.amount, t.entry_type
+        FROM transactions t
+        JOIN accounts da ON da.id = t.debit_account_id
+        JOIN accounts ca ON ca.id = t.credit_account_id
+        WHERE t.entry_type = 'closing'
+    """
+    params = []
+    if year:
+        sql += " AND t.tx_date BETWEEN ? AND ?"
+        params.extend([f"{year}-01-01", f"{year}-12-31"])
+    sql += " ORDER BY t.tx_date, t.id"
+
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    rows = cur.fetchall()
+    conn.close()
+    return rows
+
+def close_year(year, equity_account_id=None):
+    """
+    Tutup buku satu tahun fiskal dalam satu transaksi database.
+
+    Saldo akhir dihitung dari saldo awal terakhir ditambah transaksi sampai
+    31 Desember. Saldo akun nominal dipindahkan ke akun ekuitas lewat jurnal
+    penutup, periode dikunci, lalu saldo akun riil ditulis sebagai saldo awal
+    tahun berikutnya.
+
+    Returns:
+    - int: jumlah jurnal penutup yang diposting
+    """
+    year = int(year)
+    start_date, end_date = f"{year}-01-01", f"{year}-12-31"
+
+    conn = get_conn()
+    conn.isolation_level = None
+    cur = conn.cursor()
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+
+        opening_year, opening_start = latest_opening(cur)
+        if opening_year is not None and opening_year > year:
+            raise ValueError(f"Tahun {year} sudah ditutup.")
+        # tahun sebelumnya yang masih terbuka harus ditutup lebih dulu, supaya
+        # saldonya tidak ikut tersapu ke jurnal penutup tahun ini
+        cur.execute(
+            "SELECT MIN(tx_date) AS d FROM transactions WHERE tx_date >= ? AND tx_date < ?",
+            (opening_start or "", start_date),
+        )
+        earlier = cur.fetchone()["d"]
+        if earlier is not None:
+            raise ValueError(f"Tahun {earlier[:4]} belum tutup buku; tutup tahun tersebut lebih dulu.")
+
+        if equity_account_id is None:
+            cur.execute("SELECT id FROM accounts WHERE code LIKE '3%' ORDER BY code LIMIT 1")
+            row = cur.fetchone()
+            if row is None:
+                raise ValueError("Akun ekuitas (kode 3xx) belum ada.")
+            equity_account_id = row["id"]
+
+        cur.execute(
+            """
+            SELECT a.id, a.code, a.name,
+                   COALESCE(ob.balance, 0) + COALESCE(m.net, 0) AS balance
+            FROM accounts a
+            LEFT JOIN opening_balances ob
+              ON ob.account_id = a.id AND ob.fiscal_year = ?
+            LEFT JOIN (
+                SELECT account_id, SUM(amount) AS net
+                FROM (
+                    SELECT debit_account_id AS account_id, amount
+                    FROM transactions WHERE tx_date >= ? AND tx_date <= ?
+                    UNION ALL
+                    SELECT credit_account_id, -amount
+                    FROM transactions WHERE tx_date >= ? AND tx_date <= ?
+                )
+                GROUP BY account_id
+            ) m ON m.account_id = a.id
+            ORDER BY a.code
+            """,
+            (opening_year, opening_start or "", end_date, opening_start or "", end_date),
+        )
+        balances = [(r["id"], str(r["code"]), r["name"], round(r["balance"], 2)) for r in cur.fetchall()]
+
+        closing = []
+        equity_delta = 0.0
+        for acc_id, code, name, bal in balances:
+            if not code.startswith(NOMINAL_PREFIXES) or bal == 0:
+                continue
+            desc = f"Jurnal penutup {code} {name} tahun {year}"
+            if bal > 0:
+                closing.append((end_date, desc, equity_account_id, acc_id, bal))
+            else:
+                closing.append((end_date, desc, acc_id, equity_account_id, -bal))
+            equity_delta += bal
+
+        # Tahun yang sudah dikunci manual tetap bisa ditutup: trigger kunci
+        # dilepas sementara di dalam transaksi yang sama (seperti archive_year).
+        drop_lock_triggers(cur)
+        cur.executemany(
+            """
+            INSERT INTO transactions(tx_date,description,debit_account_id,credit_account_id,amount,entry_type)
+            VALUES (?,?,?,?,?,'closing')
+            """,
+            closing,
+        )
+        create_lock_triggers(cur)
+
+        opening = []
+        for acc_id, code, name, bal in balances:
+            if code.startswith(NOMINAL_PREFIXES):
+                continue
+            if acc_id == equity_account_id:
+                bal = round(bal + equity_delta, 2)
+            if bal != 0:
+                opening.append((year + 1, acc_id, bal))
+
+        cur.execute("DELETE FROM opening_balances WHERE fiscal_year = ?", (year + 1,))
+        cur.executemany(
+            "INSERT INTO opening_balances(fiscal_year, account_id, balance) VALUES (?,?,?)",
+            opening,
+        )
+
+        cur.execute(
+            """
+            INSERT INTO fiscal_periods(year, start_date, end_date, status, locked_at)
+            VALUES (?, ?, ?, 'locked', ?)
+            ON CONFLICT(year) DO UPDATE SET status='locked', locked_at=excluded.locked_at
+            """,
+            (year, start_date, end_date, datetime.now().isoformat(timespec="seconds")),
+        )
+        cur.execute(
+            "INSERT OR IGNORE INTO fiscal_periods(year, start_date, end_date) VALUES (?,?,?)",
+            (year + 1, f"{year + 1}-01-01", f"{year + 1}-12-31"),
+        )
+
+        cur.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            cur.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    return len(closing)
@@ -0,0 +1,432 @@
+import json
+from models.database import get_conn
+from models.closing import is_date_locked
+
+COSTING_METHODS = ("fifo", "average")
+
+def get_costing_method():
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT value FROM settings WHERE key='costing_method'")
+    row = cur.fetchone()
+    conn.close()
+    return row["value"] if row else "fifo"
+
+def set_costing_method(method):
+    """Ganti metode; seluruh barang ditandai untuk dihitung ulang dari awal."""
+    if method not in COSTING_METHODS:
+        raise ValueError(f"Metode harga pokok tidak dikenal: {method}")
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO settings(key, value) VALUES ('costing_method', ?) "
+        "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+        (method,),
+    )
+    # "WHERE 1" memisahkan SELECT dari klausa ON CONFLICT (aturan parser SQLite)
+    cur.execute("""
+        INSERT INTO cost_dirty(kode_barang, from_date)
+        SELECT DISTINCT kode_barang, '' FROM inventory WHERE 1
+        ON CONFLICT(kode_barang) DO UPDATE SET from_date = ''
+    """)
+    conn.commit()
+    conn.close()
+
+def _apply_movement(layers, method, qty_in, qty_out, price):
+    """
+    Proses satu mutasi terhadap antrean layer [[qty, unit_cost], ...].
+
+    Barang masuk dicatat pada harga_per_unit mutasi; barang keluar dibebankan
+    dari layer (FIFO: layer tertua dulu, rata-rata: satu layer gabungan).
+    Stok minus disimpan sebagai layer negatif pada harga terakhir dan
+    ditutup oleh barang masuk berikutnya.
+
+    Returns:
+    - tuple: (layers baru, nilai masuk, harga pokok keluar)
+    """
+    value_in = qty_in * price
+    if qty_in:
+        if layers and layers[0][0] < 0:
+            # tutup stok minus lebih dulu
+            short = min(-layers[0][0], qty_in)
+            layers[0][0] += short
+            if layers[0][0] == 0:
+                layers.pop(0)
+            qty_in -= short
+        if qty_in:
+            if method == "average" and layers:
+                qty, unit = layers[0]
+                total = qty + qty_in
+                layers[0] = [total, (qty * unit + qty_in * price) / total]
+            else:
+                layers.append([qty_in, price])
+
+    cogs = 0.0
+    remaining = qty_out
+    last_unit = layers[-1][1] if layers else price
+    while remaining > 0 and layers and layers[0][0] > 0:
+        qty, unit = layers[0]
+        take = min(qty, remaining)
+        cogs += take * unit
+        remaining -= take
+        last_unit = unit
+        if take == qty:
+            layers.pop(0)
+        else:
+            layers[0][0] = qty - take
+    if remaining > 0:
+        cogs += remaining * last_unit
+        if layers and layers[0][0] < 0:
+            layers[0][0] -= remaining
+        else:
+            layers.insert(0, [-remaining, last_unit])
+
+    return layers, value_in, cogs
+
+def recompute_item(cur, kode_barang, from_date="", method=None):
+    """
+    Hitung ulang harga pokok satu barang mulai from_date.
+
+    Antrean layer dilanjutkan dari snapshot mutasi terakhir sebelum
+    from_date, jadi mutasi mundur tanggal hanya memproses ulang mutasi
+    barang itu sejak tanggal tersebut.
+    """
+    if method is None:
+        cur.execute("SELECT value FROM settings WHERE key='costing_method'")
+        row = cur.fetchone()
+        method = row["value"] if row else "fifo"
+
+    cur.execute(
+        """
+        SELECT qty_after, value_after, layers FROM movement_costs
+        WHERE kode_barang = ? AND tanggal < ?
+        ORDER BY tanggal DESC, movement_id DESC LIMIT 1
+        """,
+        (kode_barang, from_date),
+    )
+    snap = cur.fetchone()
+    layers = json.loads(snap["layers"]) if snap else []
+    qty_after = snap["qty_after"] if snap else 0.0
+    value_after = snap["value_after"] if snap else 0.0
+
+    cur.execute(
+        "DELETE FROM movement_costs WHERE kode_barang = ? AND tanggal >= ?",
+        (kode_barang, from_date),
+    )
+    cur.execute(
+        """
+        SELECT id, tanggal, jumlah_masuk, jumlah_keluar, harga_per_unit
+        FROM inventory
+        WHERE kode_barang = ? AND tanggal >= ?
+        ORDER BY tanggal, id
+        """,
+        (kode_barang, from_date),
+    )
+    results = []
+    for m in cur.fetchall():
+        qty_in, qty_out = m["jumlah_masuk"] or 0, m["jumlah_keluar"] or 0
+        layers, value_in, cogs = _apply_movement(layers, method, qty_in, qty_out, m["harga_per_unit"])
+        qty_after += qty_in - qty_out
+        value_after = sum(q * u for q, u in layers)
+        results.append((
+            m["id"], kode_barang, m["tanggal"], qty_in, qty_out, value_in, cogs,
+            qty_after, value_after, json.dumps(layers),
+        ))
+    cur.executemany(
+        """
+        INSERT OR REPLACE INTO movement_costs(
+            movement_id, kode_barang, tanggal, qty_in, qty_out, value_in, cogs,
+            qty_after, value_after, layers
+        ) VALUES (?,?,?,?,?,?,?,?,?,?)
+        """,
+        results,
+    )
+
+    # nilai stok per harga pokok (trigger stock_levels hanya memelihara qty)
+    cur.execute(
+        "UPDATE stock_levels SET value_on_hand = ? WHERE kode_barang = ?",
+        (value_after, kode_barang),
+    )
+    cur.execute("DELETE FROM cost_layers WHERE kode_barang = ?", (kode_barang,))
+    cur.executemany(
+        "INSERT INTO cost_layers(kode_barang, seq, qty, unit_cost) VALUES (?,?,?,?)",
+        [(kode_barang, i, q, u) for i, (q, u) in enumerate(layers)],
+    )
+    cur.execute("DELETE FROM cost_dirty WHERE kode_barang = ? AND from_date >= ?", (kode_barang, from_date))
+    return len(results)
+
+def update_costs():
+    """
+    Proses semua barang yang ditandai cost_dirty oleh trigger inventory.
+
+    Returns:
+    - int: jumlah mutasi yang dihitung ulang
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT value FROM settings WHERE key='costing_method'")
+    row = cur.fetchone()
+    method = row["value"] if row else "fifo"
+    cur.execute("SELECT kode_barang, from_date FROM cost_dirty")
+    dirty = cur.fetchall()
+    processed = 0
+    for d in dirty:
+        processed += recompute_item(cur, d["kode_barang"], d["from_date"], method)
+    conn.commit()
+    conn.close()
+    return processed
+
+def get_cost_layers(kode_barang=None):
+    sql = "SELECT * FROM cost_layers"
+    params = []
+    if kode_barang:
+        sql += " WHERE kode_barang = ?"
+        params.append(kode_barang)
+    sql += " ORDER BY kode_barang, seq"
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    rows = cur.fetchall()
+    conn.close()
+    return rows
+
+def movement_costs(kode_barang):
+    """Harga pokok per mutasi satu barang, setelah update_costs()."""
+    import pandas as pd
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT movement_id, tanggal, qty_in, qty_out, value_in, cogs, qty_after, value_after
+        FROM movement_costs
+        WHERE kode_barang = ?
+        ORDER BY tanggal, movement_id
+        """,
+        (kode_barang,),
+    )
+    rows = cur.fetchall()
+    conn.close()
+    columns = ["ID", "Tanggal", "Masuk", "Keluar", "Nilai Masuk", "HPP", "Saldo Qty", "Saldo Nilai"]
+    if not rows:
+        return pd.DataFrame(columns=columns)
+    return pd.DataFrame([tuple(r) for r in rows], columns=columns)
+
+VALUATION_COLUMNS = [
+    "Kode",
+    "Nama Barang",
+    "Satuan",
+    "Qty Awal",
+    "Nilai Awal",
+    "Qty Masuk",
+    "Nilai Masuk",
+    "Qty Keluar",
+    "Nilai Keluar",
+    "Qty Akhir",
+    "Nilai Akhir",
+]
+
+# Satu baris per barang; kolom sesuai VALUATION_COLUMNS
+_VALUATION_SQL = """
+    WITH m AS (
+        SELECT kode_barang, tanggal, qty_in, qty_out, value_in, cogs, qty_after, value_after,
+               tanggal < :start AS sebelum,
+               LEAD(tanggal) OVER (
+                   PARTITION BY kode_barang ORDER BY tanggal, movement_id
+               ) AS berikut
+        FROM movement_costs
+        WHERE tanggal <= :end
+    )
+    SELECT m.kode_barang, COALESCE(s.nama_barang, '') AS nama_barang, COALESCE(s.satuan, '') AS satuan,
+           SUM(CASE WHEN sebelum AND (berikut IS NULL OR berikut >= :start) THEN qty_after ELSE 0 END) AS qty_awal,
+           SUM(CASE WHEN sebelum AND (berikut IS NULL OR berikut >= :start) THEN value_after ELSE 0 END) AS nilai_awal,
+           SUM(CASE WHEN sebelum THEN 0 ELSE qty_in END) AS qty_masuk,
+           SUM(CASE WHEN sebelum THEN 0 ELSE value_in END) AS nilai_masuk,
+           SUM(CASE WHEN sebelum THEN 0 ELSE qty_out END) AS qty_keluar,
+           SUM(CASE WHEN sebelum THEN 0 ELSE cogs END) AS nilai_keluar,
+           SUM(CASE WHEN berikut IS NULL THEN qty_after ELSE 0 END) AS qty_akhir,
+           SUM(CASE WHEN berikut IS NULL THEN value_after ELSE 0 END) AS nilai_akhir
+    FROM m
+    LEFT JOIN stock_levels s ON s.kode_barang = m.kode_barang
+    GROUP BY m.kode_barang
+    HAVING SUM(CASE WHEN berikut IS NULL THEN qty_after ELSE 0 END) <> 0
+        OR SUM(CASE WHEN sebelum THEN 0 ELSE qty_in + qty_out END) <> 0
+"""
+
+def _valuation_params(start_date, end_date):
+    return {
+        "start": str(start_date) if start_date else "",
+        "end": str(end_date) if end_date else "9999-12-31",
+    }
+
+def inventory_valuation(start_date=None, end_date=None, limit=None, offset=0):
+    """
+    Laporan nilai persediaan per barang untuk satu rentang tanggal.
+
+    Satu pass atas movement_costs (indeks kode_barang, tanggal, movement_id):
+    saldo awal/akhir diambil dari snapshot mutasi terakhir sebelum start_date
+    dan sampai end_date (dikenali lewat LEAD per barang, urutan sama dengan
+    indeks sehingga tanpa sort), masuk/keluar dijumlahkan dalam rentang.
+    Nilai keluar = HPP sesuai metode harga pokok aktif. limit/offset untuk
+    paginasi per barang; totalnya lewat inventory_valuation_summary().
+    """
+    import pandas as pd
+    update_costs()
+    sql = _VALUATION_SQL + " ORDER BY m.kode_barang"
+    params = _valuation_params(start_date, end_date)
+    if limit is not None:
+        sql += " LIMIT :limit OFFSET :offset"
+        params.update(limit=int(limit), offset=int(offset))
+
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    rows = cur.fetchall()
+    conn.close()
+    if not rows:
+        return pd.DataFrame(columns=VALUATION_COLUMNS)
+    df = pd.DataFrame([tuple(r) for r in rows], columns=VALUATION_COLUMNS)
+    return df.astype({c: float for c in VALUATION_COLUMNS[3:]})
+
+def inventory_valuation_summary(start_date=None, end_date=None):
+    """
+    Jumlah barang dan total nilai laporan nilai persediaan, tanpa memuat
+    baris per barang (untuk metrik dan jumlah halaman).
+
+    Returns:
+    - dict: barang, nilai_awal, nilai_masuk, nilai_keluar, nilai_akhir
+    """
+    update_costs()
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        SELECT COUNT(*) AS barang,
+               COALESCE(SUM(nilai_awal), 0) AS nilai_awal,
+               COALESCE(SUM(nilai_masuk), 0) AS nilai_masuk,
+               COALESCE(SUM(nilai_keluar), 0) AS nilai_keluar,
+               COALESCE(SUM(nilai_akhir), 0) AS nilai_akhir
+        FROM ({_VALUATION_SQL})
+        """,
+        _valuation_params(start_date, end_date),
+    )
+    row = cur.fetchone()
+    conn.close()
+    return dict(row)
+
+def post_cogs_journal():
+    """
+    Posting jurnal HPP (debit akun_hpp, kredit akun_persediaan) untuk semua
+    mutasi keluar yang belum diposting, dalam satu transaksi database.
+
+    Harga pokok dihitung dulu dengan update_costs(). Setiap mutasi ditautkan
+    ke id jurnalnya di inventory_postings, jadi menjalankan ulang hanya
+    memproses mutasi baru. Jurnal yang HPP-nya berubah karena mutasi mundur
+    tanggal disesuaikan nominalnya, dan jurnal milik mutasi yang sudah dihapus
+    ikut dihapus. Mutasi atau jurnal di periode terkunci dilewati.
+
+    Returns:
+    - dict: jumlah jurnal baru, disesuaikan, dihapus, dilewati, dan total HPP baru
+    """
+    update_costs()
+
+    conn = get_conn()
+    conn.isolation_level = None
+    cur = conn.cursor()
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+
+        cur.execute("SELECT key, value FROM settings WHERE key IN ('akun_hpp', 'akun_persediaan')")
+        codes = {r["key"]: r["value"] for r in cur.fetchall()}
+        account_ids = {}
+        for key in ("akun_hpp", "akun_persediaan"):
+            cur.execute("SELECT id FROM accounts WHERE code = ?", (codes.get(key),))
+            row = cur.fetchone()
+            if row is None:
+                raise ValueError(f"Akun {codes.get(key)} ({key}) tidak ditemukan.")
+            account_ids[key] = row["id"]
+
+        # Jurnal milik mutasi yang sudah dihapus
+        cur.execute("""
+            SELECT p.movement_id, p.transaction_id, t.tx_date
+            FROM inventory_postings p
+            JOIN transactions t ON t.id = p.transaction_id
+            WHERE NOT EXISTS (SELECT 1 FROM inventory i WHERE i.id = p.movement_id)
+        """)
+        orphans = [r for r in cur.fetchall() if not is_date_locked(cur, r["tx_date"])]
+        cur.executemany("DELETE FROM transactions WHERE id = ?", [(r["transaction_id"],) for r in orphans])
+        cur.executemany("DELETE FROM inventory_postings WHERE movement_id = ?", [(r["movement_id"],) for r in orphans])
+
+        # Jurnal yang HPP-nya berubah setelah dihitung ulang
+        # Jurnal dipindah ke tanggal mutasi: tanggal lama dan baru harus sama-sama terbuka
+        cur.execute("""
+            SELECT p.movement_id, p.transaction_id, mc.cogs, mc.tanggal, t.tx_date
+            FROM inventory_postings p
+            JOIN movement_costs mc ON mc.movement_id = p.movement_id
+            JOIN transactions t ON t.id = p.transaction_id
+            WHERE mc.qty_out > 0 AND ROUND(mc.cogs, 2) <> ROUND(p.cogs, 2)
+        """)
+        repriced, skipped = [], 0
+        for r in cur.fetchall():
+            if is_date_locked(cur, r["tanggal"]) or is_date_locked(cur, r["tx_date"]):
+                skipped += 1
+            else:
+                repriced.append(r)
+        cur.executemany(
+            "UPDATE transactions SET amount = ?, tx_date = ? WHERE id = ?",
+            [(round(r["cogs"], 2), r["tanggal"], r["transaction_id"]) for r in repriced],
+        )
+        cur.executemany(
+            "UPDATE inventory_postings SET cogs = ? WHERE movement_id = ?",
+            [(r["cogs"], r["movement_id"]) for r in repriced],
+        )
+
+        # Mutasi keluar baru
+        cur.execute("""
+            SELECT mc.movement_id, mc.tanggal, mc.cogs, i.kode_barang, i.nama_barang, i.jumlah_keluar, i.satuan
+            FROM movement_costs mc
+            JOIN inventory i ON i.id = mc.movement_id
+            WHERE mc.qty_out > 0 AND ROUND(mc.cogs, 2) <> 0
+              AND NOT EXISTS (SELECT 1 FROM inventory_postings p WHERE p.movement_id = mc.movement_id)
+            ORDER BY mc.tanggal, mc.movement_id
+        """)
+        posted, total = [], 0.0
+        for m in cur.fetchall():
+            if is_date_locked(cur, m["tanggal"]):
+                skipped += 1
+                continue
+            amount = round(m["cogs"], 2)
+            cur.execute(
+                """
+                INSERT INTO transactions(tx_date,description,debit_account_id,credit_account_id,amount,entry_type)
+                VALUES (?,?,?,?,?,'regular')
+                """,
+                (
+                    m["tanggal"],
+                    f"HPP {m['nama_barang']} ({m['kode_barang']}) {m['jumlah_keluar']} {m['satuan']} - mutasi #{m['movement_id']}",
+                    account_ids["akun_hpp"],
+                    account_ids["akun_persediaan"],
+                    amount,
+                ),
+            )
+            posted.append((m["movement_id"], cur.lastrowid, m["cogs"]))
+            total += amount
+        cur.executemany(
+            "INSERT INTO inventory_postings(movement_id, transaction_id, cogs) VALUES (?,?,?)",
+            posted,
+        )
+
+        cur.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            cur.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    return {
+        "posted": len(posted),
+        "repriced": len(repriced),
+        "removed": len(orphans),
+        "skipped_locked": skipped,
+        "total_hpp": round(total, 2),
+    }
@@ -1,13 +1,168 @@
 import sqlite3
 from libs_utils import hash_password
+from models import query_log
 
 DB_PATH = "sia_merpati.db"
 
 def get_conn():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    factory = query_log.InstrumentedConnection if query_log.ENABLED else sqlite3.Connection
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, factory=factory)
     conn.row_factory = sqlite3.Row
     return conn
 
+ENTRY_TYPES = ("regular", "adjusting", "closing", "reversing", "opening")
+
+def _migrate_entry_type(cur):
+    """Tambah kolom entry_type pada database lama dan isi dari keterangan."""
+    cols = [r["name"] for r in cur.execute("PRAGMA table_info(transactions)")]
+    if "entry_type" not in cols:
+        cur.execute("""
+            ALTER TABLE transactions ADD COLUMN entry_type TEXT NOT NULL DEFAULT 'regular'
+                CHECK(entry_type IN ('regular','adjusting','closing','reversing','opening'))
+        """)
+        cur.execute("""
+            UPDATE transactions
+            SET entry_type = CASE
+                WHEN LOWER(description) LIKE '%penyesuaian%' THEN 'adjusting'
+                WHEN LOWER(description) LIKE '%penutup%' THEN 'closing'
+                ELSE 'regular'
+            END
+        """)
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transactions_entry_type "
+        "ON transactions(entry_type, tx_date)"
+    )
+
+_LOCK_TRIGGERS = (("INSERT", "NEW"), ("UPDATE", "OLD"), ("UPDATE", "NEW"), ("DELETE", "OLD"))
+
+def create_lock_triggers(cur):
+    """
+    Transaksi di periode terkunci, atau sebelum saldo awal tutup buku
+    terakhir, tidak boleh ditambah, diubah, atau dihapus.
+    """
+    for event, row in _LOCK_TRIGGERS:
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_lock_{event.lower()}_{row.lower()}
+            BEFORE {event} ON transactions
+            WHEN EXISTS (
+                SELECT 1 FROM fiscal_periods
+                WHERE status = 'locked' AND {row}.tx_date BETWEEN start_date AND end_date
+            ) OR {row}.tx_date < (SELECT MAX(fiscal_year) || '-01-01' FROM opening_balances)
+            BEGIN
+                SELECT RAISE(ABORT, 'Periode sudah dikunci');
+            END
+        """)
+
+def drop_lock_triggers(cur):
+    for event, row in _LOCK_TRIGGERS:
+        cur.execute(f"DROP TRIGGER IF EXISTS trg_transactions_lock_{event.lower()}_{row.lower()}")
+
+# Trigger hanya memelihara qty: harga_per_unit mutasi keluar adalah harga
+# jual, jadi value_on_hand (harga pokok) diisi recompute_item() di costing
+_STOCK_APPLY = """
+            INSERT INTO stock_levels(kode_barang, nama_barang, satuan, qty_on_hand)
+            VALUES (NEW.kode_barang, NEW.nama_barang, NEW.satuan, NEW.jumlah_masuk - NEW.jumlah_keluar)
+            ON CONFLICT(kode_barang) DO UPDATE SET
+                nama_barang = excluded.nama_barang,
+                satuan = excluded.satuan,
+                qty_on_hand = qty_on_hand + excluded.qty_on_hand;
+"""
+
+_STOCK_REVERT = """
+            UPDATE stock_levels
+            SET qty_on_hand = qty_on_hand - (OLD.jumlah_masuk - OLD.jumlah_keluar)
+            WHERE kode_barang = OLD.kode_barang;
+"""
+
+def _create_stock_triggers(cur):
+    for event, body in (
+        ("INSERT", _STOCK_APPLY),
+        ("UPDATE", _STOCK_REVERT + _STOCK_APPLY),
+        ("DELETE", _STOCK_REVERT),
+    ):
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_inventory_stock_{event.lower()}
+            AFTER {event} ON inventory
+            BEGIN
+                {body}
+            END
+        """)
+
+_COST_DIRTY = """
+            INSERT INTO cost_dirty(kode_barang, from_date) VALUES ({row}.kode_barang, {row}.tanggal)
+            ON CONFLICT(kode_barang) DO UPDATE SET from_date = MIN(from_date, excluded.from_date);
+"""
+
+def _create_cost_triggers(cur):
+    """Tandai barang yang harga pokoknya perlu dihitung ulang mulai tanggal mutasi."""
+    for event, rows in (("INSERT", ("NEW",)), ("UPDATE", ("OLD", "NEW")), ("DELETE", ("OLD",))):
+        body = "".join(_COST_DIRTY.format(row=row) for row in rows)
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_inventory_cost_{event.lower()}
+            AFTER {event} ON inventory
+            BEGIN
+                {body}
+            END
+        """)
+
+_BALANCE_LEG = """
+            INSERT INTO balance_daily(account_id, tx_date, net) VALUES ({row}.{side}_account_id, {row}.tx_date, {sign}{row}.amount)
+            ON CONFLICT(account_id, tx_date) DO UPDATE SET net = net + excluded.net;
+            INSERT INTO balance_dirty(account_id, from_date) VALUES ({row}.{side}_account_id, {row}.tx_date)
+            ON CONFLICT(account_id) DO UPDATE SET from_date = MIN(from_date, excluded.from_date);
+"""
+
+def _balance_body(row, apply):
+    debit, credit = ("", "-") if apply else ("-", "")
+    return (_BALANCE_LEG.format(row=row, side="debit", sign=debit)
+            + _BALANCE_LEG.format(row=row, side="credit", sign=credit))
+
+def create_balance_triggers(cur):
+    """Mutasi bersih harian per akun (debit +, kredit -) untuk saldo per tanggal."""
+    for event, body in (
+        ("INSERT", _balance_body("NEW", True)),
+        ("UPDATE", _balance_body("OLD", False) + _balance_body("NEW", True)),
+        ("DELETE", _balance_body("OLD", False)),
+    ):
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_balance_{event.lower()}
+            AFTER {event} ON transactions
+            BEGIN
+                {body}
+            END
+        """)
+
+def drop_balance_triggers(cur):
+    for event in ("insert", "update", "delete"):
+        cur.execute(f"DROP TRIGGER IF EXISTS trg_transactions_balance_{event}")
+
+def _stock_values(cur):
+    """value_on_hand = saldo nilai harga pokok mutasi terakhir di movement_costs."""
+    cur.execute("""
+        UPDATE stock_levels SET value_on_hand = COALESCE((
+            SELECT value_after FROM movement_costs m
+            WHERE m.kode_barang = stock_levels.kode_barang
+            ORDER BY m.tanggal DESC, m.movement_id DESC LIMIT 1
+        ), 0)
+    """)
+
+def rebuild_stock_levels(cur):
+    """Hitung ulang stock_levels dari seluruh mutasi persediaan."""
+    cur.execute("DELETE FROM stock_levels")
+    cur.execute("""
+        INSERT INTO stock_levels(kode_barang, nama_barang, satuan, qty_on_hand)
+        SELECT kode_barang, nama_barang, satuan, qty
+        FROM (
+            -- nama_barang/satuan diambil dari baris dengan MAX(id) (kolom bare SQLite)
+            SELECT kode_barang, nama_barang, satuan, MAX(id) AS last_id,
+                   SUM(jumlah_masuk - jumlah_keluar) AS qty
+            FROM inventory
+            GROUP BY kode_barang
+        )
+    """)
+    if cur.execute("SELECT name FROM sqlite_master WHERE name = 'movement_costs'").fetchone():
+        _stock_values(cur)
+
 def init_db():
     conn = get_conn()
     cur = conn.cursor()
@@ -35,9 +190,113 @@ def init_db():
             description TEXT NOT NULL,
             debit_account_id INTEGER NOT NULL,
             credit_account_id INTEGER NOT NULL,
-            amount REAL NOT NULL
+            amount REAL NOT NULL,
+            entry_type TEXT NOT NULL DEFAULT 'regular'
+                CHECK(entry_type IN ('regular','adjusting','closing','reversing','opening'))
+        )
+    """)
+    _migrate_entry_type(cur)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_transactions_tx_date ON transactions(tx_date)")
+
+    # Periode fiskal (tahun kalender) dan saldo awal hasil tutup buku
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS fiscal_periods(
+            year INTEGER PRIMARY KEY,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'open' CHECK(status IN ('open','locked')),
+            locked_at TEXT,
+            archive_path TEXT
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS opening_balances(
+            fiscal_year INTEGER NOT NULL,
+            account_id INTEGER NOT NULL,
+            balance REAL NOT NULL,
+            PRIMARY KEY(fiscal_year, account_id)
+        )
+    """)
+
+    cols = [r["name"] for r in cur.execute("PRAGMA table_info(fiscal_periods)")]
+    if "archive_path" not in cols:
+        cur.execute("ALTER TABLE fiscal_periods ADD COLUMN archive_path TEXT")
+    # trigger kunci versi lama belum menolak tanggal sebelum saldo awal terakhir
+    cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_transactions_lock_%' "
+        "AND sql NOT LIKE '%opening_balances%' LIMIT 1"
+    )
+    if cur.fetchone() is not None:
+        drop_lock_triggers(cur)
+    create_lock_triggers(cur)
+
+    # Versi data naik setiap ada perubahan transaksi atau mutasi persediaan
+    # (untuk cache laporan periode terbuka dan penggabungan job ekspor)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS data_version(
+            id INTEGER PRIMARY KEY CHECK(id = 1),
+            version INTEGER NOT NULL
+        )
+    """)
+    cur.execute("INSERT OR IGNORE INTO data_version(id, version) VALUES (1, 0)")
+    # Generasi kunci naik setiap status periode fiskal berubah (kunci/buka),
+    # supaya hasil laporan periode terkunci yang di-cache ikut usang saat
+    # periodenya dibuka kembali
+    cols = [r["name"] for r in cur.execute("PRAGMA table_info(data_version)")]
+    if "lock_generation" not in cols:
+        cur.execute("ALTER TABLE data_version ADD COLUMN lock_generation INTEGER NOT NULL DEFAULT 0")
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_fiscal_periods_lock_insert
+        AFTER INSERT ON fiscal_periods
+        WHEN NEW.status = 'locked'
+        BEGIN
+            UPDATE data_version SET lock_generation = lock_generation + 1 WHERE id = 1;
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_fiscal_periods_lock_update
+        AFTER UPDATE OF status ON fiscal_periods
+        WHEN OLD.status IS NOT NEW.status
+        BEGIN
+            UPDATE data_version SET lock_generation = lock_generation + 1 WHERE id = 1;
+        END
+    """)
+
+    # Saldo kumulatif per akun per tanggal (prefix sum atas mutasi harian);
+    # kolom cum dihitung ulang lazim mulai from_date di balance_dirty
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS balance_daily(
+            account_id INTEGER NOT NULL,
+            tx_date TEXT NOT NULL,
+            net REAL NOT NULL,
+            cum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY(account_id, tx_date)
+        ) WITHOUT ROWID
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS balance_dirty(
+            account_id INTEGER PRIMARY KEY,
+            from_date TEXT NOT NULL
         )
     """)
+    cur.execute("SELECT 1 FROM balance_daily LIMIT 1")
+    if cur.fetchone() is None:
+        cur.execute("""
+            INSERT INTO balance_daily(account_id, tx_date, net)
+            SELECT account_id, tx_date, SUM(amount)
+            FROM (
+                SELECT debit_account_id AS account_id, tx_date, amount FROM transactions
+                UNION ALL
+                SELECT credit_account_id, tx_date, -amount FROM transactions
+            )
+            GROUP BY account_id, tx_date
+        """)
+        cur.execute("""
+            INSERT OR REPLACE INTO balance_dirty(account_id, from_date)
+            SELECT DISTINCT account_id, '' FROM balance_daily
+        """)
+    create_balance_triggers(cur)
 
     # Create inventory table for persediaan
     cur.execute("""
@@ -52,6 +311,136 @@ def init_db():
             harga_per_unit REAL NOT NULL
         )
     """)
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_inventory_item_date "
+        "ON inventory(kode_barang, tanggal, id)"
+    )
+    for table in ("transactions", "inventory"):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE data_version SET version = version + 1 WHERE id = 1;
+                END
+            """)
+
+    # Saldo stok per barang, dipelihara trigger pada setiap mutasi persediaan
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS stock_levels(
+            kode_barang TEXT PRIMARY KEY,
+            nama_barang TEXT NOT NULL,
+            satuan TEXT NOT NULL,
+            qty_on_hand REAL NOT NULL DEFAULT 0,
+            value_on_hand REAL NOT NULL DEFAULT 0
+        )
+    """)
+    # Trigger versi lama ikut menjumlah nilai dengan harga jual mutasi keluar
+    cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_inventory_stock_%' "
+        "AND sql LIKE '%harga_per_unit%' LIMIT 1"
+    )
+    stale_stock_triggers = cur.fetchone() is not None
+    if stale_stock_triggers:
+        for event in ("insert", "update", "delete"):
+            cur.execute(f"DROP TRIGGER IF EXISTS trg_inventory_stock_{event}")
+    _create_stock_triggers(cur)
+    # init_db jalan di setiap rerun: cukup cek keberadaan baris, bukan COUNT(*)
+    cur.execute(
+        "SELECT NOT EXISTS(SELECT 1 FROM stock_levels LIMIT 1) "
+        "AND EXISTS(SELECT 1 FROM inventory LIMIT 1) AS kosong"
+    )
+    if cur.fetchone()["kosong"]:
+        rebuild_stock_levels(cur)
+
+    # Harga pokok persediaan (FIFO / rata-rata bergerak), lihat models.costing
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS settings(
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """)
+    cur.execute("INSERT OR IGNORE INTO settings(key, value) VALUES ('costing_method', 'fifo')")
+    # Pengaturan (metode harga pokok, akun HPP, ...) ikut mengubah hasil laporan
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_settings_version_{event.lower()}
+            AFTER {event} ON settings
+            BEGIN
+                UPDATE data_version SET version = version + 1 WHERE id = 1;
+            END
+        """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS movement_costs(
+            movement_id INTEGER PRIMARY KEY,
+            kode_barang TEXT NOT NULL,
+            tanggal TEXT NOT NULL,
+            qty_in REAL NOT NULL,
+            qty_out REAL NOT NULL,
+            value_in REAL NOT NULL,
+            cogs REAL NOT NULL,
+            qty_after REAL NOT NULL,
+            value_after REAL NOT NULL,
+            layers TEXT NOT NULL
+        )
+    """)
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_movement_costs_item_date "
+        "ON movement_costs(kode_barang, tanggal, movement_id)"
+    )
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS cost_layers(
+            kode_barang TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            qty REAL NOT NULL,
+            unit_cost REAL NOT NULL,
+            PRIMARY KEY(kode_barang, seq)
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS cost_dirty(
+            kode_barang TEXT PRIMARY KEY,
+            from_date TEXT NOT NULL
+        )
+    """)
+    _create_cost_triggers(cur)
+    # Tautan mutasi persediaan ke jurnal HPP yang diposting otomatis
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS inventory_postings(
+            movement_id INTEGER PRIMARY KEY,
+            transaction_id INTEGER NOT NULL,
+            cogs REAL NOT NULL
+        )
+    """)
+    cur.execute("INSERT OR IGNORE INTO settings(key, value) VALUES ('akun_hpp', '5101')")
+    cur.execute("INSERT OR IGNORE INTO settings(key, value) VALUES ('akun_persediaan', '1103')")
+    # Selisih stock opname dibebankan ke HPP kecuali diatur lain
+    cur.execute("INSERT OR IGNORE INTO settings(key, value) VALUES ('akun_selisih_persediaan', '5101')")
+    cur.execute("""
+        INSERT OR IGNORE INTO cost_dirty(kode_barang, from_date)
+        SELECT DISTINCT kode_barang, '' FROM inventory
+        WHERE NOT EXISTS (SELECT 1 FROM movement_costs)
+    """)
+    if stale_stock_triggers:
+        _stock_values(cur)
+
+    # Job ekspor laporan di latar belakang (models.export_jobs)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS export_jobs(
+            id TEXT PRIMARY KEY,
+            job_key TEXT NOT NULL UNIQUE,
+            report TEXT NOT NULL,
+            params TEXT NOT NULL,
+            status TEXT NOT NULL CHECK(status IN ('queued','running','done','failed')),
+            progress INTEGER NOT NULL DEFAULT 0,
+            file_path TEXT,
+            size INTEGER,
+            error TEXT,
+            created_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT
+        )
+    """)
 
     cur.execute("SELECT COUNT(*) AS c FROM users")
     if cur.fetchone()["c"] == 0:
@@ -0,0 +1,262 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+from models import database
+from models.database import get_conn
+from models.artifact_cache import artifact_key, get_artifact, put_artifact
+from models import metrics
+
+# File sementara selama render; hasil akhir disimpan di cache laporan
+EXPORT_DIR = "ekspor"
+
+# PDF dirender di proses terpisah (CPU-bound), CSV cukup di thread
+PROCESS_WORKERS = 2
+THREAD_WORKERS = 2
+
+_pools = {}
+_pools_lock = threading.Lock()
+_recovered = False
+
+_JOBS = metrics.counter("merpati_export_jobs_total", "Permintaan ekspor per hasil", ("report", "status"))
+_JOB_SECONDS = metrics.histogram(
+    "merpati_export_job_seconds", "Waktu dari antre sampai file ekspor siap", ("report",),
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+
+def _init_worker(db_path):
+    database.DB_PATH = db_path
+
+def _pool(kind):
+    with _pools_lock:
+        if kind not in _pools:
+            if kind == "process":
+                _pools[kind] = ProcessPoolExecutor(
+                    max_workers=PROCESS_WORKERS, initializer=_init_worker, initargs=(database.DB_PATH,)
+                )
+            else:
+                _pools[kind] = ThreadPoolExecutor(max_workers=THREAD_WORKERS, thread_name_prefix="ekspor")
+        return _pools[kind]
+
+def _fail_orphaned_jobs():
+    """Job antre/berjalan dari proses server sebelumnya tidak akan pernah selesai."""
+    global _recovered
+    with _pools_lock:
+        if _recovered:
+            return
+        _recovered = True
+    conn = get_conn()
+    conn.execute(
+        "UPDATE export_jobs SET status='failed', error='Server dimulai ulang' "
+        "WHERE status IN ('queued', 'running')"
+    )
+    conn.commit()
+    conn.close()
+
+def _set_status(job_id, status, **fields):
+    cols = ", ".join(f"{k} = ?" for k in fields)
+    conn = get_conn()
+    conn.execute(
+        f"UPDATE export_jobs SET status = ?{', ' + cols if cols else ''} WHERE id = ?",
+        (status, *fields.values(), job_id),
+    )
+    conn.commit()
+    conn.close()
+
+def _tracked(job_id, rows, every=1000):
+    """Teruskan baris sambil mencatat jumlah baris yang sudah dirender ke export_jobs.progress."""
+    n = 0
+    for n, row in enumerate(rows, 1):
+        if n % every == 0:
+            conn = get_conn()
+            conn.execute("UPDATE export_jobs SET progress = ? WHERE id = ?", (n, job_id))
+            conn.commit()
+            conn.close()
+        yield row
+
+# -- renderer per jenis ekspor: tulis ke path, dipanggil di worker ----------
+def _render_journal_pdf(job_id, path, start_date=None, end_date=None, entry_type=None):
+    from libs import generate_journal_pdf
+    from models.transaction import iter_transactions
+    rows = _tracked(job_id, iter_transactions(entry_type, start_date, end_date))
+    with generate_journal_pdf(rows, start_date, end_date) as src, open(path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+
+def _render_ledger_pdf(job_id, path, start_date=None, end_date=None):
+    from libs import generate_ledger_pdf
+    from models.transaction import iter_ledger
+    rows = _tracked(job_id, iter_ledger(start_date, end_date))
+    with generate_ledger_pdf(rows, start_date, end_date) as src, open(path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+
+def _render_trial_balance_pdf(job_id, path):
+    from libs import generate_trial_balance_pdf
+    from models.transaction import trial_balance
+    with generate_trial_balance_pdf(trial_balance()) as src, open(path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+
+def _render_income_statement_pdf(job_id, path, start_date=None, end_date=None):
+    from libs import generate_income_statement_pdf
+    from models.reports import income_statement
+    data = income_statement(start_date, end_date) or {}
+    with open(path, "wb") as f:
+        f.write(generate_income_statement_pdf(data, start_date, end_date))
+
+def _render_comparative_income_statement_pdf(job_id, path, start_date, end_date, period="month"):
+    from libs import generate_comparative_income_statement_pdf
+    from models.reports import comparative_income_statement
+    df = comparative_income_statement(start_date, end_date, period)
+    with generate_comparative_income_statement_pdf(df, start_date, end_date) as src, open(path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+
+def _render_worksheet_pdf(job_id, path):
+    from libs import generate_worksheet_pdf
+    from models.transaction import worksheet
+    with open(path, "wb") as f:
+        f.write(generate_worksheet_pdf(worksheet()))
+
+def _render_inventory_valuation_csv(job_id, path, start_date=None, end_date=None):
+    from models.costing import inventory_valuation
+    inventory_valuation(start_date, end_date).to_csv(path, index=False)
+
+# nama ekspor -> (renderer, jenis pool, ekstensi file)
+EXPORTS = {
+    "journal_pdf": (_render_journal_pdf, "process", "pdf"),
+    "ledger_pdf": (_render_ledger_pdf, "process", "pdf"),
+    "trial_balance_pdf": (_render_trial_balance_pdf, "process", "pdf"),
+    "income_statement_pdf": (_render_income_statement_pdf, "process", "pdf"),
+    "comparative_income_statement_pdf": (_render_comparative_income_statement_pdf, "process", "pdf"),
+    "worksheet_pdf": (_render_worksheet_pdf, "process", "pdf"),
+    "inventory_valuation_csv": (_render_inventory_valuation_csv, "thread", "csv"),
+}
+
+def _run_job(job_id, report, params, tmp_path):
+    """Render di worker ke file sementara; hasilnya diproses _finish_job di proses utama."""
+    render = EXPORTS[report][0]
+    _set_status(job_id, "running", started_at=datetime.now().isoformat(timespec="seconds"))
+    try:
+        render(job_id, tmp_path, **params)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _finish_job(job_id, report, key, ext, tmp_path, queued_at, future):
+    # Dipanggil sebagai done-callback Future: exception di sini ditelan
+    # executor dan job tertinggal 'running', jadi semua kegagalan dicatat.
+    finished_at = datetime.now().isoformat(timespec="seconds")
+    _JOB_SECONDS.observe(time.monotonic() - queued_at, report=report)
+    error = future.exception()
+    try:
+        if error is None:
+            path = put_artifact(key, ext, tmp_path)
+            _set_status(job_id, "done", file_path=path, size=os.path.getsize(path), finished_at=finished_at)
+            _JOBS.inc(report=report, status="done")
+            return
+    except Exception as exc:
+        error = exc
+    _JOBS.inc(report=report, status="failed")
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        _set_status(job_id, "failed", error=str(error) or type(error).__name__, finished_at=finished_at)
+    except Exception:
+        # database tidak bisa ditulis sama sekali; job ini ditandai gagal
+        # oleh _fail_orphaned_jobs() pada ekspor berikutnya setelah restart
+        pass
+
+def submit_export(report, **params):
+    """
+    Antrekan ekspor laporan dan kembalikan id job.
+
+    Kuncinya artifact_key(): jenis, parameter, dan versi data (atau status
+    kunci periode). Permintaan identik digabung: selama job yang sama masih
+    antre/berjalan, atau filenya sudah ada di cache laporan, tidak ada
+    render baru.
+    """
+    if report not in EXPORTS:
+        raise ValueError(f"Jenis ekspor tidak dikenal: {report}")
+    params = {k: (str(v) if v is not None else None) for k, v in params.items()}
+    render, kind, ext = EXPORTS[report]
+    _fail_orphaned_jobs()
+
+    key = artifact_key(report, params, params.get("start_date"), params.get("end_date"))
+    cached = get_artifact(key, ext)
+    now = datetime.now().isoformat(timespec="seconds")
+
+    conn = get_conn()
+    conn.isolation_level = None
+    cur = conn.cursor()
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute("SELECT id, status FROM export_jobs WHERE job_key = ?", (key,))
+        job = cur.fetchone()
+        if job and (job["status"] in ("queued", "running") or (job["status"] == "done" and cached)):
+            cur.execute("COMMIT")
+            _JOBS.inc(report=report, status="coalesced")
+            return job["id"]
+        if job:
+            cur.execute("DELETE FROM export_jobs WHERE id = ?", (job["id"],))
+        job_id = uuid.uuid4().hex
+        if cached:
+            cur.execute(
+                """
+                INSERT INTO export_jobs(id, job_key, report, params, status, file_path, size, created_at, finished_at)
+                VALUES (?, ?, ?, ?, 'done', ?, ?, ?, ?)
+                """,
+                (job_id, key, report, json.dumps(params), cached, os.path.getsize(cached), now, now),
+            )
+        else:
+            cur.execute(
+                """
+                INSERT INTO export_jobs(id, job_key, report, params, status, created_at)
+                VALUES (?, ?, ?, ?, 'queued', ?)
+                """,
+                (job_id, key, report, json.dumps(params), now),
+            )
+        cur.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            cur.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    _JOBS.inc(report=report, status="cached" if cached else "queued")
+    if not cached:
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        tmp_path = os.path.join(EXPORT_DIR, f"{report}_{job_id}.{ext}.tmp")
+        future = _pool(kind).submit(_run_job, job_id, report, params, tmp_path)
+        future.add_done_callback(partial(_finish_job, job_id, report, key, ext, tmp_path, time.monotonic()))
+    return job_id
+
+def get_job(job_id):
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT * FROM export_jobs WHERE id = ?", (job_id,))
+    row = cur.fetchone()
+    conn.close()
+    return row
+
+def purge_exports(max_age_hours=24):
+    """
+    Hapus catatan job selesai/gagal yang lebih tua dari max_age_hours.
+    File hasil ekspor milik cache laporan dan dibersihkan oleh evict().
+    """
+    cutoff = (datetime.now() - timedelta(hours=max_age_hours)).isoformat(timespec="seconds")
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT id FROM export_jobs WHERE status IN ('done', 'failed') AND created_at < ?",
+        (cutoff,),
+    )
+    old = cur.fetchall()
+    cur.executemany("DELETE FROM export_jobs WHERE id = ?", [(j["id"],) for j in old])
+    conn.commit()
+    conn.close()
+    return len(old)
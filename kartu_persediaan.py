@@ -0,0 +1,67 @@
+import sqlite3
+import streamlit as st
+from libs import inject_css, top_bar, back_to_dashboard
+from models.stock import get_stock_levels, stock_card
+from models.costing import post_cogs_journal
+
+def page_kartu_persediaan():
+    inject_css()
+    top_bar()
+
+    st.markdown('<div class="report-shell">', unsafe_allow_html=True)
+    st.markdown('<div class="report-header-box">Kartu Persediaan</div>', unsafe_allow_html=True)
+    back_to_dashboard()
+
+    levels = get_stock_levels()
+    if not levels:
+        st.info("Belum ada data persediaan.")
+        st.markdown("</div>", unsafe_allow_html=True)
+        return
+
+    opsi = {f"{r['kode_barang']} - {r['nama_barang']}": r for r in levels}
+    pilih = st.selectbox("Pilih barang", list(opsi.keys()))
+    item = opsi[pilih]
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Stok", f"{item['qty_on_hand']:,.0f} {item['satuan']}".replace(",", "."))
+    with col2:
+        st.metric("Nilai", f"Rp {item['value_on_hand']:,.0f}".replace(",", "."))
+
+    col1, col2 = st.columns(2)
+    with col1:
+        start_date = st.date_input("Dari tanggal", value=None)
+    with col2:
+        end_date = st.date_input("Sampai tanggal", value=None)
+
+    df = stock_card(item["kode_barang"], start_date, end_date)
+    if df.empty:
+        st.info("Tidak ada mutasi pada rentang ini.")
+    else:
+        st.dataframe(
+            df.style.format({
+                "Harga per Unit": "Rp {:,.0f}",
+                "Nilai Mutasi": "Rp {:,.0f}",
+                "Saldo Nilai": "Rp {:,.0f}",
+            }),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+    st.markdown("---")
+    st.subheader("Posting HPP ke Jurnal")
+    if st.button("Posting HPP"):
+        try:
+            hasil = post_cogs_journal()
+        except (ValueError, sqlite3.Error) as e:
+            # sqlite3.Error: trigger kunci periode atau "database is locked"
+            st.error(str(e))
+        else:
+            st.success(
+                f"{hasil['posted']} jurnal HPP baru (Rp {hasil['total_hpp']:,.0f}), "
+                f"{hasil['repriced']} disesuaikan, {hasil['removed']} dihapus.".replace(",", ".")
+            )
+            if hasil["skipped_locked"]:
+                st.warning(f"{hasil['skipped_locked']} mutasi di periode terkunci dilewati.")
+
+    st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,60 @@
+from datetime import date
+import streamlit as st
+from libs import inject_css, top_bar, back_to_dashboard, export_download
+from models.reports import comparative_income_statement
+from models.profiler import phase
+
+PERIODE = {"Bulanan": "month", "Kuartalan": "quarter", "Tahunan": "year"}
+
+def page_laba_rugi_komparatif():
+    inject_css()
+    top_bar()
+
+    st.markdown('<div class="report-shell">', unsafe_allow_html=True)
+    st.markdown('<div class="report-header-box">Laba Rugi Komparatif</div>', unsafe_allow_html=True)
+    back_to_dashboard()
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        start_date = st.date_input("Dari tanggal", value=date(date.today().year, 1, 1))
+    with col2:
+        end_date = st.date_input("Sampai tanggal", value=date(date.today().year, 12, 31))
+    with col3:
+        periode = st.selectbox("Kolom", list(PERIODE.keys()))
+
+    if start_date > end_date:
+        st.error("Tanggal awal harus sebelum tanggal akhir.")
+        st.markdown("</div>", unsafe_allow_html=True)
+        return
+
+    with phase("data"):
+        df = comparative_income_statement(start_date, end_date, PERIODE[periode])
+    num_cols = list(df.columns[3:])
+
+    def bold_totals(row):
+        style = "font-weight: bold" if not row["Kode"] else ""
+        return [style] * len(row)
+
+    with phase("render"):
+        st.dataframe(
+            df.style.apply(bold_totals, axis=1).format({c: "{:,.0f}" for c in num_cols}),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+    laba = df.iloc[-1]
+    st.markdown(
+        f'<div class="report-footer-box">{laba["Keterangan"]}: Rp {laba["Total"]:,.0f}</div>'.replace(",", "."),
+        unsafe_allow_html=True,
+    )
+
+    export_download(
+        "Buat PDF",
+        "comparative_income_statement_pdf",
+        f"laba_rugi_komparatif_{start_date}_{end_date}.pdf",
+        start_date=start_date,
+        end_date=end_date,
+        period=PERIODE[periode],
+    )
+
+    st.markdown("</div>", unsafe_allow_html=True)
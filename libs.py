@@ -1,338 +1,56 @@
-import streamlit as st
+import functools
 import hashlib
+import os
+import streamlit as st
 
 def rerun():
     """Simple wrapper to trigger a Streamlit rerun using the public API."""
     st.rerun()
 
+STYLESHEET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "merpati.css")
+
+@functools.lru_cache(maxsize=1)
+def _stylesheet():
+    """Isi static/merpati.css dan versinya (hash isi), dibaca sekali per proses."""
+    with open(STYLESHEET, encoding="utf-8") as f:
+        css = f.read()
+    return css, hashlib.sha1(css.encode("utf-8")).hexdigest()[:10]
+
+def reset_css():
+    """Dipanggil app.main() di awal setiap rerun agar inject_css() memasang stylesheet lagi."""
+    st.session_state["_css_injected"] = False
+
 def inject_css():
-    st.markdown("""
-        <style>
-        /* Import Poppins font from Google Fonts */
-        @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@400;500;700;800&display=swap');
-
-        /* General dash card style */
-        .dash-card {
-            padding: 20px 25px;
-            border-radius: 20px;
-            margin-bottom: 22px;
-            font-weight: 700;
-            box-shadow: 0 8px 15px rgba(0, 0, 0, 0.1);
-            transition: transform 0.3s ease, box-shadow 0.3s ease;
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            color: #333;
-        }
-        .dash-card:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 12px 24px rgba(0, 0, 0, 0.15);
-        }
-
-        /* Pastel colors */
-        .yellow {
-            background: linear-gradient(135deg, #FFF6CC, #FFE99C);
-            color: #665500;
-        }
-        .mint {
-            background: linear-gradient(135deg, #D7F3E3, #A3E4C7);
-            color: #1A4D3E;
-        }
-        .lilac {
-            background: linear-gradient(135deg, #E9D8FD, #C8A2F8);
-            color: #4B2961;
-        }
-        .pink {
-            background: linear-gradient(135deg, #FFD7E3, #FFA3B1);
-            color: #610433;
-        }
-        /* New pastel blue and green */
-        .pastel-blue {
-            background: linear-gradient(135deg, #D0E7FF, #A3C8FF);
-            color: #1A3A66;
-        }
-        .pastel-green {
-            background: linear-gradient(135deg, #DFFFE9, #A6FFC1);
-            color: #1A593A;
-        }
-
-        /* Titles inside dash cards */
-        .dash-card-title {
-            font-size: 1.3rem;
-            margin-bottom: 8px;
-            letter-spacing: 0.03em;
-        }
-
-        /* Subtitles inside dash cards */
-        .dash-card-sub {
-            font-size: 1.15rem;
-            opacity: 0.85;
-            font-weight: 500;
-        }
-
-        /* Dashboard panels */
-        .dash-panel {
-            padding: 25px 30px;
-            background-color: #f7f1e1;
-            border-radius: 22px;
-            box-shadow: 0 8px 15px rgba(0, 0, 0, 0.05);
-            margin-bottom: 30px;
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-        }
-
-        /* Added styles for report box layouts */
-        .report-shell {
-            padding: 20px 25px;
-            border-radius: 20px;
-            margin-bottom: 22px;
-            box-shadow: 0 8px 15px rgba(0, 0, 0, 0.1);
-            background-color: #fff;
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            color: #333;
-
-            /* New added styles to fix text overflow */
-            max-width: 100%;
-            word-wrap: break-word;
-            overflow-wrap: break-word;
-            white-space: normal;
-            box-sizing: border-box;
-        }
-
-        /* Updated styles for report header box to enlarge for longer text */
-        .report-header-box {
-            font-weight: 700;
-            font-size: 1.5rem;  /* increased font size */
-            padding: 15px 40px;  /* increased horizontal padding */
-            margin-bottom: 18px;
-            border-radius: 14px;
-            background: linear-gradient(135deg, #A3C8FF, #D7F3E3);
-            color: #1A3A66;
-            box-shadow: 0 6px 12px rgba(26, 58, 102, 0.2);
-            user-select: none;
-
-            /* New added styles to fix text overflow */
-            max-width: 100%;
-            word-wrap: break-word;
-            overflow-wrap: break-word;
-            white-space: normal;
-            box-sizing: border-box;
-        }
-
-        .report-footer-box {
-            font-weight: 600;
-            font-size: 1.15rem;
-            padding: 12px 20px;
-            margin-top: 18px;
-            border-radius: 14px;
-            background: linear-gradient(135deg, #D7F3E3, #A3E4C7);
-            color: #1A4D3E;
-            box-shadow: 0 5px 10px rgba(26, 77, 62, 0.15);
-            text-align: right;
-            user-select: none;
-        }
-
-        /* Quick menu buttons */
-        .stButton > button {
-            padding: 12px 28px !important;
-            border-radius: 14px !important;
-            font-weight: 600 !important;
-            font-size: 1rem !important;
-            margin-bottom: 8px !important;
-            box-shadow: 0 3px 10px rgba(0,0,0,0.12) !important;
-            color: #fff !important;
-            border: none !important;
-            cursor: pointer !important;
-            width: 100%;
-            transition: background-color 0.3s ease, box-shadow 0.3s ease;
-        }
-        .stButton > button:focus {
-            outline: none !important;
-        }
-        /* Colors for quick menu buttons, pastel themed with pink, blue, purple, green cycle */
-        .stButton > button:enabled:nth-child(4n+1) {
-            background-color: #FFB6C1 !important; /* pastel pink */
-            color: #610433 !important;
-        }
-        .stButton > button:enabled:nth-child(4n+2) {
-            background-color: #A3C8FF !important; /* pastel blue */
-            color: #1A3A66 !important;
-        }
-        .stButton > button:enabled:nth-child(4n+3) {
-            background-color: #C8A2F8 !important; /* lilac/purple */
-            color: #4B2961 !important;
-        }
-        .stButton > button:enabled:nth-child(4n) {
-            background-color: #A3E4C7 !important; /* pastel green */
-            color: #1A4D3E !important;
-        }
-        .stButton > button:enabled:hover:nth-child(4n+1) {
-            background-color: #FFA3B1 !important;
-            box-shadow: 0 5px 15px rgba(97, 4, 51, 0.6) !important;
-        }
-        .stButton > button:enabled:hover:nth-child(4n+2) {
-            background-color: #82B0FF !important;
-            box-shadow: 0 5px 15px rgba(26, 58, 102, 0.6) !important;
-        }
-        .stButton > button:enabled:hover:nth-child(4n+3) {
-            background-color: #B593F8 !important;
-            box-shadow: 0 5px 15px rgba(75, 41, 97, 0.6) !important;
-        }
-        .stButton > button:enabled:hover:nth-child(4n) {
-            background-color: #8DD7B0 !important;
-            box-shadow: 0 5px 15px rgba(26, 77, 62, 0.6) !important;
-        }
-
-        /* --- New Sidebar Styling Enhance --- */
-        /* Style the sidebar container */
-        [data-testid="stSidebarNav"] {
-            background: linear-gradient(135deg, #A3C8FF, #D7F3E3);
-            padding: 25px 15px 25px 25px;
-            border-radius: 0 25px 25px 0;
-            box-shadow: 3px 0 15px rgba(0, 0, 0, 0.1);
-        }
-
-        /* Sidebar title */
-        [data-testid="stSidebarNav"]>div > h1, [data-testid="stSidebarNav"] > div > h2 {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            font-weight: 900;
-            font-size: 2rem;
-            color: #1A3A66;
-            letter-spacing: 0.08em;
-            margin-bottom: 30px;
-            text-align: center;
-            user-select: none;
-        }
-
-        /* Sidebar buttons container */
-        .sidebar-button {
-            margin-bottom: 10px;
-        }
-
-        /* Highlight selected button */
-        .sidebar-button-selected > button {
-            background-color: #82B0FF !important;
-            color: white !important;
-            box-shadow: 0 6px 12px rgba(26, 58, 102, 0.8) !important;
-        }
-
-        /* Table styles */
-        /* Targets Streamlit tables and dataframes */
-        div[data-testid="stTable"] table, div[data-testid="stDataFrame"] table {
-            border-collapse: separate !important;
-            border-spacing: 0 !important;
-            width: 100%;
-            border: 1px solid #ddd;
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            font-size: 0.9rem;
-            color: #333;
-        }
-        div[data-testid="stTable"] th, div[data-testid="stDataFrame"] th {
-            background: linear-gradient(135deg, #A3C8FF, #D7F3E3);
-            color: #1A3A66;
-            font-weight: 700;
-            padding: 4px 6px;
-            border-bottom: 2px solid #777;
-            text-align: left;
-        }
-        div[data-testid="stTable"] td, div[data-testid="stDataFrame"] td {
-            padding: 4px 6px;
-            border-bottom: 1px solid #eee;
-        }
-        /* Striped rows */
-        div[data-testid="stTable"] tbody tr:nth-child(odd),
-        div[data-testid="stDataFrame"] tbody tr:nth-child(odd) {
-            background-color: #f7f9fc;
-        }
-        /* Hover highlight */
-        div[data-testid="stTable"] tbody tr:hover,
-        div[data-testid="stDataFrame"] tbody tr:hover {
-            background-color: #ddeeff;
-            cursor: pointer;
-        }
-
-        /* --- Login Screen Styling --- */
-        .stApp {
-            height: 100vh;
-            background: linear-gradient(135deg, #82B0FF, #FFB6C1);
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-        }
-
-        /* Container for the login form */
-        .css-1lcbmhc.egzxvld0 { /* This targets Streamlit's main content container, adjust if needed */
-            background: transparent !important;
-            box-shadow: none !important;
-        }
-
-        .login-title {
-            font-size: 3rem;
-            font-weight: 800;
-            color: #ffffff;
-            text-align: center;
-            margin-bottom: 10px;
-            letter-spacing: 0.12em;
-            text-shadow: 1px 1px 5px rgba(0,0,0,0.5);
-            font-family: 'Poppins', 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-        }
-
-        .login-sub {
-            font-size: 1.25rem;
-            font-weight: 500;
-            color: #f0e6f6;
-            text-align: center;
-            margin-bottom: 30px;
-            letter-spacing: 0.07em;
-            font-style: italic;
-            font-family: 'Poppins', 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-        }
-
-        input[type="text"], input[type="password"] {
-            width: 100%;
-            padding: 12px 15px;
-            margin-bottom: 20px;
-            border-radius: 8px;
-            border: 1px solid #ccc;
-            font-size: 1.1rem;
-            font-family: 'Poppins', 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: white;
-            color: black;
-            font-weight: 400;
-            box-shadow: none;
-            transition: background 0.3s ease, box-shadow 0.3s ease;
-            cursor: text;
-            -webkit-appearance: none;
-            -moz-appearance: none;
-            appearance: none;
-        }
-
-        input[type="text"]:focus, input[type="password"]:focus {
-            outline: none;
-            box-shadow: 0 0 3px 2px rgba(0, 123, 255, 0.6);
-            background: white;
-        }
-
-        /* Style the login button */
-        .stButton > button {
-            background: linear-gradient(135deg, #ff8fa3, #ff4d6d) !important;
-            color: white !important;
-            font-size: 1.2rem !important;
-            font-weight: 700 !important;
-            padding: 14px 30px !important;
-            border-radius: 18px !important;
-            border: none !important;
-            box-shadow: 0 6px 15px rgba(255, 77, 109, 0.6) !important;
-            transition: background 0.3s ease, box-shadow 0.3s ease !important;
-            width: 100%;
-            cursor: pointer !important;
-            font-family: 'Poppins', 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif !important;
-        }
-
-        .stButton > button:hover {
-            background: linear-gradient(135deg, #ff4d6d, #ff1a3c) !important;
-            box-shadow: 0 8px 20px rgba(255, 26, 60, 0.8) !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
+    """
+    Pasang stylesheet aplikasi, sekali per rerun.
+
+    Dengan server.enableStaticServing (.streamlit/config.toml) yang dikirim
+    hanya tag <link> ke app/static/merpati.css?v=<hash>; browser menyimpan
+    filenya dan baru mengambil ulang bila isinya berubah. Tanpa static
+    serving, isi CSS dikirim inline. Panggilan berikutnya dalam rerun yang
+    sama (main() lalu page_*) diabaikan.
+    """
+    if st.session_state.get("_css_injected"):
+        return
+    st.session_state["_css_injected"] = True
+    css, version = _stylesheet()
+    if st.get_option("server.enableStaticServing"):
+        st.markdown(f'<link rel="stylesheet" href="app/static/merpati.css?v={version}">', unsafe_allow_html=True)
+    else:
+        st.markdown(f"<style>\n{css}</style>", unsafe_allow_html=True)
+
+def session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "-"
+
+def page_cache():
+    """
+    Cache DataFrame besar milik sesi ini (models.memory.SessionCache).
+    Isinya bisa dibuang saat anggaran memori terlampaui; get() lalu None.
+    """
+    from models.memory import session_cache
+    return session_cache(st.session_state, session_id())
 
 def top_bar():
     col1, col2 = st.columns([3, 1])
@@ -350,8 +68,9 @@ def back_to_dashboard():
         st.session_state.page = "Dashboard"
         rerun()
 
-from fpdf import FPDF
 import io
+import tempfile
+import zlib
 
 def format_rupiah(value: float) -> str:
     """Format number to Rupiah currency string with dots as thousand separator and 2 decimals.""" 
@@ -359,6 +78,213 @@ def format_rupiah(value: float) -> str:
         return ""
     return "Rp {:,.2f}".format(value).replace(",", ".")
 
+class BoldRow(tuple):
+    """Baris tebal (judul atau total bagian); tidak ikut subtotal halaman."""
+
+class StreamingTablePDF:
+    """
+    PDF tabel yang ditulis halaman demi halaman ke SpooledTemporaryFile.
+
+    Baris dibaca dari iterable (mis. cursor fetchmany), jadi memori tetap
+    datar berapa pun jumlah halamannya: setiap halaman yang penuh langsung
+    dikompres dan ditulis, hanya offset objek yang disimpan. Header tabel
+    diulang tiap halaman, kolom di subtotal_cols dijumlah per halaman dan
+    total keseluruhan dicetak di akhir. FPDF hanya dipakai untuk mengukur
+    lebar teks (font inti Helvetica).
+
+    columns: list (judul, lebar mm, align "L"/"C"/"R").
+    """
+
+    K = 72 / 25.4
+    MARGIN = 10
+    ROW_H = 6
+    SPOOL_SIZE = 1024 * 1024
+
+    def __init__(self, title, columns, subtitle=None, orientation="P", subtotal_cols=(),
+                 font_size=8, number_format=None):
+        from fpdf import FPDF
+        self.title = title
+        self.subtitle = subtitle
+        self.columns = columns
+        self.subtotal_cols = tuple(subtotal_cols)
+        self.font_size = font_size
+        self.number_format = number_format or (lambda v: "{:,.0f}".format(v).replace(",", "."))
+        self.w, self.h = (297, 210) if orientation == "L" else (210, 297)
+        self._metrics = {}
+        for style in ("", "B"):
+            m = FPDF()
+            m.set_font("Arial", style, 1)
+            self._metrics[style] = m
+        self._char_widths = {}
+
+    # -- penulisan objek PDF --------------------------------------------
+    def _new_obj(self):
+        self._offsets.append(None)
+        return len(self._offsets)
+
+    def _write_obj(self, n, body):
+        self._offsets[n - 1] = self._out.tell()
+        self._out.write(f"{n} 0 obj\n".encode("latin-1") + body + b"\nendobj\n")
+
+    def _write_stream(self, n, data):
+        data = zlib.compress(data)
+        self._write_obj(
+            n,
+            f"<< /Filter /FlateDecode /Length {len(data)} >>\nstream\n".encode("latin-1")
+            + data + b"\nendstream",
+        )
+
+    # -- isi halaman ------------------------------------------------------
+    def _text(self, x, y, h, text, width, align, bold, size=None):
+        size = size or self.font_size
+        text, tw = self._fit(text, width, bold, size)
+        if not text:
+            return
+        if align == "R":
+            x += width - tw - 1
+        elif align == "C":
+            x += (width - tw) / 2
+        else:
+            x += 1
+        size_mm = size / self.K
+        base = self.h - (y + 0.5 * h + 0.3 * size_mm)
+        esc = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        font = "/F2" if bold else "/F1"
+        self._page.append(
+            f"BT {font} {size} Tf {x * self.K:.2f} {base * self.K:.2f} Td ({esc}) Tj ET"
+        )
+
+    def _widths(self, text, bold, size):
+        # lebar per karakter (font 1pt) di-cache; lebar string = jumlahnya
+        style = "B" if bold else ""
+        cw = self._char_widths.setdefault(style, {})
+        out = []
+        for ch in text:
+            if ch not in cw:
+                cw[ch] = self._metrics[style].get_string_width(ch)
+            out.append(cw[ch] * size)
+        return out
+
+    def _fit(self, text, width, bold, size):
+        """Potong teks (dengan "..") supaya muat di sel; kembalikan (teks, lebar)."""
+        text = "" if text is None else str(text)
+        widths = self._widths(text, bold, size)
+        total = sum(widths)
+        if total <= width - 2:
+            return text, total
+        limit = width - 2 - sum(self._widths("..", bold, size))
+        used = 0.0
+        for i, w in enumerate(widths):
+            if used + w > limit:
+                return text[:i] + "..", used + (width - 2 - limit)
+            used += w
+        return text, total
+
+    def _rect(self, x, y, w, h):
+        self._page.append(f"{x * self.K:.2f} {(self.h - y - h) * self.K:.2f} {w * self.K:.2f} {h * self.K:.2f} re S")
+
+    def _row(self, values, bold=False):
+        x = self.MARGIN
+        for (_, width, align), value in zip(self.columns, values):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = self.number_format(value)
+            self._rect(x, self._y, width, self.ROW_H)
+            self._text(x, self._y, self.ROW_H, value, width, align, bold)
+            x += width
+        self._y += self.ROW_H
+
+    def _sum_row(self, label, sums):
+        values = [""] * len(self.columns)
+        # label di kolom kedua (biasanya keterangan) bila kolom itu tidak dijumlah
+        values[1 if len(self.columns) > 2 and 1 not in self.subtotal_cols else 0] = label
+        for i in self.subtotal_cols:
+            values[i] = sums[i]
+        self._row(values, bold=True)
+
+    def _start_page(self):
+        self._page = ["0.2 w"]
+        self._y = self.MARGIN
+        if self._page_no == 0:
+            self._text(0, self._y, 8, self.title, self.w, "C", True, size=14)
+            self._y += 8
+            if self.subtitle:
+                self._text(0, self._y, 6, self.subtitle, self.w, "C", False)
+                self._y += 6
+            self._y += 4
+        self._page_no += 1
+        self._row([c[0] for c in self.columns], bold=True)
+        self._page_sums = dict.fromkeys(self.subtotal_cols, 0.0)
+
+    def _end_page(self):
+        self._text(0, self.h - self.MARGIN, 5, f"Halaman {self._page_no}", self.w, "C", False)
+        content, page = self._new_obj(), self._new_obj()
+        self._write_stream(content, "\n".join(self._page).encode("latin-1", "replace"))
+        self._write_obj(
+            page,
+            (
+                f"<< /Type /Page /Parent 1 0 R /MediaBox [0 0 {self.w * self.K:.2f} {self.h * self.K:.2f}] "
+                f"/Resources << /Font << /F1 2 0 R /F2 3 0 R >> >> /Contents {content} 0 R >>"
+            ).encode("latin-1"),
+        )
+        self._kids.append(page)
+
+    # -- API --------------------------------------------------------------
+    def write(self, rows):
+        """
+        Render semua baris dan kembalikan SpooledTemporaryFile (posisi di awal).
+        Baris BoldRow dicetak tebal dan tidak ikut dijumlah.
+        """
+        self._out = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_SIZE)
+        self._out.write(b"%PDF-1.4\n")
+        self._offsets, self._kids, self._page_no = [], [], 0
+        pages_obj, font, font_bold = self._new_obj(), self._new_obj(), self._new_obj()
+        for n, base in ((font, "Helvetica"), (font_bold, "Helvetica-Bold")):
+            self._write_obj(
+                n,
+                f"<< /Type /Font /Subtype /Type1 /BaseFont /{base} /Encoding /WinAnsiEncoding >>".encode("latin-1"),
+            )
+
+        totals = dict.fromkeys(self.subtotal_cols, 0.0)
+        # sisakan tempat untuk baris subtotal dan nomor halaman
+        bottom = self.h - self.MARGIN - 5 - (self.ROW_H if self.subtotal_cols else 0)
+        self._start_page()
+        for row in rows:
+            if self._y + self.ROW_H > bottom:
+                if self.subtotal_cols:
+                    self._sum_row("Subtotal halaman", self._page_sums)
+                self._end_page()
+                self._start_page()
+            bold = isinstance(row, BoldRow)
+            self._row(row, bold=bold)
+            if not bold:
+                for i in self.subtotal_cols:
+                    value = row[i] or 0
+                    self._page_sums[i] += value
+                    totals[i] += value
+        if self.subtotal_cols:
+            if self._y + 2 * self.ROW_H > self.h - self.MARGIN - 5:
+                self._sum_row("Subtotal halaman", self._page_sums)
+                self._end_page()
+                self._start_page()
+            self._sum_row("Subtotal halaman", self._page_sums)
+            self._sum_row("TOTAL", totals)
+        self._end_page()
+
+        kids = " ".join(f"{k} 0 R" for k in self._kids)
+        self._write_obj(pages_obj, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._kids)} >>".encode("latin-1"))
+        catalog = self._new_obj()
+        self._write_obj(catalog, b"<< /Type /Catalog /Pages 1 0 R >>")
+
+        xref = self._out.tell()
+        self._out.write(f"xref\n0 {len(self._offsets) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+        for offset in self._offsets:
+            self._out.write(f"{offset:010d} 00000 n \n".encode("latin-1"))
+        self._out.write(
+            f"trailer\n<< /Size {len(self._offsets) + 1} /Root {catalog} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+        )
+        self._out.seek(0)
+        return self._out
+
 def generate_income_statement_pdf(data, start_date=None, end_date=None):
     """
     Generate a PDF bytes of the income statement report.
@@ -369,40 +295,258 @@ def generate_income_statement_pdf(data, start_date=None, end_date=None):
     Returns:
         bytes: PDF data in bytes.
     """
-    pdf = FPDF()
+    subtitle = f"Periode: {start_date} s/d {end_date}" if start_date and end_date else None
+
+    def rows():
+        sections = [
+            ("Pendapatan", "pendapatan"),
+            ("Harga Pokok Penjualan", "hpp"),
+            ("Beban Operasional", "beban_operasional"),
+            ("Pendapatan Lain-lain", "pendapatan_lain"),
+            ("Beban Lain-lain", "beban_lain"),
+        ]
+        for title, key in sections:
+            section = data.get(key) or {}
+            yield BoldRow((title, ""))
+            for item in section.get("items", []):
+                yield (f"{item['code']} {item['name']}", format_rupiah(item["amount"]))
+            yield BoldRow((f"Total {title}", format_rupiah(section.get("total", 0))))
+            if key == "hpp":
+                yield BoldRow(("Laba Kotor", format_rupiah(data.get("laba_kotor", 0))))
+        laba = data.get("laba_bersih", 0)
+        yield BoldRow(("Laba Bersih" if laba >= 0 else "Rugi Bersih", format_rupiah(laba)))
+
+    pdf = StreamingTablePDF(
+        "Laporan Laba Rugi",
+        [("Keterangan", 140, "L"), ("Jumlah", 50, "R")],
+        subtitle=subtitle,
+    )
+    with pdf.write(rows()) as f:
+        return f.read()
+
+def generate_worksheet_pdf(df):
+    """
+    Generate a PDF bytes of the worksheet (neraca lajur) report.
+    Args:
+        df (DataFrame): Worksheet data from models.transaction.worksheet().
+    Returns:
+        bytes: PDF data in bytes.
+    """
+    from fpdf import FPDF
+    pdf = FPDF(orientation="L")
     pdf.add_page()
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.set_font("Arial", 'B', 16)
-    pdf.cell(0, 10, "Laporan Laba Rugi", ln=True, align="C")
-
-    if start_date and end_date:
-        pdf.set_font("Arial", '', 12)
-        pdf.cell(0, 10, f"Periode: {start_date} s/d {end_date}", ln=True, align="C")
-
-    pdf.ln(10)
-
-    def add_section(title, section_data, is_credit=True):
-        pdf.set_font("Arial", 'B', 14)
-        pdf.set_text_color(0, 51, 102)  # dark blue
-        pdf.cell(0, 10, title, ln=True)
-        pdf.set_font("Arial", '', 12)
-        pdf.set_text_color(0, 0, 0)  # black
-        if section_data and section_data.get("items"):
-            for item in section_data["items"]:
-                amount_str = format_rupiah(item["amount"])
-                pdf.cell(150, 8, f"{item['code']} {item['name']}", border=0)
-                pdf.cell(40, 8, amount_str, border=0, align='R')
-                pdf.ln()
-        total_str = format_rupiah(section_data.get("total", 0))
-        pdf.set_font("Arial", 'B', 12)
-        pdf.cell(150, 8, "TOTAL", border=0)
-        pdf.cell(40, 8, total_str, border=0, align='R')
-        pdf.ln(10)
-
-    add_section("Pendapatan", data.get("pendapatan", {}), is_credit=True)
-    add_section("Harga Pokok Penjualan", data.get("hpp", {}), is_credit=False)
-    add_section("Beban Operasional", data.get("beban_operasional", {}), is_credit=False)
-    add_section("Pendapatan Lain-lain", data.get("pendapatan_lain", {}), is_credit=True)
-    add_section("Beban Lain-lain", data.get("beban_lain", {}), is_credit=False)
-
-    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, "Neraca Lajur", ln=True, align="C")
+    pdf.ln(4)
+
+    pairs = ["Neraca Saldo", "Penyesuaian", "NS Disesuaikan", "Laba Rugi", "Neraca"]
+    num_cols = list(df.columns[2:])
+    w_code, w_name, w_num = 14, 47, 21.6
+
+    def fmt(value):
+        return "{:,.0f}".format(value).replace(",", ".") if value else "-"
+
+    def header():
+        pdf.set_font("Arial", 'B', 7)
+        pdf.cell(w_code, 6, "", border=1)
+        pdf.cell(w_name, 6, "", border=1)
+        for title in pairs:
+            pdf.cell(w_num * 2, 6, title, border=1, align="C")
+        pdf.ln()
+        pdf.cell(w_code, 6, "Kode", border=1, align="C")
+        pdf.cell(w_name, 6, "Nama Akun", border=1, align="C")
+        for _ in pairs:
+            pdf.cell(w_num, 6, "Debit", border=1, align="C")
+            pdf.cell(w_num, 6, "Kredit", border=1, align="C")
+        pdf.ln()
+        pdf.set_font("Arial", '', 7)
+
+    header()
+    for row in df.itertuples(index=False):
+        if pdf.get_y() > pdf.h - 25:
+            pdf.add_page()
+            header()
+        pdf.cell(w_code, 6, str(row[0]), border=1)
+        pdf.cell(w_name, 6, str(row[1])[:32], border=1)
+        for value in row[2:]:
+            pdf.cell(w_num, 6, fmt(value), border=1, align="R")
+        pdf.ln()
+
+    totals = df[num_cols].sum()
+    pdf.set_font("Arial", 'B', 7)
+    pdf.cell(w_code + w_name, 6, "TOTAL", border=1)
+    for col in num_cols:
+        pdf.cell(w_num, 6, fmt(totals[col]), border=1, align="R")
+    pdf.ln()
+
+    laba = totals["Laba Rugi Kredit"] - totals["Laba Rugi Debit"]
+    label = "Laba Bersih" if laba >= 0 else "Rugi Bersih"
+    pdf.cell(w_code + w_name, 6, label, border=1)
+    pdf.cell(w_num * 6, 6, "", border=1)
+    pdf.cell(w_num, 6, fmt(laba) if laba >= 0 else "-", border=1, align="R")
+    pdf.cell(w_num, 6, fmt(-laba) if laba < 0 else "-", border=1, align="R")
+    pdf.cell(w_num, 6, fmt(-laba) if laba < 0 else "-", border=1, align="R")
+    pdf.cell(w_num, 6, fmt(laba) if laba >= 0 else "-", border=1, align="R")
+    pdf.ln()
+
+    return pdf.output(dest="S").encode("latin-1")
+
+def _period_subtitle(start_date=None, end_date=None):
+    if start_date or end_date:
+        return f"Periode: {start_date or 'awal'} s/d {end_date or 'akhir'}"
+    return None
+
+def generate_journal_pdf(rows, start_date=None, end_date=None):
+    """
+    Jurnal umum dari iterable transaksi (mis. models.transaction.iter_transactions()).
+    Returns:
+        SpooledTemporaryFile: PDF, posisi di awal file.
+    """
+    def lines():
+        for r in rows:
+            yield (r["tx_date"], r["description"], f"{r['debit_code']} {r['debit_name']}", r["amount"], None)
+            yield ("", "", f"    {r['credit_code']} {r['credit_name']}", None, r["amount"])
+
+    pdf = StreamingTablePDF(
+        "Jurnal Umum",
+        [("Tanggal", 22, "L"), ("Keterangan", 68, "L"), ("Akun", 50, "L"), ("Debit", 25, "R"), ("Kredit", 25, "R")],
+        subtitle=_period_subtitle(start_date, end_date),
+        subtotal_cols=(3, 4),
+    )
+    return pdf.write(lines())
+
+def generate_ledger_pdf(rows, start_date=None, end_date=None):
+    """
+    Buku besar dari iterable models.transaction.iter_ledger(), dengan saldo
+    berjalan per akun.
+    Returns:
+        SpooledTemporaryFile: PDF, posisi di awal file.
+    """
+    def lines():
+        account, saldo = None, 0.0
+        for r in rows:
+            if r["code"] != account:
+                if account is not None:
+                    yield BoldRow(("", "Saldo Akhir", "", "", saldo))
+                account, saldo = r["code"], 0.0
+                yield BoldRow((f"{r['code']}", r["name"], "", "", ""))
+            saldo += (r["debit"] or 0) - (r["credit"] or 0)
+            yield (r["tx_date"], r["description"], r["debit"] or None, r["credit"] or None, saldo)
+        if account is not None:
+            yield BoldRow(("", "Saldo Akhir", "", "", saldo))
+
+    pdf = StreamingTablePDF(
+        "Buku Besar",
+        [("Tanggal", 22, "L"), ("Keterangan", 88, "L"), ("Debit", 27, "R"), ("Kredit", 27, "R"), ("Saldo", 26, "R")],
+        subtitle=_period_subtitle(start_date, end_date),
+        subtotal_cols=(2, 3),
+    )
+    return pdf.write(lines())
+
+def generate_trial_balance_pdf(df, title="Neraca Saldo"):
+    """
+    Neraca saldo dari DataFrame models.transaction.trial_balance*().
+    Returns:
+        SpooledTemporaryFile: PDF, posisi di awal file.
+    """
+    pdf = StreamingTablePDF(
+        title,
+        [("Kode", 20, "L"), ("Nama Akun", 100, "L"), ("Debit", 35, "R"), ("Kredit", 35, "R")],
+        subtotal_cols=(2, 3),
+    )
+    return pdf.write(
+        (kode, nama, float(debit or 0), float(kredit or 0))
+        for kode, nama, debit, kredit in df.itertuples(index=False, name=None)
+    )
+
+@st.fragment(run_every=2)
+def _poll_export(job_id):
+    from models.export_jobs import get_job
+    job = get_job(job_id)
+    if job is None or job["status"] in ("done", "failed"):
+        st.rerun()
+    msg = "Menunggu antrean ekspor..." if job["status"] == "queued" else "Sedang membuat file..."
+    if job["progress"]:
+        msg += f" {job['progress']:,} baris".replace(",", ".")
+    st.info(msg)
+
+def export_download(label, report, file_name, **params):
+    """
+    Tombol ekspor lewat antrean job latar belakang (models.export_jobs).
+    Halaman tidak menunggu render; status dicek berkala lalu tombol unduh
+    muncul begitu file siap.
+    """
+    from models.export_jobs import submit_export, get_job
+
+    key = f"export_{report}_{sorted((k, str(v)) for k, v in params.items())}"
+    if st.button(label, key=key + "_btn"):
+        st.session_state[key] = submit_export(report, **params)
+
+    job_id = st.session_state.get(key)
+    if not job_id:
+        return
+    job = get_job(job_id)
+    if job is not None and job["status"] == "done" and not os.path.exists(job["file_path"]):
+        # file sudah dibuang dari cache laporan; render ulang
+        job_id = st.session_state[key] = submit_export(report, **params)
+        job = get_job(job_id)
+    if job is None:
+        st.session_state.pop(key, None)
+    elif job["status"] == "done":
+        with open(job["file_path"], "rb") as f:
+            st.download_button(
+                "Unduh " + file_name,
+                data=f.read(),
+                file_name=file_name,
+                mime="application/pdf" if file_name.endswith(".pdf") else "text/csv",
+                key=key + "_dl",
+            )
+    elif job["status"] == "failed":
+        st.error(f"Ekspor gagal: {job['error']}")
+    else:
+        _poll_export(job_id)
+
+def debug_panel(prof):
+    """Panel lipat berisi rincian waktu render halaman (dari models.profiler.render())."""
+    with st.expander(f"Debug: render {prof['total_ms']:.0f} ms, {prof['queries']} query"):
+        st.dataframe(
+            [{"Fase": name, "Waktu (ms)": round(ms, 1)} for name, ms in prof["phases"].items()]
+            + [{"Fase": f"query ({prof['queries']}x, termasuk di atas)", "Waktu (ms)": round(prof["query_ms"], 1)}],
+            use_container_width=True,
+            hide_index=True,
+        )
+        if prof["profile_path"]:
+            st.caption(f"Profil cProfile disimpan di {prof['profile_path']}")
+        else:
+            st.caption("Tambahkan ?profile=1 pada URL untuk merekam profil cProfile rerun berikutnya.")
+
+def generate_comparative_income_statement_pdf(df, start_date=None, end_date=None):
+    """
+    Laba rugi komparatif dari models.reports.comparative_income_statement().
+    Returns:
+        SpooledTemporaryFile: PDF, posisi di awal file.
+    """
+    periods = list(df.columns[3:])
+    w_label = 60
+    w_num = (297 - 20 - w_label) / len(periods)
+
+    def rows():
+        section = None
+        for bagian, kode, keterangan, *values in df.itertuples(index=False, name=None):
+            if not kode:
+                yield BoldRow((keterangan, *values))
+                continue
+            if bagian != section:
+                section = bagian
+                yield BoldRow((bagian, *[""] * len(values)))
+            yield (f"{kode} {keterangan}", *values)
+
+    pdf = StreamingTablePDF(
+        "Laporan Laba Rugi Komparatif",
+        [("Keterangan", w_label, "L")] + [(p, w_num, "R") for p in periods],
+        subtitle=_period_subtitle(start_date, end_date),
+        orientation="L",
+        font_size=7 if len(periods) > 7 else 8,
+    )
+    return pdf.write(rows())
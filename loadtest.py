@@ -0,0 +1,263 @@
+"""
+Uji beban sesi bersamaan untuk app.py dengan streamlit.testing AppTest.
+
+Setiap pengguna simulasi adalah satu AppTest (satu sesi Streamlit) di
+proses sendiri: AppTest memasang Runtime Streamlit global per proses pada
+setiap run, sehingga dua sesi dalam satu proses saling menimpa. Kunci
+SQLite berlaku per file, jadi perebutan tulis (error "database is locked")
+sama seperti di server; cache di memori (laporan, memori sesi) terpisah per
+proses, sehingga hit rate cache lebih rendah daripada server sungguhan.
+Pengguna login, lalu berulang kali memilih menu di sidebar, mencatat
+transaksi, dan membuka laporan. Database kerja adalah salinan jurnal
+sintetis (synthetic_ledger), sehingga database aplikasi tidak tersentuh.
+
+    python loadtest.py --users 30 --iterations 20
+    python loadtest.py --users 50 --size 100k --think 0.5 --save hasil.json
+
+Laporan: throughput (interaksi/detik), latensi p50/p95/p99 per halaman,
+jumlah error "database is locked", dan error lain.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import time
+from datetime import datetime
+from models import benchmark, database, metrics, synthetic_ledger
+from models.user import add_user
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+WORK_DIR = "bench_data"
+PASSWORD = "beban123"
+# Batas waktu satu rerun; rerun yang lebih lama dicatat sebagai error
+TIMEOUT = 120
+
+# Bobot langkah per iterasi: (bobot, jenis, halaman)
+STEPS = [
+    (25, "posting", "Transaksi"),
+    (10, "page", "Dashboard"),
+    (10, "page", "Jurnal"),
+    (10, "page", "Buku Besar"),
+    (10, "page", "Neraca Saldo"),
+    (8, "page", "Neraca Lajur"),
+    (8, "page", "Laba Rugi"),
+    (5, "page", "Laba Rugi Komparatif"),
+    (5, "page", "Laporan Posisi Keuangan"),
+    (4, "page", "Kartu Persediaan"),
+    (5, "page", "Nilai Persediaan"),
+]
+
+class Recorder:
+    """Sampel latensi dan error satu pengguna simulasi."""
+
+    def __init__(self):
+        self.samples = []   # (halaman, aksi, ms, ok)
+        self.errors = []    # (halaman, aksi, pesan)
+
+    def add(self, page, action, ms, errors):
+        self.samples.append((page, action, ms, not errors))
+        self.errors.extend((page, action, e) for e in errors)
+
+def percentile(values, q):
+    """Persentil q (0-100) dengan interpolasi linear; None bila kosong."""
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * q / 100
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+def _errors(at):
+    """Pesan exception dan st.error yang tampil pada rerun terakhir."""
+    out = [e.message or str(e.value) for e in at.exception]
+    out += [e.value for e in at.error]
+    return out
+
+def _widget(elements, label):
+    for w in elements:
+        if w.label == label:
+            return w
+    raise LookupError(f"widget '{label}' tidak ditemukan")
+
+def _timed(rec, page, action, fn):
+    t0 = time.perf_counter()
+    try:
+        at = fn()
+        errors = _errors(at)
+    except Exception as exc:   # timeout AppTest, widget hilang, dsb.
+        errors = [f"{type(exc).__name__}: {exc}"]
+    rec.add(page, action, (time.perf_counter() - t0) * 1000, errors)
+    return not errors
+
+def _open(at, page):
+    return _widget(at.sidebar.button, page).click().run(timeout=TIMEOUT)
+
+def _post(at, rng, n):
+    _widget(at.text_input, "Keterangan").input(f"Uji beban #{n}")
+    _widget(at.number_input, "Jumlah").set_value(float(rng.randrange(1, 500) * 1000))
+    debit, kredit = _widget(at.selectbox, "Akun Debit"), _widget(at.selectbox, "Akun Kredit")
+    options = debit.options
+    i, j = rng.sample(range(len(options)), 2)
+    debit.set_value(options[i])
+    kredit.set_value(options[j])
+    return _widget(at.button, "Simpan Transaksi").click().run(timeout=TIMEOUT)
+
+def simulate_user(username, iterations, think, seed, rec):
+    """Satu sesi: login, lalu iterations langkah acak sesuai STEPS."""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(APP_PATH, default_timeout=TIMEOUT)
+    if not _timed(rec, "Login", "load", lambda: at.run()):
+        return
+    _widget(at.text_input, "Username").input(username)
+    _widget(at.text_input, "Password").input(PASSWORD)
+    if not _timed(rec, "Login", "submit", lambda: _widget(at.button, "Masuk").click().run(timeout=TIMEOUT)):
+        return
+
+    weights = [s[0] for s in STEPS]
+    for n in range(iterations):
+        if think:
+            time.sleep(rng.uniform(0, 2 * think))
+        _, kind, page = rng.choices(STEPS, weights)[0]
+        if not _timed(rec, page, "open", lambda: _open(at, page)):
+            continue
+        if kind == "posting":
+            _timed(rec, page, "posting", lambda: _post(at, rng, n))
+
+def _worker(db_path, username, iterations, think, seed, delay, barrier, queue):
+    database.DB_PATH = db_path
+    # endpoint /metrics tidak perlu (dan port-nya bisa bentrok antar proses)
+    metrics.METRICS_PORT = 0
+    # peringatan ScriptRunContext/deprekasi dari AppTest menenggelamkan laporan
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    rec = Recorder()
+    try:
+        barrier.wait()
+        time.sleep(delay)
+        simulate_user(username, iterations, think, seed, rec)
+    except Exception as exc:
+        rec.add("-", "worker", 0.0, [f"{type(exc).__name__}: {exc}"])
+    finally:
+        queue.put((rec.samples, rec.errors))
+
+def prepare_db(size, users):
+    """
+    Salin jurnal sintetis ukuran size (dibuat oleh benchmark.ensure_db bila
+    belum ada) ke database kerja baru dan buat akun pengguna uji staf01..stafNN.
+    """
+    source = benchmark.ensure_db(size)
+    work = os.path.join(WORK_DIR, f"loadtest_{synthetic_ledger.parse_size(size)}.db")
+    shutil.copyfile(source, work)
+    database.DB_PATH = work
+    database.init_db()
+    names = [f"staf{i:02d}" for i in range(1, users + 1)]
+    for name in names:
+        add_user(name, PASSWORD)
+    return work, names
+
+def summarize(rec, wall_s, users):
+    """
+    Returns:
+    - dict: users, interactions, wall_s, throughput, lock_errors, other_errors,
+      overall (p50/p95/p99/max ms) dan pages {halaman: {...}}
+    """
+    def stats(values):
+        return {
+            "n": len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+            "max_ms": max(values) if values else None,
+        }
+
+    by_page = {}
+    for page, action, ms, ok in rec.samples:
+        by_page.setdefault(f"{page} ({action})", []).append(ms)
+    lock_errors = [e for e in rec.errors if "locked" in e[2].lower()]
+    return {
+        "users": users,
+        "interactions": len(rec.samples),
+        "wall_s": wall_s,
+        "throughput": len(rec.samples) / wall_s if wall_s else 0.0,
+        "lock_errors": len(lock_errors),
+        "other_errors": len(rec.errors) - len(lock_errors),
+        "error_samples": sorted({e[2] for e in rec.errors})[:10],
+        "overall": stats([s[2] for s in rec.samples]),
+        "pages": {name: stats(values) for name, values in sorted(by_page.items())},
+    }
+
+def run(users, iterations, size="10k", think=0.0, ramp=0.0, seed=1):
+    """
+    Siapkan database, jalankan semua pengguna bersamaan, dan ringkas hasilnya.
+    ramp: detik sampai pengguna terakhir mulai login (0 = semua serentak).
+    """
+    old_path = database.DB_PATH
+    try:
+        work, names = prepare_db(size, users)
+    finally:
+        database.DB_PATH = old_path
+    methods = multiprocessing.get_all_start_methods()
+    mp = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    barrier = mp.Barrier(users + 1)
+    queue = mp.Queue()
+    procs = [
+        mp.Process(target=_worker, name=f"beban-{name}",
+                   args=(work, name, iterations, think, seed * 1000 + i, ramp * i / users, barrier, queue))
+        for i, name in enumerate(names)
+    ]
+    for p in procs:
+        p.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    rec = Recorder()
+    for _ in procs:
+        samples, errors = queue.get()
+        rec.samples.extend(samples)
+        rec.errors.extend(errors)
+    wall_s = time.perf_counter() - t0
+    for p in procs:
+        p.join()
+
+    result = summarize(rec, wall_s, users)
+    result.update({"size": size, "iterations": iterations, "think_s": think, "db": work,
+                   "time": datetime.now().isoformat(timespec="seconds")})
+    return result
+
+def _fmt(value):
+    return f"{value:,.0f}" if value is not None else "-"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uji beban sesi bersamaan SIA MERPATI (AppTest).")
+    parser.add_argument("--users", type=int, default=30)
+    parser.add_argument("--iterations", type=int, default=20, help="langkah per pengguna setelah login")
+    parser.add_argument("--size", default="10k", help="ukuran jurnal sintetis: 10k, 100k, 1M, ...")
+    parser.add_argument("--think", type=float, default=0.0, help="rata-rata jeda antar langkah (detik)")
+    parser.add_argument("--ramp", type=float, default=0.0, help="detik sampai pengguna terakhir mulai")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="simpan hasil ke file JSON ini")
+    args = parser.parse_args(argv)
+
+    result = run(args.users, args.iterations, args.size, args.think, args.ramp, args.seed)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    print(f"{result['users']} pengguna, {result['interactions']} interaksi dalam {result['wall_s']:.1f} detik "
+          f"({result['throughput']:.1f} interaksi/detik)")
+    print(f"{'halaman':<40} {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'maks':>8}  (ms)")
+    for name, s in list(result["pages"].items()) + [("SEMUA", result["overall"])]:
+        print(f"{name:<40} {s['n']:>5} {_fmt(s['p50_ms']):>8} {_fmt(s['p95_ms']):>8} "
+              f"{_fmt(s['p99_ms']):>8} {_fmt(s['max_ms']):>8}")
+    print(f"Error 'database is locked': {result['lock_errors']}, error lain: {result['other_errors']}")
+    for message in result["error_samples"]:
+        print(f"  - {message[:200]}")
+    return 1 if result["lock_errors"] or result["other_errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+
+# Anggaran memori objek yang ditahan sesi (byte)
+SESSION_BUDGET = 200 * 1024 * 1024
+GLOBAL_BUDGET = 1024 * 1024 * 1024
+# MERPATI_TRACEMALLOC=1 menyalakan tracemalloc sejak start (mode debug)
+TRACEMALLOC_ENV = "MERPATI_TRACEMALLOC"
+
+_lock = threading.RLock()
+_sessions = weakref.WeakValueDictionary()   # session_id -> SessionCache
+_shared = {}                                # nama -> DictCache
+_accounts = {}                              # session_id -> hasil account_session()
+_stats = {"evictions": 0, "evicted_bytes": 0}
+
+if os.environ.get(TRACEMALLOC_ENV) == "1":
+    tracemalloc.start(10)
+
+def sizeof(obj, _seen=None):
+    """
+    Perkiraan ukuran objek (byte). DataFrame/Series memakai
+    memory_usage(deep=True); dict/list/tuple/set dijumlah rekursif.
+    """
+    if isinstance(obj, SessionCache):
+        return obj.nbytes
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    usage = getattr(obj, "memory_usage", None)
+    if callable(usage) and hasattr(obj, "index"):
+        size = usage(deep=True)
+        size = int(size.sum()) if hasattr(size, "sum") else int(size)
+    elif isinstance(obj, dict):
+        size = sys.getsizeof(obj) + sum(sizeof(k, _seen) + sizeof(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size = sys.getsizeof(obj) + sum(sizeof(v, _seen) for v in obj)
+    else:
+        size = sys.getsizeof(obj)
+    return size
+
+class SessionCache:
+    """
+    Cache objek besar (mis. DataFrame) milik satu sesi. Disimpan di
+    st.session_state lewat session_cache(); isinya boleh dibuang kapan saja
+    bila anggaran sesi atau global terlampaui, jadi pemakai harus siap
+    mendapat None dari get().
+    """
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self._items = {}   # key -> [value, size, last_access]
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(item[1] for item in self._items.values())
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return default
+            item[2] = time.monotonic()
+            return item[0]
+
+    def put(self, key, value):
+        size = sizeof(value)
+        with self._lock:
+            self._items[key] = [value, size, time.monotonic()]
+        self.enforce(SESSION_BUDGET, keep=key)
+        enforce_global()
+        return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._items.pop(key, None)
+        return default if item is None else item[0]
+
+    def entries(self):
+        """[(key, size)] urut dari yang terbesar."""
+        with self._lock:
+            return sorted(((k, item[1]) for k, item in self._items.items()), key=lambda e: e[1], reverse=True)
+
+    def evict(self, key):
+        with self._lock:
+            item = self._items.pop(key, None)
+        if item is not None:
+            _count_eviction(item[1])
+        return item is not None
+
+    def enforce(self, budget, keep=None):
+        """Buang entri terbesar sampai total <= budget; entri keep dibuang paling akhir."""
+        for key, size in sorted(self.entries(), key=lambda e: (e[0] == keep, -e[1])):
+            if self.nbytes <= budget:
+                break
+            if key != keep:
+                self.evict(key)
+
+class DictCache:
+    """Adaptor akuntansi/evict untuk cache dict bersama (dipakai semua sesi)."""
+
+    def __init__(self, name, mapping):
+        self.name = name
+        self.mapping = mapping
+
+    def entries(self):
+        return sorted(((k, sizeof(v)) for k, v in list(self.mapping.items())), key=lambda e: e[1], reverse=True)
+
+    @property
+    def nbytes(self):
+        return sum(size for _, size in self.entries())
+
+    def evict(self, key):
+        value = self.mapping.pop(key, None)
+        if value is not None:
+            _count_eviction(sizeof(value))
+        return value is not None
+
+def _count_eviction(size):
+    with _lock:
+        _stats["evictions"] += 1
+        _stats["evicted_bytes"] += size
+
+def session_cache(state, session_id):
+    """SessionCache milik sesi ini (dibuat sekali dan disimpan di state)."""
+    cache = state.get("_memory_cache")
+    if cache is None:
+        cache = SessionCache(session_id)
+        state["_memory_cache"] = cache
+    with _lock:
+        _sessions[session_id] = cache
+    return cache
+
+def register_cache(name, mapping):
+    """Daftarkan cache dict bersama (mis. cache laporan) ke akuntansi global."""
+    with _lock:
+        _shared[name] = DictCache(name, mapping)
+
+def enforce_global(budget=None):
+    """
+    Bila total cache semua sesi + cache bersama melebihi budget, buang
+    entri terbesar di mana pun sampai di bawah anggaran.
+
+    Returns:
+    - int: jumlah entri yang dibuang
+    """
+    budget = GLOBAL_BUDGET if budget is None else budget
+    with _lock:
+        owners = list(_sessions.values()) + list(_shared.values())
+    entries = [(size, owner, key) for owner in owners for key, size in owner.entries()]
+    total = sum(size for size, _, _ in entries)
+    removed = 0
+    for size, owner, key in sorted(entries, key=lambda e: e[0], reverse=True):
+        if total <= budget:
+            break
+        if owner.evict(key):
+            total -= size
+            removed += 1
+    return removed
+
+def account_session(session_id, state, user=""):
+    """
+    Ukur objek yang ditahan satu sesi (seluruh session_state termasuk
+    SessionCache) dan simpan hasilnya untuk panel admin.
+    """
+    keys = {}
+    for key in list(state.keys()):
+        try:
+            keys[key] = sizeof(state[key])
+        except KeyError:
+            continue
+    cache = _sessions.get(session_id)
+    account = {
+        "session_id": session_id,
+        "user": user,
+        "bytes": sum(keys.values()),
+        "cache_bytes": cache.nbytes if cache is not None else 0,
+        "top": sorted(keys.items(), key=lambda kv: kv[1], reverse=True)[:5],
+        "time": time.time(),
+    }
+    with _lock:
+        _accounts[session_id] = account
+    return account
+
+def report():
+    """
+    Ringkasan untuk panel admin.
+
+    Returns:
+    - dict: sessions (list akun sesi yang masih hidup), shared ({nama: byte}),
+      total, budget, evictions, evicted_bytes
+    """
+    with _lock:
+        live = set(_sessions.keys())
+        for sid in [sid for sid in _accounts if sid not in live]:
+            del _accounts[sid]
+        sessions = sorted(_accounts.values(), key=lambda a: a["bytes"], reverse=True)
+        shared = {name: cache.nbytes for name, cache in _shared.items()}
+        stats = dict(_stats)
+    return {
+        "sessions": sessions,
+        "shared": shared,
+        "total": sum(a["bytes"] for a in sessions) + sum(shared.values()),
+        "session_budget": SESSION_BUDGET,
+        "global_budget": GLOBAL_BUDGET,
+        **stats,
+    }
+
+def tracemalloc_top(limit=20):
+    """Alokasi terbesar per baris kode dari snapshot tracemalloc, bila aktif."""
+    if not tracemalloc.is_tracing():
+        return None
+    current, peak = tracemalloc.get_traced_memory()
+    stats = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ]).statistics("lineno")[:limit]
+    return {
+        "current": current,
+        "peak": peak,
+        "top": [(str(s.traceback[0]), s.size, s.count) for s in stats],
+    }
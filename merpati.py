@@ -2,7 +2,6 @@ import streamlit as st
 import sqlite3
 import hashlib
 from datetime import date
-import pandas as pd
 
 DB_PATH = "sia_merpati.db"
 
@@ -189,6 +188,7 @@ def delete_transaction(tx_id: int):
 # LAPORAN
 # =========================================================
 def trial_balance():
+    import pandas as pd
     conn = get_conn()
     cur = conn.cursor()
     cur.execute(
@@ -285,6 +285,7 @@ def ledger_per_account():
 
 # Helper: ubah rows transaksi jadi DataFrame rapi
 def transactions_to_df(rows):
+    import pandas as pd
     if not rows:
         return pd.DataFrame(
             columns=[
@@ -577,6 +578,7 @@ def page_login():
         st.markdown("</div>", unsafe_allow_html=True)
 
 def page_dashboard():
+    import pandas as pd
     inject_css()
     top_bar()
 
@@ -969,6 +971,7 @@ def page_jurnal():
     st.markdown("</div>", unsafe_allow_html=True)
 
 def page_buku_besar():
+    import pandas as pd
     inject_css()
     top_bar()
 
@@ -1042,6 +1045,7 @@ def page_laba_rugi():
     st.markdown("</div>", unsafe_allow_html=True)
 
 def page_akun():
+    import pandas as pd
     inject_css()
     top_bar()
 
@@ -0,0 +1,170 @@
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Endpoint Prometheus: http://127.0.0.1:<port>/metrics. MERPATI_METRICS_PORT=0 mematikannya.
+METRICS_PORT = int(os.environ.get("MERPATI_METRICS_PORT", "9464"))
+METRICS_ADDR = os.environ.get("MERPATI_METRICS_ADDR", "127.0.0.1")
+
+_metrics = {}
+_collectors = []
+_lock = threading.Lock()
+_server = None
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Nilai yang hanya bertambah, per kombinasi label."""
+
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in items]
+
+class Histogram:
+    """Sebaran nilai (mis. latensi dalam detik) dalam bucket kumulatif ala Prometheus."""
+
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            counts[0][i] += 1
+            counts[1] += value
+            counts[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(c[0]), c[1], c[2])) for key, c in self._values.items()]
+        out = []
+        for key, (buckets, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), buckets):
+                cumulative += n
+                out.append((f"{self.name}_bucket", _format_labels(self.labelnames, key, [("le", _format_value(float(bound)))]), cumulative))
+            out.append((f"{self.name}_sum", _format_labels(self.labelnames, key), total))
+            out.append((f"{self.name}_count", _format_labels(self.labelnames, key), count))
+        return out
+
+def _get(cls, name, help, labelnames=(), **kwargs):
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = cls(name, help, labelnames, **kwargs)
+        return metric
+
+def counter(name, help, labelnames=()):
+    """Ambil (atau daftarkan) counter bernama name."""
+    return _get(Counter, name, help, labelnames)
+
+def histogram(name, help, labelnames=(), buckets=None):
+    """Ambil (atau daftarkan) histogram bernama name."""
+    return _get(Histogram, name, help, labelnames, **({"buckets": buckets} if buckets else {}))
+
+def register_collector(collect):
+    """
+    Daftarkan fungsi yang dipanggil saat scrape saja (biaya nol di luar itu).
+    collect() mengembalikan list (nama, tipe, help, [(labels dict, nilai)]).
+    """
+    with _lock:
+        _collectors.append(collect)
+
+def render():
+    """Semua metrik dalam format teks Prometheus (versi 0.0.4)."""
+    with _lock:
+        metrics = list(_metrics.values())
+        collectors = list(_collectors)
+    lines = []
+    for m in sorted(metrics, key=lambda m: m.name):
+        lines.append(f"# HELP {m.name} {m.help}")
+        lines.append(f"# TYPE {m.name} {m.type}")
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in m.samples())
+    for collect in collectors:
+        for name, type_, help, samples in collect():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {type_}")
+            for labels, value in samples:
+                names = tuple(labels)
+                lines.append(f"{name}{_format_labels(names, tuple(labels.values()))} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(port=None, addr=None):
+    """
+    Jalankan endpoint /metrics di thread latar belakang, sekali per proses.
+    Aman dipanggil di setiap rerun. Metrik hanya dirender saat ada scrape.
+
+    Returns:
+    - int | None: port yang dipakai, atau None bila dimatikan/port terpakai
+    """
+    global _server
+    port = METRICS_PORT if port is None else port
+    if not port:
+        return None
+    with _lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((addr or METRICS_ADDR, port), _Handler)
+            except OSError:
+                # mis. port dipakai proses lain (server Streamlit kedua)
+                _server = False
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+        return _server.server_address[1] if _server else None
@@ -0,0 +1,38 @@
+import streamlit as st
+from libs import inject_css, top_bar, back_to_dashboard, export_download
+from models.transaction import worksheet
+from models.profiler import phase
+
+def page_neraca_lajur():
+    inject_css()
+    top_bar()
+
+    st.markdown('<div class="report-shell">', unsafe_allow_html=True)
+    st.markdown('<div class="report-header-box">Neraca Lajur</div>', unsafe_allow_html=True)
+    back_to_dashboard()
+
+    with phase("data"):
+        ws = worksheet()
+    if ws.empty:
+        st.info("Belum ada data.")
+    else:
+        num_cols = list(ws.columns[2:])
+        with phase("render"):
+            st.dataframe(
+                ws.style.format({c: "{:,.0f}" for c in num_cols}),
+                use_container_width=True,
+                hide_index=True,
+            )
+
+        totals = ws[num_cols].sum()
+        laba = totals["Laba Rugi Kredit"] - totals["Laba Rugi Debit"]
+        label = "Laba Bersih" if laba >= 0 else "Rugi Bersih"
+        st.markdown(
+            f'<div class="report-footer-box">Total NSD Debit: Rp {totals["NSD Debit"]:,.0f} | '
+            f'Total NSD Kredit: Rp {totals["NSD Kredit"]:,.0f} | {label}: Rp {abs(laba):,.0f}</div>'.replace(",", "."),
+            unsafe_allow_html=True,
+        )
+
+        export_download("Buat PDF", "worksheet_pdf", "neraca_lajur.pdf")
+
+    st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,65 @@
+import math
+import streamlit as st
+from libs import inject_css, top_bar, back_to_dashboard, export_download
+from models.costing import inventory_valuation, inventory_valuation_summary, get_costing_method
+from models.profiler import phase
+
+PAGE_SIZE = 100
+
+def page_nilai_persediaan():
+    inject_css()
+    top_bar()
+
+    st.markdown('<div class="report-shell">', unsafe_allow_html=True)
+    st.markdown('<div class="report-header-box">Laporan Nilai Persediaan</div>', unsafe_allow_html=True)
+    back_to_dashboard()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        start_date = st.date_input("Dari tanggal", value=None)
+    with col2:
+        end_date = st.date_input("Sampai tanggal", value=None)
+
+    with phase("data"):
+        total = inventory_valuation_summary(start_date, end_date)
+    if not total["barang"]:
+        st.info("Tidak ada persediaan pada rentang ini.")
+        st.markdown("</div>", unsafe_allow_html=True)
+        return
+
+    st.caption(f"Metode harga pokok: {get_costing_method().upper()}")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Nilai Awal", f"Rp {total['nilai_awal']:,.0f}".replace(",", "."))
+    with col2:
+        st.metric("Nilai Keluar (HPP)", f"Rp {total['nilai_keluar']:,.0f}".replace(",", "."))
+    with col3:
+        st.metric("Nilai Akhir", f"Rp {total['nilai_akhir']:,.0f}".replace(",", "."))
+
+    pages = max(1, math.ceil(total["barang"] / PAGE_SIZE))
+    page = st.number_input(f"Halaman (1-{pages})", min_value=1, max_value=pages, value=1, step=1)
+    start = (int(page) - 1) * PAGE_SIZE
+    with phase("data"):
+        df = inventory_valuation(start_date, end_date, limit=PAGE_SIZE, offset=start)
+    with phase("render"):
+        st.dataframe(
+            df.style.format({
+                "Nilai Awal": "Rp {:,.0f}",
+                "Nilai Masuk": "Rp {:,.0f}",
+                "Nilai Keluar": "Rp {:,.0f}",
+                "Nilai Akhir": "Rp {:,.0f}",
+            }),
+            use_container_width=True,
+            hide_index=True,
+        )
+    st.caption(f"{total['barang']} barang, menampilkan {start + 1}-{start + len(df)}")
+
+    export_download(
+        "Buat CSV",
+        "inventory_valuation_csv",
+        f"nilai_persediaan_{start_date or 'awal'}_{end_date or 'akhir'}.csv",
+        start_date=start_date,
+        end_date=end_date,
+    )
+
+    st.markdown("</div>", unsafe_allow_html=True)
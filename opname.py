@@ -0,0 +1,171 @@
+from models.database import get_conn
+from models.closing import assert_dates_open
+from models.costing import update_costs
+from models import metrics
+
+_IMPORTED_ROWS = metrics.counter("merpati_import_rows_total", "Baris impor yang diposting", ("kind",))
+
+OPNAME_COLUMNS = [
+    "kode_barang",
+    "nama_barang",
+    "satuan",
+    "qty_buku",
+    "qty_fisik",
+    "selisih_qty",
+    "harga_pokok",
+    "selisih_nilai",
+]
+
+def read_opname(file):
+    """
+    Baca hasil hitung fisik dari CSV dengan kolom kode_barang dan qty_fisik
+    (opsional harga_per_unit untuk barang yang belum pernah tercatat).
+    """
+    import pandas as pd
+    df = pd.read_csv(file, dtype={"kode_barang": str})
+    missing = {"kode_barang", "qty_fisik"} - set(df.columns)
+    if missing:
+        raise ValueError(f"Kolom wajib tidak ada: {', '.join(sorted(missing))}")
+    df["kode_barang"] = df["kode_barang"].str.strip()
+    df["qty_fisik"] = pd.to_numeric(df["qty_fisik"], errors="raise").astype(float)
+    if "harga_per_unit" in df.columns:
+        df["harga_per_unit"] = pd.to_numeric(df["harga_per_unit"], errors="coerce")
+    # hitungan ganda untuk kode yang sama dijumlahkan
+    return df.groupby("kode_barang", as_index=False).agg(
+        {c: ("sum" if c == "qty_fisik" else "last") for c in df.columns if c != "kode_barang"}
+    )
+
+def opname_variance(counts, tanggal):
+    """
+    Selisih stock opname: hitungan fisik digabung dengan saldo buku per
+    tanggal dalam satu query + satu merge pandas.
+
+    Saldo buku dan harga pokok per unit diambil dari snapshot movement_costs
+    terakhir per barang sampai tanggal opname (setelah update_costs()).
+    """
+    import pandas as pd
+    update_costs()
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT s.kode_barang, s.nama_barang, s.satuan,
+               COALESCE(b.qty_after, 0) AS qty_buku,
+               COALESCE(b.value_after, 0) AS nilai_buku
+        FROM stock_levels s
+        LEFT JOIN (
+            SELECT kode_barang, qty_after, value_after,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY kode_barang ORDER BY tanggal DESC, movement_id DESC
+                   ) AS rn
+            FROM movement_costs
+            WHERE tanggal <= ?
+        ) b ON b.kode_barang = s.kode_barang AND b.rn = 1
+        """,
+        (str(tanggal),),
+    )
+    book = pd.DataFrame(
+        [tuple(r) for r in cur.fetchall()],
+        columns=["kode_barang", "nama_barang", "satuan", "qty_buku", "nilai_buku"],
+    )
+    conn.close()
+
+    df = counts.merge(book, on="kode_barang", how="left", suffixes=("_impor", ""))
+    for col in ("nama_barang", "satuan"):
+        if f"{col}_impor" in df.columns:
+            df[col] = df[col].fillna(df[f"{col}_impor"])
+        df[col] = df[col].fillna("")
+    df["qty_buku"] = df["qty_buku"].fillna(0.0)
+    df["nilai_buku"] = df["nilai_buku"].fillna(0.0)
+
+    unit = (df["nilai_buku"] / df["qty_buku"]).where(df["qty_buku"] > 0)
+    if "harga_per_unit" in df.columns:
+        unit = unit.fillna(df["harga_per_unit"])
+    df["harga_pokok"] = unit.fillna(0.0)
+    df["selisih_qty"] = df["qty_fisik"] - df["qty_buku"]
+    df["selisih_nilai"] = df["selisih_qty"] * df["harga_pokok"]
+    return df[OPNAME_COLUMNS].sort_values("kode_barang").reset_index(drop=True)
+
+def post_opname(variance, tanggal):
+    """
+    Posting seluruh selisih opname sebagai mutasi persediaan dan jurnal
+    penyesuaian stok dalam satu transaksi database.
+
+    Kekurangan: debit akun_selisih_persediaan, kredit akun_persediaan.
+    Kelebihan: sebaliknya. Setiap mutasi ditautkan ke jurnalnya di
+    inventory_postings supaya tidak diposting ulang oleh post_cogs_journal().
+
+    Returns:
+    - int: jumlah barang yang disesuaikan
+    """
+    rows = variance[variance["selisih_qty"] != 0]
+    tanggal = str(tanggal)
+
+    conn = get_conn()
+    conn.isolation_level = None
+    cur = conn.cursor()
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        assert_dates_open(cur, tanggal)
+
+        cur.execute(
+            "SELECT key, value FROM settings WHERE key IN ('akun_selisih_persediaan', 'akun_persediaan')"
+        )
+        codes = {r["key"]: r["value"] for r in cur.fetchall()}
+        account_ids = {}
+        for key in ("akun_selisih_persediaan", "akun_persediaan"):
+            cur.execute("SELECT id FROM accounts WHERE code = ?", (codes.get(key),))
+            row = cur.fetchone()
+            if row is None:
+                raise ValueError(f"Akun {codes.get(key)} ({key}) tidak ditemukan.")
+            account_ids[key] = row["id"]
+
+        postings = []
+        for r in rows.itertuples(index=False):
+            masuk = r.selisih_qty if r.selisih_qty > 0 else 0
+            keluar = -r.selisih_qty if r.selisih_qty < 0 else 0
+            cur.execute(
+                """
+                INSERT INTO inventory(tanggal,kode_barang,nama_barang,satuan,jumlah_masuk,jumlah_keluar,harga_per_unit)
+                VALUES (?,?,?,?,?,?,?)
+                """,
+                (tanggal, r.kode_barang, r.nama_barang, r.satuan, masuk, keluar, r.harga_pokok),
+            )
+            movement_id = cur.lastrowid
+
+            amount = round(abs(r.selisih_nilai), 2)
+            if amount == 0:
+                continue
+            if keluar:
+                debit, credit = account_ids["akun_selisih_persediaan"], account_ids["akun_persediaan"]
+            else:
+                debit, credit = account_ids["akun_persediaan"], account_ids["akun_selisih_persediaan"]
+            cur.execute(
+                """
+                INSERT INTO transactions(tx_date,description,debit_account_id,credit_account_id,amount,entry_type)
+                VALUES (?,?,?,?,?,'adjusting')
+                """,
+                (
+                    tanggal,
+                    f"Penyesuaian stock opname {r.nama_barang} ({r.kode_barang}) selisih {r.selisih_qty:g} {r.satuan}",
+                    debit,
+                    credit,
+                    amount,
+                ),
+            )
+            postings.append((movement_id, cur.lastrowid, amount))
+
+        cur.executemany(
+            "INSERT INTO inventory_postings(movement_id, transaction_id, cogs) VALUES (?,?,?)",
+            postings,
+        )
+        cur.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            cur.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    _IMPORTED_ROWS.inc(len(rows), kind="opname")
+    return len(rows)
@@ -0,0 +1,52 @@
+from datetime import date
+import pandas as pd
+import streamlit as st
+from libs import inject_css, top_bar, back_to_dashboard
+from models.transaction import balance_sheet_comparative
+from models.profiler import phase
+
+PERIODE = {"Akhir Bulan": "M", "Akhir Kuartal": "Q", "Akhir Tahun": "Y"}
+
+def period_ends(start_date, end_date, freq):
+    """Tanggal akhir tiap periode dalam rentang; periode terakhir dipotong di end_date."""
+    ends = [p.end_time.date() for p in pd.period_range(start_date, end_date, freq=freq)]
+    return [min(d, end_date) for d in ends]
+
+def page_posisi_keuangan_komparatif():
+    inject_css()
+    top_bar()
+
+    st.markdown('<div class="report-shell">', unsafe_allow_html=True)
+    st.markdown('<div class="report-header-box">Posisi Keuangan Komparatif</div>', unsafe_allow_html=True)
+    back_to_dashboard()
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        start_date = st.date_input("Dari tanggal", value=date(date.today().year, 1, 1))
+    with col2:
+        end_date = st.date_input("Sampai tanggal", value=date.today())
+    with col3:
+        periode = st.selectbox("Kolom", list(PERIODE.keys()))
+
+    if start_date > end_date:
+        st.error("Tanggal awal harus sebelum tanggal akhir.")
+        st.markdown("</div>", unsafe_allow_html=True)
+        return
+
+    with phase("data"):
+        df = balance_sheet_comparative(period_ends(start_date, end_date, PERIODE[periode]))
+    num_cols = list(df.columns[3:])
+
+    def bold_totals(row):
+        style = "font-weight: bold" if not row["Kode"] else ""
+        return [style] * len(row)
+
+    with phase("render"):
+        st.dataframe(
+            df.style.apply(bold_totals, axis=1).format({c: "{:,.0f}" for c in num_cols}),
+            use_container_width=True,
+            hide_index=True,
+        )
+    st.caption("Saldo per akhir hari tiap tanggal kolom. Selisih aset dengan kewajiban + ekuitas adalah laba berjalan yang belum ditutup.")
+
+    st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,128 @@
+import collections
+import contextvars
+import cProfile
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from models import metrics, query_log
+
+# Dump cProfile (.prof, dibaca dengan pstats/snakeviz) untuk rerun yang diprofil
+PROFILE_DIR = "profil"
+# MERPATI_PROFILE=1 memprofil setiap rerun
+PROFILE_ENV = "MERPATI_PROFILE"
+# Jumlah render terakhir yang disimpan untuk ringkasan per halaman
+HISTORY = 500
+
+_current = contextvars.ContextVar("render_profile", default=None)
+_history = collections.deque(maxlen=HISTORY)
+_lock = threading.Lock()
+# cProfile hanya boleh aktif satu per proses
+_profile_lock = threading.Lock()
+
+_RENDER_SECONDS = metrics.histogram(
+    "merpati_page_render_seconds", "Waktu render halaman per menu", ("page",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+def profile_env():
+    return os.environ.get(PROFILE_ENV) == "1"
+
+@contextmanager
+def phase(name):
+    """
+    Catat waktu satu fase render (mis. "data", "transform", "render") ke
+    profil halaman yang sedang berjalan. Di luar render(), tidak mencatat apa-apa.
+    """
+    prof = _current.get()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        if prof is not None:
+            phases = prof["phases"]
+            phases[name] = phases.get(name, 0.0) + (time.perf_counter() - t0) * 1000
+
+@contextmanager
+def render(page, profile=False):
+    """
+    Ukur satu render halaman: total waktu, fase dari phase(), serta jumlah
+    dan waktu query (query_log.collect()). Sisa waktu yang tidak masuk fase
+    mana pun dicatat sebagai "lainnya". Bila profile=True, rerun ini juga
+    direkam dengan cProfile dan disimpan ke PROFILE_DIR.
+
+    Yields:
+    - dict profil: page, time, total_ms, phases, queries, query_ms, profile_path
+    """
+    prof = {
+        "page": page,
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "total_ms": 0.0,
+        "phases": {},
+        "queries": 0,
+        "query_ms": 0.0,
+        "profile_path": None,
+    }
+    token = _current.set(prof)
+    profiler = cProfile.Profile() if profile and _profile_lock.acquire(blocking=False) else None
+    t0 = time.perf_counter()
+    try:
+        with query_log.collect() as queries:
+            if profiler:
+                profiler.enable()
+            try:
+                yield prof
+            finally:
+                if profiler:
+                    profiler.disable()
+    finally:
+        prof["total_ms"] = (time.perf_counter() - t0) * 1000
+        prof["queries"], prof["query_ms"] = queries["queries"], queries["ms"]
+        prof["phases"]["lainnya"] = max(0.0, prof["total_ms"] - sum(prof["phases"].values()))
+        _current.reset(token)
+        _RENDER_SECONDS.observe(prof["total_ms"] / 1000, page=page)
+        if profiler:
+            try:
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                slug = re.sub(r"[^a-z0-9]+", "_", page.lower()).strip("_")
+                path = os.path.join(PROFILE_DIR, f"{datetime.now():%Y%m%d_%H%M%S_%f}_{slug}.prof")
+                profiler.dump_stats(path)
+                prof["profile_path"] = path
+            finally:
+                _profile_lock.release()
+        with _lock:
+            _history.append(prof)
+
+def page_summary():
+    """
+    Ringkasan render terakhir per halaman.
+
+    Returns:
+    - list[dict]: page, renders, avg_ms, max_ms, avg_query_ms, avg_queries
+    """
+    with _lock:
+        history = list(_history)
+    pages = {}
+    for prof in history:
+        pages.setdefault(prof["page"], []).append(prof)
+    summary = []
+    for page, profs in pages.items():
+        n = len(profs)
+        summary.append({
+            "page": page,
+            "renders": n,
+            "avg_ms": sum(p["total_ms"] for p in profs) / n,
+            "max_ms": max(p["total_ms"] for p in profs),
+            "avg_query_ms": sum(p["query_ms"] for p in profs) / n,
+            "avg_queries": sum(p["queries"] for p in profs) / n,
+        })
+    summary.sort(key=lambda s: s["avg_ms"], reverse=True)
+    return summary
+
+def profile_dumps():
+    """File dump cProfile di PROFILE_DIR, terbaru dulu."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    return sorted((e.path for e in os.scandir(PROFILE_DIR) if e.name.endswith(".prof")), reverse=True)
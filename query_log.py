@@ -0,0 +1,300 @@
+import contextvars
+import functools
+from contextlib import contextmanager
+import json
+import logging
+import logging.handlers
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from datetime import datetime
+from models import metrics
+
+# Instrumentasi query: dipasang lewat factory di get_conn()
+ENABLED = True
+
+# Query lebih lambat dari ini (ms) ditulis ke log rotasi
+SLOW_QUERY_MS = 200
+SLOW_LOG_PATH = os.path.join("log", "slow_query.log")
+SLOW_LOG_BYTES = 1024 * 1024
+SLOW_LOG_BACKUPS = 5
+
+_stats = {}
+_page_stats = {}
+_lock = threading.Lock()
+_page = contextvars.ContextVar("query_page", default=None)
+_collector = contextvars.ContextVar("query_collector", default=None)
+_capture = contextvars.ContextVar("query_capture", default=None)
+_slow_logger = None
+
+_QUERY_SECONDS = metrics.histogram(
+    "merpati_db_query_seconds", "Durasi query SQLite (execute + fetch)", ("page",),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+_QUERY_ROWS = metrics.counter("merpati_db_rows_total", "Baris yang diambil dari SQLite", ("page",))
+_CONNECTIONS = metrics.counter("merpati_db_connections_total", "Koneksi SQLite yang dibuka/ditutup", ("event",))
+
+def _connection_gauge():
+    opened, closed = _CONNECTIONS.value(event="opened"), _CONNECTIONS.value(event="closed")
+    return [("merpati_db_connections_open", "gauge", "Koneksi SQLite yang sedang terbuka", [({}, opened - closed)])]
+
+metrics.register_collector(_connection_gauge)
+
+def set_page(name):
+    """Tandai query berikutnya di thread/konteks ini sebagai milik halaman name."""
+    return _page.set(name)
+
+def reset_page(token):
+    _page.reset(token)
+
+@contextmanager
+def collect():
+    """Jumlah query dan total waktunya (ms) selama blok berjalan di konteks ini."""
+    totals = {"queries": 0, "ms": 0.0}
+    token = _collector.set(totals)
+    try:
+        yield totals
+    finally:
+        _collector.reset(token)
+
+@contextmanager
+def capture(callback):
+    """
+    Panggil callback(cursor, sql, params) tepat sebelum setiap statement
+    dijalankan di konteks ini, di koneksi yang sama (dipakai query_plans
+    untuk EXPLAIN QUERY PLAN, termasuk view TEMP dan arsip ter-ATTACH).
+    """
+    token = _capture.set(callback)
+    try:
+        yield
+    finally:
+        _capture.reset(token)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+_COMMENT = re.compile(r"--[^\n]*")
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(sql):
+    """SQL tanpa literal, komentar, dan spasi berlebih: query sejenis -> satu baris statistik."""
+    sql = _COMMENT.sub(" ", sql)
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+def params_shape(params, many=False):
+    """Bentuk parameter (tipe, bukan nilai) agar log tidak memuat data."""
+    if many:
+        params = list(params)
+        return f"{len(params)} x {params_shape(params[0]) if params else '()'}"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in params.items()) + "}"
+    return "(" + ", ".join(type(v).__name__ for v in params) + ")"
+
+def _slow_log():
+    global _slow_logger
+    if _slow_logger is None:
+        logger = logging.getLogger("merpati.slow_query")
+        logger.propagate = False
+        os.makedirs(os.path.dirname(SLOW_LOG_PATH) or ".", exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            SLOW_LOG_PATH, maxBytes=SLOW_LOG_BYTES, backupCount=SLOW_LOG_BACKUPS, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        _slow_logger = logger
+    return _slow_logger
+
+def _record(sql, shape, page, collector, seconds, rows):
+    ms = seconds * 1000
+    if collector is not None:
+        collector["queries"] += 1
+        collector["ms"] += ms
+    key = fingerprint(sql)
+    page = page or "-"
+    _QUERY_SECONDS.observe(seconds, page=page)
+    _QUERY_ROWS.inc(rows, page=page)
+    with _lock:
+        s = _stats.get(key)
+        if s is None:
+            s = _stats[key] = {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "pages": set(), "params": shape}
+        s["calls"] += 1
+        s["total_ms"] += ms
+        s["max_ms"] = max(s["max_ms"], ms)
+        s["rows"] += rows
+        s["pages"].add(page)
+        s["params"] = shape
+        p = _page_stats.setdefault(page, {"queries": 0, "total_ms": 0.0})
+        p["queries"] += 1
+        p["total_ms"] += ms
+    if ms >= SLOW_QUERY_MS:
+        _slow_log().info(json.dumps({
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "ms": round(ms, 1),
+            "rows": rows,
+            "page": page,
+            "params": shape,
+            "sql": key,
+        }, ensure_ascii=False))
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor yang mencatat setiap statement: waktu execute ditambah waktu
+    fetch, dan jumlah baris yang diambil. Statistik dicatat saat cursor
+    menjalankan statement berikutnya, ditutup, atau koneksinya ditutup.
+    """
+
+    _pending = None
+
+    def _begin(self, sql, shape):
+        self._finish()
+        self._pending = [sql, shape, _page.get(), _collector.get(), 0.0, 0]
+
+    def _finish(self):
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            _record(*pending)
+
+    def _timed(self, fn, *args):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            if self._pending is not None:
+                self._pending[4] += time.perf_counter() - t0
+
+    def execute(self, sql, params=()):
+        hook = _capture.get()
+        if hook is not None:
+            hook(self, sql, params)
+        self._begin(sql, params_shape(params))
+        return self._timed(super().execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        if not isinstance(seq_of_params, (list, tuple)):
+            seq_of_params = list(seq_of_params)
+        hook = _capture.get()
+        if hook is not None and seq_of_params:
+            hook(self, sql, seq_of_params[0])
+        self._begin(sql, params_shape(seq_of_params, many=True))
+        return self._timed(super().executemany, sql, seq_of_params)
+
+    def executescript(self, script):
+        self._begin(script, "script")
+        return self._timed(super().executescript, script)
+
+    def _count(self, rows):
+        if self._pending is not None:
+            self._pending[5] += rows
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        self._count(row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._count(len(rows))
+        return rows
+
+    def __next__(self):
+        # dipanggil per baris saat cursor di-iterasi: tanpa _timed agar murah
+        pending = self._pending
+        t0 = time.perf_counter()
+        row = sqlite3.Cursor.__next__(self)
+        if pending is not None:
+            pending[4] += time.perf_counter() - t0
+            pending[5] += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Koneksi yang selalu membuat InstrumentedCursor, juga untuk conn.execute()."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cursors = weakref.WeakSet()
+        self._closed = False
+        _CONNECTIONS.inc(event="opened")
+
+    def cursor(self, factory=InstrumentedCursor):
+        cur = super().cursor(factory)
+        self._cursors.add(cur)
+        return cur
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
+
+    def close(self):
+        for cur in list(self._cursors):
+            cur._finish()
+        super().close()
+        if not self._closed:
+            self._closed = True
+            _CONNECTIONS.inc(event="closed")
+
+    def __del__(self):
+        # koneksi yang tidak ditutup eksplisit tertutup saat dibuang GC
+        if not getattr(self, "_closed", True):
+            self._closed = True
+            _CONNECTIONS.inc(event="closed")
+
+def top_queries(limit=20, order_by="total_ms"):
+    """
+    Statistik query per fingerprint, urut menurun menurut order_by.
+
+    Returns:
+    - list[dict]: sql, calls, total_ms, avg_ms, max_ms, rows, pages, params
+    """
+    with _lock:
+        items = [dict(s, sql=k, pages=sorted(s["pages"])) for k, s in _stats.items()]
+    for s in items:
+        s["avg_ms"] = s["total_ms"] / s["calls"]
+    items.sort(key=lambda s: s[order_by], reverse=True)
+    return items[:limit]
+
+def page_stats():
+    """Jumlah query dan total waktunya per halaman."""
+    with _lock:
+        return {page: dict(s) for page, s in _page_stats.items()}
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
+        _page_stats.clear()
+
+def read_slow_log(limit=50):
+    """Baris terakhir log query lambat (file aktif saja), terbaru dulu."""
+    try:
+        with open(SLOW_LOG_PATH, encoding="utf-8") as f:
+            lines = f.readlines()[-limit:]
+    except FileNotFoundError:
+        return []
+    return [json.loads(line) for line in reversed(lines) if line.strip()]
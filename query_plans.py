@@ -0,0 +1,335 @@
+"""
+Pemeriksa regresi EXPLAIN QUERY PLAN untuk query lapisan model.
+
+Skenario _scenario() menjalankan init_db() dan fungsi model (akun,
+transaksi, laporan, persediaan, stock opname, pengguna, ekspor, kunci
+periode, tutup buku dan arsip) pada salinan jurnal sintetis yang sudah
+di-ANALYZE. Setiap statement ditangkap lewat query_log.capture() dan
+di-EXPLAIN di koneksi yang sama. Hasilnya dibandingkan dengan harapan di
+PLANS_PATH (per fingerprint: indeks yang dipakai, tabel yang di-scan
+penuh, dan TEMP B-TREE yang boleh muncul).
+
+Gagal bila:
+- ada query baru tanpa harapan tercatat,
+- indeks yang diharapkan tidak lagi dipakai,
+- muncul scan penuh pada tabel yang sebelumnya dicari lewat indeks,
+- muncul TEMP B-TREE (sort/distinct/group by) yang tidak diharapkan.
+
+    python query_plans.py            # periksa, keluar 1 bila ada pelanggaran
+    python query_plans.py --update   # rekam ulang harapan setelah perubahan disengaja
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import Future
+from datetime import date
+from models import benchmark, database, query_log
+
+PLANS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "query_plans.json")
+SIZE = "10k"
+
+# Statement yang tidak punya rencana query untuk diperiksa
+_SKIP = re.compile(r"^\s*(PRAGMA|BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|CREATE|DROP|ALTER|ATTACH|DETACH|ANALYZE|VACUUM)\b", re.I)
+_INDEX = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+_FULL_SCAN = re.compile(r"^SCAN ([\w.]+)$")
+
+def analyze(details):
+    """
+    Ringkas baris detail EXPLAIN QUERY PLAN.
+
+    Returns:
+    - dict: indexes (nama indeks, "<tabel>:rowid" / "<tabel>:pk" untuk
+      pencarian rowid / primary key tabel WITHOUT ROWID),
+      full_scans (tabel/alias yang dibaca penuh tanpa indeks), temp_btree
+    """
+    indexes, scans, temp = set(), set(), set()
+    for detail in details:
+        indexes.update(_INDEX.findall(detail))
+        if "USING INTEGER PRIMARY KEY" in detail:
+            indexes.add(detail.split()[1] + ":rowid")
+        elif "USING PRIMARY KEY" in detail:
+            indexes.add(detail.split()[1] + ":pk")
+        m = _FULL_SCAN.match(detail)
+        if m and m.group(1) != "CONSTANT":
+            scans.add(m.group(1))
+        if detail.startswith("USE TEMP B-TREE"):
+            temp.add(detail)
+    return {"indexes": sorted(indexes), "full_scans": sorted(scans), "temp_btree": sorted(temp)}
+
+class PlanCollector:
+    """Callback query_log.capture(): EXPLAIN setiap statement sebelum dijalankan."""
+
+    def __init__(self):
+        self.plans = {}   # fingerprint -> {"details", "callers"}
+        self.caller = "-"
+
+    def __call__(self, cursor, sql, params):
+        if _SKIP.match(sql):
+            return
+        key = query_log.fingerprint(sql)
+        entry = self.plans.get(key)
+        if entry is None:
+            try:
+                # cursor biasa (bukan InstrumentedCursor) agar EXPLAIN tidak ikut tercatat
+                rows = sqlite3.Cursor(cursor.connection).execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+                details = [row[3] for row in rows]
+            except sqlite3.Error as exc:
+                details = [f"ERROR: {exc}"]
+            entry = self.plans[key] = {"details": details, "callers": set()}
+        entry["callers"].add(self.caller)
+
+def _scenario():
+    """
+    Daftar (nama, fungsi) yang menyentuh seluruh lapisan model. Urutan
+    penting: init_db() (migrasi dan backfill) dulu, lalu transaksi baru,
+    tutup buku dan arsip tahun pertama, lalu laporan yang membaca arsip.
+    """
+    import pandas as pd
+    from models import (
+        account, archive, auth, closing, costing, export_jobs, opname, reports, stock, transaction, user,
+    )
+
+    def conn_call(fn):
+        def run(c):
+            conn = database.get_conn()
+            try:
+                return fn(conn.cursor(), c)
+            finally:
+                conn.close()
+        return run
+
+    def init_baru(c):
+        # database kosong: pembuatan skema dan data awal (admin, bagan akun)
+        path = database.DB_PATH
+        database.DB_PATH = os.path.abspath("baru.db")
+        try:
+            database.init_db()
+        finally:
+            database.DB_PATH = path
+
+    def init_backfill(c):
+        # kosongkan tabel turunan lewat koneksi biasa (tidak ikut tertangkap)
+        # supaya init_db() menjalankan query backfill-nya
+        with sqlite3.connect(database.DB_PATH) as raw:
+            raw.execute("DELETE FROM balance_daily")
+            raw.execute("DELETE FROM stock_levels")
+            raw.execute("DELETE FROM movement_costs")
+        raw.close()
+        database.init_db()
+
+    def transaksi(c):
+        accounts = {a["code"]: a["id"] for a in account.get_accounts()}
+        tx_id = transaction.create_transaction(str(c["end"]), "Uji rencana", accounts["1101"], accounts["4101"], 1000)
+        transaction.get_transaction(tx_id)
+        transaction.update_transaction(tx_id, str(c["end"]), "Uji rencana", accounts["1101"], accounts["4101"], 2000)
+        transaction.delete_transaction(tx_id)
+
+    def pengguna(c):
+        user.add_user("uji_rencana", "rahasia")
+        auth.authenticate("uji_rencana", "rahasia")
+        for u in user.get_users():
+            if u["username"] == "uji_rencana":
+                user.delete_user(u["id"])
+
+    def persediaan(c):
+        item = c["item"]
+        stock.record_movement(c["end"], item, "Barang uji", "pcs", 5, 0, 10_000)
+        stock.get_stock(item)
+        stock.rebuild_stock_levels()
+        costing.get_cost_layers(item)
+        costing.get_cost_layers()
+        costing.movement_costs(item)
+        costing.inventory_valuation(c["month_start"], c["month_end"], limit=50)
+        variance = opname.opname_variance(pd.DataFrame({"kode_barang": [item], "qty_fisik": [1.0]}), c["end"])
+        opname.post_opname(variance, c["end"])
+        costing.post_cogs_journal()
+        costing.get_costing_method()
+        costing.set_costing_method("average")
+        costing.update_costs()
+        costing.set_costing_method("fifo")
+        costing.update_costs()
+
+    def ekspor(c):
+        report, params = "inventory_valuation_csv", {"start_date": c["month_start"], "end_date": c["month_end"]}
+        export_jobs._recovered = False
+        job_id = export_jobs.submit_export(report, **params)
+        deadline = time.monotonic() + 120
+        while export_jobs.get_job(job_id)["status"] in ("queued", "running"):
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Job ekspor {job_id} tidak selesai.")
+            time.sleep(0.05)
+        export_jobs.submit_export(report, **params)      # digabung dengan job selesai
+        export_jobs.purge_exports(max_age_hours=-1)
+        export_jobs.submit_export(report, **params)      # langsung dari cache laporan
+        # worker dan done-callback berjalan di luar konteks capture(); ulangi di sini
+        params = {k: str(v) for k, v in params.items()}
+        tmp_path = os.path.join(export_jobs.EXPORT_DIR, "rencana.csv.tmp")
+        key = export_jobs.artifact_key(report, params, params["start_date"], params["end_date"])
+        export_jobs._run_job(job_id, report, params, tmp_path)
+        for _ in export_jobs._tracked(job_id, range(2), every=1):
+            pass
+        done = Future()
+        done.set_result(None)
+        export_jobs._finish_job(job_id, report, key, "csv", tmp_path, time.monotonic(), done)
+
+    def periode(c):
+        # tahun sesudah data: dikunci lalu dibuka lagi tanpa menyentuh tutup buku
+        year = c["end"].year + 1
+        closing.lock_period(year)
+        closing.unlock_period(year)
+
+    def tutup_buku(c):
+        first = c["start"].year
+        closing.get_fiscal_periods()
+        closing.close_year(first)
+        closing.closing_entries(first)
+        closing.get_opening_balances(first + 1)
+        archive.archive_year(first)
+
+    def laporan_arsip(c):
+        first = c["start"].year
+        transaction.ledger_per_account(date(first, 6, 1), date(first + 1, 1, 31))
+        transaction.get_transactions(None, date(first, 12, 1), date(first + 1, 1, 31))
+        transaction.balance_sheet(date(first, 6, 30))
+        reports.income_statement(date(first, 1, 1), date(first + 1, 12, 31))
+
+    def with_setup(setup, fn):
+        def run(c):
+            if setup:
+                setup()
+            return fn(c)
+        return run
+
+    # semua kasus benchmark (fungsi model dan jalur data halaman) lebih dulu
+    steps = [("database.init_db[baru]", init_baru), ("database.init_db[backfill]", init_backfill)]
+    steps += [(name, with_setup(setup, fn)) for name, setup, fn in benchmark._cases()]
+    steps += [
+        ("account.get_accounts", lambda c: account.get_accounts()),
+        ("transaction.get_transactions[adjusting]", lambda c: transaction.get_transactions("adjusting")),
+        ("transaction.trial_balance_before_adjustment", lambda c: transaction.trial_balance_before_adjustment()),
+        ("transaction.balance_sheet_comparative", lambda c: transaction.balance_sheet_comparative([c["year_start"], c["end"]])),
+        ("reports.comparative_income_statement[quarter]",
+         lambda c: reports.comparative_income_statement(c["start"], c["end"], "quarter")),
+        ("reports.comparative_income_statement[year]",
+         lambda c: reports.comparative_income_statement(c["start"], c["end"], "year")),
+        ("closing.is_range_locked", conn_call(lambda cur, c: closing.is_range_locked(cur, c["start"], c["end"]))),
+        ("closing.data_version", conn_call(lambda cur, c: closing.data_version(cur))),
+        ("closing.latest_opening", conn_call(lambda cur, c: closing.latest_opening(cur, c["end"]))),
+        ("transaksi", transaksi),
+        ("pengguna", pengguna),
+        ("persediaan", persediaan),
+        ("ekspor", ekspor),
+        ("periode", periode),
+        ("tutup_buku", tutup_buku),
+        ("laporan_arsip", laporan_arsip),
+    ]
+    return steps
+
+def collect(size=SIZE):
+    """
+    Jalankan skenario pada salinan sementara jurnal sintetis.
+
+    Returns:
+    - dict: fingerprint -> {details, callers, indexes, full_scans, temp_btree}
+    """
+    source = benchmark.ensure_db(size)
+    collector = PlanCollector()
+    old_path, old_cwd = database.DB_PATH, os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="query_plans_") as tmp:
+        database.DB_PATH = os.path.join(tmp, "plans.db")
+        shutil.copyfile(source, database.DB_PATH)
+        os.chdir(tmp)   # arsip dan log ditulis di direktori sementara
+        try:
+            conn = database.get_conn()
+            ctx = benchmark._ctx(conn.cursor())
+            conn.close()
+            with query_log.capture(collector):
+                for name, fn in _scenario():
+                    collector.caller = name
+                    fn(ctx)
+        finally:
+            os.chdir(old_cwd)
+            database.DB_PATH = old_path
+            benchmark._clear_report_cache()
+    plans = {}
+    for key, entry in collector.plans.items():
+        plans[key] = {"callers": sorted(entry["callers"]), "details": entry["details"], **analyze(entry["details"])}
+    return plans
+
+def check(plans, expected):
+    """
+    Bandingkan rencana sekarang dengan harapan.
+
+    Returns:
+    - list[str]: pelanggaran (kosong bila semua sesuai)
+    """
+    problems = []
+    for key, plan in sorted(plans.items()):
+        where = f"[{', '.join(plan['callers'])}] {key[:160]}"
+        if any(d.startswith("ERROR:") for d in plan["details"]):
+            problems.append(f"EXPLAIN gagal {where}: {plan['details']}")
+            continue
+        exp = expected.get(key)
+        if exp is None:
+            problems.append(f"Query baru tanpa harapan rencana {where}\n    {plan['details']}")
+            continue
+        lost = set(exp["indexes"]) - set(plan["indexes"])
+        if lost:
+            problems.append(f"Indeks tidak dipakai lagi ({', '.join(sorted(lost))}) {where}\n    {plan['details']}")
+        scans = set(plan["full_scans"]) - set(exp["full_scans"])
+        if scans:
+            problems.append(f"Scan penuh baru ({', '.join(sorted(scans))}) {where}\n    {plan['details']}")
+        temp = set(plan["temp_btree"]) - set(exp["temp_btree"])
+        if temp:
+            problems.append(f"TEMP B-TREE baru ({'; '.join(sorted(temp))}) {where}\n    {plan['details']}")
+    return problems
+
+def load_expected(path=PLANS_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["queries"]
+
+def save_expected(plans, path=PLANS_PATH):
+    data = {
+        "sqlite": sqlite3.sqlite_version,
+        "queries": {
+            key: {k: plan[k] for k in ("callers", "indexes", "full_scans", "temp_btree", "details")}
+            for key, plan in sorted(plans.items())
+        },
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Periksa regresi EXPLAIN QUERY PLAN query model.")
+    parser.add_argument("--update", action="store_true", help="rekam ulang harapan ke file rencana")
+    parser.add_argument("--plans", default=PLANS_PATH)
+    parser.add_argument("--size", default=SIZE, help="ukuran jurnal sintetis untuk statistik ANALYZE")
+    args = parser.parse_args(argv)
+
+    plans = collect(args.size)
+    if args.update:
+        save_expected(plans, args.plans)
+        print(f"{len(plans)} rencana query direkam ke {args.plans}")
+        return 0
+
+    expected = load_expected(args.plans)
+    problems = check(plans, expected)
+    unused = sorted(set(expected) - set(plans))
+    for key in unused:
+        print(f"Catatan: harapan tidak terpakai lagi (query dihapus?): {key[:160]}")
+    for problem in problems:
+        print(problem)
+    print(f"\n{len(plans)} query diperiksa, {len(problems)} pelanggaran.")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
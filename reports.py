@@ -1,9 +1,59 @@
-import pandas as pd
+import copy
 from models.database import get_conn
+from models.closing import is_range_locked, data_version, lock_generation
+from models.archive import connect_range
+from models import metrics, memory
+
+# Laporan atas periode yang seluruhnya terkunci tidak berubah selama kuncinya
+# tidak dibuka, jadi dikunci dengan lock_generation. Laporan periode terbuka
+# dikunci dengan data_version dan otomatis usang begitu ada transaksi baru.
+_report_cache = {}
+
+_CACHE_LOOKUPS = metrics.counter("merpati_report_cache_total", "Lookup cache laporan", ("result",))
+_CACHE_EVICTIONS = metrics.counter("merpati_report_cache_evictions_total", "Laporan usang yang dibuang dari cache")
+
+_MISSING = object()
+
+# ikut akuntansi memori global: entri terbesar dibuang bila anggaran terlampaui
+memory.register_cache("laporan", _report_cache)
+
+metrics.register_collector(lambda: [
+    ("merpati_report_cache_entries", "gauge", "Laporan di cache memori", [({}, len(_report_cache))]),
+])
+
+def cached_report(name, compute, start_date=None, end_date=None):
+    """
+    Serve a date-range report from cache.
+
+    Results over fully locked fiscal periods are marked ``immutable`` and
+    keyed by the lock generation, so they stay valid until any period is
+    unlocked or locked again; open-period results are keyed by the current
+    data version.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    locked = is_range_locked(cur, start_date, end_date)
+    version = ("locked", lock_generation(cur)) if locked else data_version(cur)
+    conn.close()
+
+    key = (name, start_date, end_date, version)
+    data = _report_cache.get(key, _MISSING)
+    _CACHE_LOOKUPS.inc(result="miss" if data is _MISSING else "hit")
+    if data is _MISSING:
+        # versi sejenis (data_version atau generasi kunci) yang berbeda sudah usang
+        for stale in [k for k in list(_report_cache) if type(k[3]) is type(version) and k[3] != version]:
+            if _report_cache.pop(stale, None) is not None:
+                _CACHE_EVICTIONS.inc()
+        data = compute(start_date, end_date)
+        if data is not None:
+            data["immutable"] = locked
+        _report_cache[key] = data
+    return copy.deepcopy(data)
 
 def income_statement(start_date=None, end_date=None):
     """
     Generate detailed income statement data with optional date filtering.
+    Served through cached_report(); see _income_statement() for the query.
 
     Parameters:
     - start_date (str or None): start date filter in 'YYYY-MM-DD' format
@@ -12,7 +62,10 @@ def income_statement(start_date=None, end_date=None):
     Returns:
     - dict: structured income statement data including sections and totals
     """
+    return cached_report("income_statement", _income_statement, start_date, end_date)
 
+def _income_statement(start_date=None, end_date=None):
+    import pandas as pd
     # Prepare SQL with optional date filters
     sql = """
         SELECT a.code, a.name,
@@ -20,7 +73,8 @@ def income_statement(start_date=None, end_date=None):
                SUM(CASE WHEN t.credit_account_id = a.id THEN t.amount ELSE 0 END) AS total_credit
         FROM accounts a
         LEFT JOIN transactions t
-          ON t.debit_account_id = a.id OR t.credit_account_id = a.id
+          ON (t.debit_account_id = a.id OR t.credit_account_id = a.id)
+         AND t.entry_type <> 'closing'
     """
     params = []
     if start_date and end_date:
@@ -39,7 +93,7 @@ def income_statement(start_date=None, end_date=None):
         ORDER BY a.code
     """
 
-    conn = get_conn()
+    conn = connect_range(start_date, end_date)
     cur = conn.cursor()
     cur.execute(sql, params)
     rows = cur.fetchall()
@@ -120,3 +174,105 @@ def income_statement(start_date=None, end_date=None):
     }
 
     return income_statement_data
+
+# Bagian laba rugi: (kunci, judul, prefix kode, saldo normal kredit?)
+INCOME_SECTIONS = [
+    ("pendapatan", "Pendapatan", "41", True),
+    ("hpp", "Harga Pokok Penjualan", "51", False),
+    ("beban_operasional", "Beban Operasional", "61", False),
+    ("pendapatan_lain", "Pendapatan Lain-lain", "71", True),
+    ("beban_lain", "Beban Lain-lain", "72", False),
+]
+
+# label periode di SQL, sama dengan str(pd.Period) untuk frekuensi tersebut
+_PERIOD_SQL = {
+    "month": ("substr(tx_date, 1, 7)", "M"),
+    "quarter": ("substr(tx_date, 1, 4) || 'Q' || ((CAST(substr(tx_date, 6, 2) AS INTEGER) + 2) / 3)", "Q"),
+    "year": ("substr(tx_date, 1, 4)", "Y"),
+}
+
+def comparative_income_statement(start_date, end_date, period="month"):
+    """
+    Laba rugi komparatif: satu kolom per periode (month/quarter/year).
+
+    Returns:
+    - DataFrame: kolom Bagian, Kode, Keterangan, <periode...>, Total.
+      Baris akun per bagian diikuti baris "Total <bagian>"; Laba Kotor dan
+      Laba/Rugi Bersih di akhir (Kode kosong untuk baris total).
+    """
+    if period not in _PERIOD_SQL:
+        raise ValueError(f"Periode tidak dikenal: {period}")
+    data = cached_report(
+        f"comparative_income_statement:{period}",
+        lambda s, e: {"table": _comparative_income_statement(s, e, period)},
+        str(start_date),
+        str(end_date),
+    )
+    return data["table"]
+
+def _comparative_income_statement(start_date, end_date, period):
+    import pandas as pd
+    period_expr, freq = _PERIOD_SQL[period]
+    # Satu GROUP BY (akun, periode) atas kaki debit dan kredit; tanpa join OR
+    legs = f"""
+        SELECT debit_account_id AS account_id, {period_expr} AS period, amount AS debit, 0 AS credit
+        FROM transactions
+        WHERE tx_date BETWEEN :start AND :end AND entry_type <> 'closing'
+        UNION ALL
+        SELECT credit_account_id, {period_expr}, 0, amount
+        FROM transactions
+        WHERE tx_date BETWEEN :start AND :end AND entry_type <> 'closing'
+    """
+    sql = f"""
+        SELECT a.code, a.name, l.period, SUM(l.debit) AS debit, SUM(l.credit) AS credit
+        FROM ({legs}) l
+        JOIN accounts a ON a.id = l.account_id
+        WHERE {" OR ".join(f"a.code LIKE '{s[2]}%'" for s in INCOME_SECTIONS)}
+        GROUP BY a.code, a.name, l.period
+    """
+    conn = connect_range(start_date, end_date)
+    cur = conn.cursor()
+    cur.execute(sql, {"start": start_date, "end": end_date})
+    rows = cur.fetchall()
+    conn.close()
+
+    periods = [str(p) for p in pd.period_range(start_date, end_date, freq=freq)]
+    df = pd.DataFrame([tuple(r) for r in rows], columns=["code", "name", "period", "debit", "credit"])
+    df["code"] = df["code"].astype(str)
+
+    prefix = df["code"].str[:2]
+    df["section"] = prefix.map({s[2]: s[0] for s in INCOME_SECTIONS})
+    credit_normal = prefix.map({s[2]: s[3] for s in INCOME_SECTIONS}).fillna(False).astype(bool)
+    df["amount"] = (df["credit"] - df["debit"]).where(credit_normal, df["debit"] - df["credit"])
+
+    items = df.pivot_table(
+        index=["section", "code", "name"], columns="period", values="amount", aggfunc="sum", fill_value=0.0
+    ).reindex(columns=periods, fill_value=0.0)
+    section_totals = items.groupby(level="section").sum().reindex([s[0] for s in INCOME_SECTIONS], fill_value=0.0)
+
+    laba_kotor = section_totals.loc["pendapatan"] - section_totals.loc["hpp"]
+    laba_bersih = (
+        laba_kotor
+        - section_totals.loc["beban_operasional"]
+        + section_totals.loc["pendapatan_lain"]
+        - section_totals.loc["beban_lain"]
+    )
+
+    out = []
+    for key, title, _, _ in INCOME_SECTIONS:
+        if key in items.index.get_level_values("section"):
+            block = items.loc[key].reset_index()
+            block.insert(0, "Bagian", title)
+            out.append(block.rename(columns={"code": "Kode", "name": "Keterangan"}))
+        out.append(pd.DataFrame([["", title, f"Total {title}", *section_totals.loc[key]]],
+                                columns=["Kode", "Bagian", "Keterangan", *periods]))
+        if key == "hpp":
+            out.append(pd.DataFrame([["", "", "Laba Kotor", *laba_kotor]],
+                                    columns=["Kode", "Bagian", "Keterangan", *periods]))
+    label = "Laba Bersih" if laba_bersih.sum() >= 0 else "Rugi Bersih"
+    out.append(pd.DataFrame([["", "", label, *laba_bersih]], columns=["Kode", "Bagian", "Keterangan", *periods]))
+
+    table = pd.concat(out, ignore_index=True)[["Bagian", "Kode", "Keterangan", *periods]]
+    table[periods] = table[periods].astype(float)
+    table["Total"] = table[periods].sum(axis=1)
+    return table
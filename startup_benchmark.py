@@ -0,0 +1,107 @@
+"""
+Benchmark waktu import saat start aplikasi.
+
+Setiap jalur diukur di proses Python baru dengan `-X importtime`; waktu
+kumulatif modul tingkat atas dijumlahkan dan diambil median dari beberapa
+putaran. Script keluar dengan kode 1 bila ada jalur yang melewati
+anggarannya, atau bila jalur login ikut memuat modul berat (pandas, fpdf).
+
+Jalankan dari folder aplikasi (yang berisi app.py, models/, screens/):
+
+    python startup_benchmark.py
+    python startup_benchmark.py --runs 7 --budget login=600 --top 15
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+# nama jalur -> modul yang di-import sampai halaman pertama tampil.
+# `app` sendiri ikut diukur (main() hanya jalan sebagai __main__), karena
+# import tingkat atasnya (query_log, profiler, metrics, memory, libs) dibayar
+# setiap start; screen-nya di-import lazy lewat PAGES.
+PATHS = {
+    "login": ["app", "screens.login"],
+    "dashboard": ["app", "screens.login", "screens.dashboard"],
+}
+
+# anggaran waktu import per jalur (ms)
+BUDGETS_MS = {
+    "login": 500,
+    "dashboard": 500,
+}
+
+# modul yang tidak boleh ter-import di jalur tertentu
+FORBIDDEN = {
+    "login": ("pandas", "numpy", "fpdf"),
+}
+
+def measure(modules):
+    """
+    Import modules di proses baru dengan -X importtime.
+
+    Returns:
+    - (total_us, {modul: cumulative_us}) untuk semua modul yang ter-import
+    """
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import gagal ({code}):\n{proc.stderr[-2000:]}")
+
+    total, cumulative = 0, {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cum_us, name = line[len("import time:"):].split("|")
+        cum_us = int(cum_us)
+        if not name.startswith("  "):
+            total += cum_us
+        cumulative[name.strip()] = cum_us
+    return total, cumulative
+
+def run(path, runs):
+    totals, last = [], {}
+    for _ in range(runs):
+        total, last = measure(PATHS[path])
+        totals.append(total)
+    return statistics.median(totals) / 1000, last
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="jumlah putaran per jalur (median)")
+    parser.add_argument("--top", type=int, default=10, help="tampilkan N modul paling lambat")
+    parser.add_argument("--budget", action="append", default=[], metavar="JALUR=MS",
+                        help="ganti anggaran satu jalur, mis. login=600")
+    parser.add_argument("paths", nargs="*", default=list(PATHS), help="jalur yang diukur")
+    args = parser.parse_args(argv)
+
+    budgets = dict(BUDGETS_MS)
+    for item in args.budget:
+        name, ms = item.split("=", 1)
+        budgets[name] = float(ms)
+
+    failed = False
+    for path in args.paths:
+        if path not in PATHS:
+            parser.error(f"Jalur tidak dikenal: {path}")
+        ms, modules = run(path, args.runs)
+        budget = budgets.get(path)
+        status = "OK" if budget is None or ms <= budget else "MELEBIHI ANGGARAN"
+        print(f"{path:<10} {ms:8.1f} ms  (anggaran {budget} ms)  {status}")
+        failed |= status != "OK"
+
+        loaded = [m for m in FORBIDDEN.get(path, ()) if m in modules]
+        if loaded:
+            print(f"  modul berat ter-import: {', '.join(loaded)}")
+            failed = True
+
+        slowest = sorted(modules.items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+        for name, us in slowest:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+from models.database import get_conn, rebuild_stock_levels as _rebuild_stock_levels
+from models.costing import update_costs
+
+STOCK_CARD_COLUMNS = [
+    "ID",
+    "Tanggal",
+    "Masuk",
+    "Keluar",
+    "Harga per Unit",
+    "Nilai Mutasi",
+    "Saldo Qty",
+    "Saldo Nilai",
+]
+
+def record_movement(tanggal, kode_barang, nama_barang, satuan, jumlah_masuk, jumlah_keluar, harga_per_unit):
+    """Catat satu mutasi persediaan; stock_levels ikut diperbarui oleh trigger."""
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        INSERT INTO inventory(tanggal,kode_barang,nama_barang,satuan,jumlah_masuk,jumlah_keluar,harga_per_unit)
+        VALUES (?,?,?,?,?,?,?)
+        """,
+        (str(tanggal), kode_barang, nama_barang, satuan, jumlah_masuk, jumlah_keluar, harga_per_unit),
+    )
+    movement_id = cur.lastrowid
+    conn.commit()
+    conn.close()
+    return movement_id
+
+def get_stock_levels():
+    """Saldo semua barang; value_on_hand per harga pokok setelah update_costs()."""
+    update_costs()
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT * FROM stock_levels ORDER BY kode_barang")
+    rows = cur.fetchall()
+    conn.close()
+    return rows
+
+def get_stock(kode_barang):
+    """
+    Saldo stok satu barang (lookup primary key, tanpa menjumlah mutasi).
+    value_on_hand sesuai update_costs() terakhir.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT * FROM stock_levels WHERE kode_barang=?", (kode_barang,))
+    row = cur.fetchone()
+    conn.close()
+    return row
+
+def rebuild_stock_levels():
+    conn = get_conn()
+    cur = conn.cursor()
+    _rebuild_stock_levels(cur)
+    conn.commit()
+    conn.close()
+
+def stock_card(kode_barang, start_date=None, end_date=None):
+    """
+    Kartu persediaan satu barang: setiap mutasi dengan saldo qty berjalan
+    (window function di atas indeks kode_barang, tanggal, id). Nilai mutasi
+    dan saldo nilai per harga pokok diambil dari movement_costs (nilai
+    masuk - HPP, value_after) setelah update_costs(), bukan dari
+    harga_per_unit yang untuk mutasi keluar berisi harga jual.
+    Saldo berjalan selalu dihitung dari mutasi pertama, baru kemudian
+    difilter ke start_date.
+    """
+    import pandas as pd
+    update_costs()
+    params = [kode_barang]
+    end_filter = ""
+    if end_date:
+        end_filter = " AND i.tanggal <= ?"
+        params.append(str(end_date))
+    sql = f"""
+        SELECT * FROM (
+            SELECT i.id, i.tanggal, i.jumlah_masuk, i.jumlah_keluar, i.harga_per_unit,
+                   m.value_in - m.cogs AS nilai,
+                   SUM(i.jumlah_masuk - i.jumlah_keluar) OVER w AS saldo_qty,
+                   m.value_after AS saldo_nilai
+            FROM inventory i
+            LEFT JOIN movement_costs m ON m.movement_id = i.id
+            WHERE i.kode_barang = ?{end_filter}
+            WINDOW w AS (ORDER BY i.tanggal, i.id ROWS UNBOUNDED PRECEDING)
+        )
+    """
+    if start_date:
+        sql += " WHERE tanggal >= ?"
+        params.append(str(start_date))
+    sql += " ORDER BY tanggal, id"
+
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    rows = cur.fetchall()
+    conn.close()
+    if not rows:
+        return pd.DataFrame(columns=STOCK_CARD_COLUMNS)
+    df = pd.DataFrame([tuple(r) for r in rows], columns=STOCK_CARD_COLUMNS)
+    return df.astype({
+        "Masuk": float,
+        "Keluar": float,
+        "Harga per Unit": float,
+        "Nilai Mutasi": float,
+        "Saldo Qty": float,
+        "Saldo Nilai": float,
+    })
@@ -0,0 +1,60 @@
+from datetime import date
+import streamlit as st
+from libs import inject_css, top_bar, back_to_dashboard, page_cache
+from models.opname import read_opname, opname_variance, post_opname
+
+def page_stock_opname():
+    inject_css()
+    top_bar()
+
+    st.markdown('<div class="report-shell">', unsafe_allow_html=True)
+    st.markdown('<div class="report-header-box">Stock Opname</div>', unsafe_allow_html=True)
+    back_to_dashboard()
+
+    st.caption("Unggah CSV hasil hitung fisik dengan kolom kode_barang, qty_fisik (opsional harga_per_unit).")
+    tanggal = st.date_input("Tanggal opname", value=date.today())
+    file = st.file_uploader("File hasil hitung fisik", type=["csv"])
+
+    # hasil hitung selisih bisa besar: disimpan di cache sesi yang ikut anggaran memori
+    cache = page_cache()
+    if file is not None and st.button("Hitung Selisih"):
+        try:
+            cache.put("opname_variance", opname_variance(read_opname(file), tanggal))
+            st.session_state["opname_tanggal"] = tanggal
+        except ValueError as e:
+            st.error(str(e))
+
+    df = cache.get("opname_variance")
+    if df is None or st.session_state.get("opname_tanggal") != tanggal:
+        st.markdown("</div>", unsafe_allow_html=True)
+        return
+
+    selisih = df[df["selisih_qty"] != 0]
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Barang dihitung", f"{len(df):,}".replace(",", "."))
+    with col2:
+        st.metric("Barang selisih", f"{len(selisih):,}".replace(",", "."))
+    with col3:
+        st.metric("Total selisih nilai", f"Rp {df['selisih_nilai'].sum():,.0f}".replace(",", "."))
+
+    hanya_selisih = st.checkbox("Tampilkan hanya barang yang selisih", value=True)
+    st.dataframe(
+        (selisih if hanya_selisih else df).style.format({
+            "harga_pokok": "Rp {:,.0f}",
+            "selisih_nilai": "Rp {:,.0f}",
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    if not selisih.empty and st.button("Posting Penyesuaian"):
+        try:
+            n = post_opname(df, tanggal)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            cache.pop("opname_variance")
+            st.success(f"{n} penyesuaian stok dan jurnalnya berhasil diposting.")
+
+    st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,171 @@
+"""
+Generator jurnal sintetis yang deterministik untuk benchmark.
+
+Membuat database SIA MERPATI baru (lewat init_db(), jadi skema, trigger,
+dan bagan akun awal sama dengan aplikasi) lalu mengisi transaksi dengan
+pola usaha dagang: penjualan tunai/kredit, pelunasan piutang, pembelian,
+pembayaran utang, HPP, dan beban, plus mutasi persediaan yang stoknya
+tidak pernah negatif. Seed yang sama selalu menghasilkan data yang sama.
+
+    python synthetic_ledger.py 100k bench_data/ledger_100k.db
+    python synthetic_ledger.py 1M bench_data/ledger_1m.db --seed 7 --years 3
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from models import database
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+
+BATCH = 50_000
+
+# (bobot, keterangan, kode debit, kode kredit, median nominal)
+TEMPLATES = [
+    (30, "Penjualan tunai", "1101", "4101", 450_000),
+    (15, "Penjualan kredit", "1102", "4101", 1_200_000),
+    (12, "Pelunasan piutang", "1101", "1102", 1_000_000),
+    (12, "Pembelian kredit", "1103", "2101", 1_500_000),
+    (8, "Pembelian tunai", "1103", "1101", 600_000),
+    (10, "Pembayaran utang", "2101", "1101", 1_300_000),
+    (8, "Harga pokok penjualan", "5101", "1103", 350_000),
+    (3, "Beban gaji", "6101", "1101", 2_500_000),
+    (2, "Beban listrik dan air", "6102", "1101", 400_000),
+]
+
+# Perkiraan jumlah mutasi persediaan per transaksi jurnal
+INVENTORY_RATIO = 0.2
+ITEMS = 200
+
+def parse_size(text):
+    """'10k', '1M', atau angka biasa -> jumlah transaksi."""
+    if text in SIZES:
+        return SIZES[text]
+    text = text.lower().replace("_", "")
+    factor = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * factor)
+
+def _account_ids(cur):
+    cur.execute("SELECT id, code FROM accounts")
+    ids = {str(r["code"]): r["id"] for r in cur.fetchall()}
+    missing = {code for t in TEMPLATES for code in t[2:4]} - set(ids) - {"3101"}
+    if missing:
+        raise ValueError(f"Akun {', '.join(sorted(missing))} tidak ada di bagan akun.")
+    return ids
+
+def _amount(rng, median):
+    # lognormal dibulatkan ke ribuan rupiah
+    return max(1000.0, round(median * math.exp(rng.gauss(0, 0.8)), -3))
+
+def _transactions(rng, n, start, days, ids):
+    weights = [t[0] for t in TEMPLATES]
+    modal = 50_000 * n
+    yield (start.isoformat(), "Setoran modal awal", ids["1101"], ids["3101"], float(modal), "regular")
+    for i in range(1, n):
+        tx_date = (start + timedelta(days=i * days // n)).isoformat()
+        _, desc, debit, credit, median = rng.choices(TEMPLATES, weights)[0]
+        entry_type = "adjusting" if rng.random() < 0.01 else "regular"
+        yield (tx_date, f"{desc} #{i}", ids[debit], ids[credit], _amount(rng, median), entry_type)
+
+def _movements(rng, n, start, days):
+    items = [(f"BRG{k:04d}", f"Barang {k}", rng.choice(["pcs", "kg", "sak", "botol"]), rng.uniform(5_000, 250_000))
+             for k in range(1, ITEMS + 1)]
+    on_hand = [0] * ITEMS
+    for i in range(n):
+        tanggal = (start + timedelta(days=i * days // max(n, 1))).isoformat()
+        k = rng.randrange(ITEMS)
+        kode, nama, satuan, price = items[k]
+        if on_hand[k] < 5 or rng.random() < 0.45:
+            qty = rng.randint(10, 200)
+            on_hand[k] += qty
+            yield (tanggal, kode, nama, satuan, qty, 0, round(price * rng.uniform(0.9, 1.1), -2))
+        else:
+            qty = rng.randint(1, on_hand[k])
+            on_hand[k] -= qty
+            yield (tanggal, kode, nama, satuan, 0, qty, round(price * 1.3, -2))
+
+def _insert(cur, sql, rows, progress=None):
+    batch, total = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH:
+            cur.executemany(sql, batch)
+            total += len(batch)
+            batch = []
+            if progress:
+                progress(total)
+    if batch:
+        cur.executemany(sql, batch)
+        total += len(batch)
+    return total
+
+def generate(db_path, n_transactions, seed=42, start=date(2023, 1, 1), years=2, progress=None):
+    """
+    Buat database baru di db_path berisi n_transactions transaksi jurnal
+    dan sekitar INVENTORY_RATIO * n_transactions mutasi persediaan.
+
+    Returns:
+    - dict: transactions, movements, seconds
+    """
+    if os.path.exists(db_path):
+        raise ValueError(f"{db_path} sudah ada; generator hanya mengisi database baru.")
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+
+    t0 = time.perf_counter()
+    old_path = database.DB_PATH
+    database.DB_PATH = db_path
+    try:
+        database.init_db()
+        conn = database.get_conn()
+    finally:
+        database.DB_PATH = old_path
+
+    rng = random.Random(seed)
+    days = 365 * years
+    cur = conn.cursor()
+    ids = _account_ids(cur)
+    if "3101" not in ids:
+        cur.execute("INSERT INTO accounts(code, name) VALUES ('3101', 'Modal Pemilik')")
+        ids["3101"] = cur.lastrowid
+
+    cur.execute("PRAGMA synchronous = OFF")
+    cur.execute("PRAGMA journal_mode = MEMORY")
+    conn.commit()
+    n_tx = _insert(
+        cur,
+        "INSERT INTO transactions(tx_date, description, debit_account_id, credit_account_id, amount, entry_type) "
+        "VALUES (?,?,?,?,?,?)",
+        _transactions(rng, n_transactions, start, days, ids),
+        progress,
+    )
+    n_mv = _insert(
+        cur,
+        "INSERT INTO inventory(tanggal, kode_barang, nama_barang, satuan, jumlah_masuk, jumlah_keluar, harga_per_unit) "
+        "VALUES (?,?,?,?,?,?,?)",
+        _movements(rng, int(n_transactions * INVENTORY_RATIO), start, days),
+    )
+    conn.commit()
+    cur.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    return {"transactions": n_tx, "movements": n_mv, "seconds": time.perf_counter() - t0}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Buat database jurnal sintetis untuk benchmark.")
+    parser.add_argument("size", help="jumlah transaksi: 10k, 100k, 1M, 10M, atau angka")
+    parser.add_argument("db_path", help="path database baru")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--years", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    n = parse_size(args.size)
+    result = generate(args.db_path, n, seed=args.seed, years=args.years,
+                      progress=lambda k: print(f"  {k:,} transaksi", file=sys.stderr))
+    print(f"{result['transactions']:,} transaksi, {result['movements']:,} mutasi persediaan "
+          f"dalam {result['seconds']:.1f} detik -> {args.db_path}")
+
+if __name__ == "__main__":
+    main()
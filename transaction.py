@@ -1,33 +1,119 @@
-import pandas as pd
 from models.database import get_conn
+from models.closing import latest_opening, assert_dates_open
+from models.archive import connect_range
 
-def create_transaction(tx_date, description, debit_id, credit_id, amount):
+def create_transaction(tx_date, description, debit_id, credit_id, amount, entry_type="regular"):
     conn = get_conn()
     cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO transactions(tx_date,description,debit_account_id,credit_account_id,amount)
-        VALUES (?,?,?,?,?)
-    """, (tx_date, description, debit_id, credit_id, amount))
-    conn.commit()
-    conn.close()
+    try:
+        assert_dates_open(cur, tx_date)
+        cur.execute("""
+            INSERT INTO transactions(tx_date,description,debit_account_id,credit_account_id,amount,entry_type)
+            VALUES (?,?,?,?,?,?)
+        """, (tx_date, description, debit_id, credit_id, amount, entry_type))
+        conn.commit()
+        return cur.lastrowid
+    finally:
+        conn.close()
 
-def get_transactions():
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("""
+def _transactions_sql(entry_type=None, start_date=None, end_date=None):
+    sql = """
         SELECT t.id, t.tx_date, t.description,
                da.code AS debit_code, da.name AS debit_name,
                ca.code AS credit_code, ca.name AS credit_name,
-               t.amount
+               t.amount, t.entry_type
         FROM transactions t
         JOIN accounts da ON da.id = t.debit_account_id
         JOIN accounts ca ON ca.id = t.credit_account_id
-        ORDER BY t.tx_date, t.id
-    """)
+    """
+    where, params = [], []
+    if entry_type:
+        where.append("t.entry_type = ?")
+        params.append(entry_type)
+    if start_date:
+        where.append("t.tx_date >= ?")
+        params.append(str(start_date))
+    if end_date:
+        where.append("t.tx_date <= ?")
+        params.append(str(end_date))
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY t.tx_date, t.id"
+    return sql, params
+
+def get_transactions(entry_type=None, start_date=None, end_date=None):
+    """
+    Ambil transaksi (JOIN akun), opsional satu jenis entry_type dan/atau
+    rentang tanggal. Rentang yang menyentuh tahun terarsip ikut membaca arsip.
+    """
+    sql, params = _transactions_sql(entry_type, start_date, end_date)
+    conn = connect_range(start_date, end_date)
+    cur = conn.cursor()
+    cur.execute(sql, params)
     rows = cur.fetchall()
     conn.close()
     return rows
 
+def _iter_cursor(conn, sql, params, batch_size):
+    try:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
+def iter_transactions(entry_type=None, start_date=None, end_date=None, batch_size=500):
+    """Seperti get_transactions(), tetapi dibaca bertahap (fetchmany) untuk ekspor besar."""
+    sql, params = _transactions_sql(entry_type, start_date, end_date)
+    return _iter_cursor(connect_range(start_date, end_date), sql, params, batch_size)
+
+def iter_ledger(start_date=None, end_date=None, batch_size=500):
+    """
+    Baris buku besar berurutan per akun (code, name, tx_date, id, description,
+    debit, credit), dibaca bertahap. Baris pertama tiap akun dengan id NULL
+    adalah Saldo Awal, dihitung seperti ledger_per_account().
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    year, opening_start = latest_opening(cur, as_of=start_date)
+    conn.close()
+    start = str(start_date) if start_date else (opening_start or "")
+    end = str(end_date) if end_date else "9999-12-31"
+
+    sql = """
+        SELECT a.code, a.name, l.tx_date, l.id, l.description, l.debit, l.credit
+        FROM (
+            SELECT account_id, :start AS tx_date, NULL AS id, 'Saldo Awal' AS description,
+                   MAX(SUM(amount), 0) AS debit, MAX(-SUM(amount), 0) AS credit
+            FROM (
+                SELECT account_id, balance AS amount
+                FROM opening_balances WHERE fiscal_year = :year
+                UNION ALL
+                SELECT debit_account_id, amount
+                FROM transactions WHERE tx_date >= :opening AND tx_date < :start
+                UNION ALL
+                SELECT credit_account_id, -amount
+                FROM transactions WHERE tx_date >= :opening AND tx_date < :start
+            )
+            GROUP BY account_id
+            HAVING ROUND(SUM(amount), 2) <> 0
+            UNION ALL
+            SELECT debit_account_id, tx_date, id, description, amount, 0
+            FROM transactions WHERE tx_date >= :start AND tx_date <= :end
+            UNION ALL
+            SELECT credit_account_id, tx_date, id, description, 0, amount
+            FROM transactions WHERE tx_date >= :start AND tx_date <= :end
+        ) l
+        JOIN accounts a ON a.id = l.account_id
+        ORDER BY a.code, l.id IS NOT NULL, l.tx_date, l.id
+    """
+    params = {"year": year, "opening": opening_start or "", "start": start, "end": end}
+    return _iter_cursor(connect_range(opening_start, end_date), sql, params, batch_size)
+
 def get_transaction(tx_id):
     conn = get_conn()
     cur = conn.cursor()
@@ -36,39 +122,68 @@ def get_transaction(tx_id):
     conn.close()
     return row
 
-def update_transaction(tx_id, tx_date, description, debit_id, credit_id, amount):
+def update_transaction(tx_id, tx_date, description, debit_id, credit_id, amount, entry_type=None):
     conn = get_conn()
     cur = conn.cursor()
-    cur.execute("""
-        UPDATE transactions
-        SET tx_date=?, description=?, debit_account_id=?, credit_account_id=?, amount=?
-        WHERE id=?
-    """, (tx_date, description, debit_id, credit_id, amount, tx_id))
-    conn.commit()
-    conn.close()
+    try:
+        cur.execute("SELECT tx_date FROM transactions WHERE id=?", (tx_id,))
+        old = cur.fetchone()
+        assert_dates_open(cur, old["tx_date"] if old else None, tx_date)
+        cur.execute("""
+            UPDATE transactions
+            SET tx_date=?, description=?, debit_account_id=?, credit_account_id=?, amount=?,
+                entry_type=COALESCE(?, entry_type)
+            WHERE id=?
+        """, (tx_date, description, debit_id, credit_id, amount, entry_type, tx_id))
+        conn.commit()
+    finally:
+        conn.close()
 
 def delete_transaction(tx_id):
     conn = get_conn()
     cur = conn.cursor()
-    cur.execute("DELETE FROM transactions WHERE id=?", (tx_id,))
-    conn.commit()
-    conn.close()
+    try:
+        cur.execute("SELECT tx_date FROM transactions WHERE id=?", (tx_id,))
+        old = cur.fetchone()
+        assert_dates_open(cur, old["tx_date"] if old else None)
+        cur.execute("DELETE FROM transactions WHERE id=?", (tx_id,))
+        conn.commit()
+    finally:
+        conn.close()
 
-def trial_balance():
+def _trial_balance(exclude_types=()):
+    """
+    Neraca saldo periode berjalan: saldo awal tahun terakhir yang ditutup
+    ditambah transaksi sejak tanggal tersebut, tanpa entry_type tertentu.
+    """
+    import pandas as pd
     conn = get_conn()
     cur = conn.cursor()
+    year, start = latest_opening(cur)
+    type_filter = ""
+    if exclude_types:
+        type_filter = " AND entry_type NOT IN (%s)" % ",".join("?" * len(exclude_types))
     cur.execute(
-        """
+        f"""
         SELECT a.id, a.code, a.name,
-               SUM(CASE WHEN t.debit_account_id = a.id THEN t.amount ELSE 0 END) AS total_debit,
-               SUM(CASE WHEN t.credit_account_id = a.id THEN t.amount ELSE 0 END) AS total_credit
-        FROM accounts a
-        LEFT JOIN transactions t
-          ON t.debit_account_id = a.id OR t.credit_account_id = a.id
+               SUM(l.debit) AS total_debit,
+               SUM(l.credit) AS total_credit
+        FROM (
+            SELECT account_id, MAX(balance, 0) AS debit, MAX(-balance, 0) AS credit
+            FROM opening_balances WHERE fiscal_year = ?
+            UNION ALL
+            SELECT debit_account_id, amount, 0
+            FROM transactions WHERE tx_date >= ?{type_filter}
+            UNION ALL
+            SELECT credit_account_id, 0, amount
+            FROM transactions WHERE tx_date >= ?{type_filter}
+        ) l
+        JOIN accounts a ON a.id = l.account_id
         GROUP BY a.id, a.code, a.name
         HAVING total_debit > 0 OR total_credit > 0
         ORDER BY a.code
-        """
+        """,
+        [year, start or "", *exclude_types, start or "", *exclude_types],
     )
     rows = cur.fetchall()
     conn.close()
@@ -78,39 +193,101 @@ def trial_balance():
     df.columns = ["id", "Kode", "Nama Akun", "Debit", "Kredit"]
     return df[["Kode", "Nama Akun", "Debit", "Kredit"]]
 
+def trial_balance():
+    return _trial_balance()
+
 def trial_balance_before_adjustment():
     """
-    Return trial balance excluding transactions with 'penyesuaian' in description.
+    Return trial balance excluding adjusting and closing entries.
+    """
+    return _trial_balance(("adjusting", "closing"))
+
+def trial_balance_after_adjustment():
+    """
+    Return trial balance including adjusting entries but excluding closing entries.
     """
+    return _trial_balance(("closing",))
+
+WORKSHEET_COLUMNS = [
+    "Kode",
+    "Nama Akun",
+    "NS Debit",
+    "NS Kredit",
+    "Penyesuaian Debit",
+    "Penyesuaian Kredit",
+    "NSD Debit",
+    "NSD Kredit",
+    "Laba Rugi Debit",
+    "Laba Rugi Kredit",
+    "Neraca Debit",
+    "Neraca Kredit",
+]
+
+def worksheet():
+    """
+    Neraca lajur (worksheet) 10 kolom dalam satu kali agregasi.
+
+    Setiap transaksi dipecah menjadi dua baris (sisi debit dan sisi kredit),
+    lalu dijumlahkan per akun dengan agregasi bersyarat untuk transaksi biasa
+    dan transaksi penyesuaian (entry_type 'adjusting'); jurnal penutup tidak
+    ikut dihitung. Saldo awal tahun berjalan masuk ke kolom neraca saldo.
+    Saldo disesuaikan masuk ke kolom Laba Rugi untuk akun berkode 4-7 dan ke
+    kolom Neraca untuk akun berkode 1-3.
+    """
+    import pandas as pd
     conn = get_conn()
     cur = conn.cursor()
+    year, start = latest_opening(cur)
     cur.execute(
         """
-        SELECT a.id, a.code, a.name,
-               SUM(CASE WHEN t.debit_account_id = a.id THEN t.amount ELSE 0 END) AS total_debit,
-               SUM(CASE WHEN t.credit_account_id = a.id THEN t.amount ELSE 0 END) AS total_credit
-        FROM accounts a
-        LEFT JOIN transactions t
-          ON t.debit_account_id = a.id OR t.credit_account_id = a.id
-        WHERE t.description IS NULL OR LOWER(t.description) NOT LIKE '%penyesuaian%'
+        SELECT a.code, a.name,
+               SUM(CASE WHEN l.is_adj = 0 THEN l.debit ELSE 0 END) AS ns_debit,
+               SUM(CASE WHEN l.is_adj = 0 THEN l.credit ELSE 0 END) AS ns_credit,
+               SUM(CASE WHEN l.is_adj = 1 THEN l.debit ELSE 0 END) AS adj_debit,
+               SUM(CASE WHEN l.is_adj = 1 THEN l.credit ELSE 0 END) AS adj_credit
+        FROM (
+            SELECT account_id, MAX(balance, 0) AS debit, MAX(-balance, 0) AS credit, 0 AS is_adj
+            FROM opening_balances WHERE fiscal_year = ?
+            UNION ALL
+            SELECT debit_account_id, amount, 0, entry_type = 'adjusting'
+            FROM transactions
+            WHERE tx_date >= ? AND entry_type <> 'closing'
+            UNION ALL
+            SELECT credit_account_id, 0, amount, entry_type = 'adjusting'
+            FROM transactions
+            WHERE tx_date >= ? AND entry_type <> 'closing'
+        ) l
+        JOIN accounts a ON a.id = l.account_id
         GROUP BY a.id, a.code, a.name
-        HAVING total_debit > 0 OR total_credit > 0
         ORDER BY a.code
-        """
+        """,
+        (year, start or "", start or ""),
     )
     rows = cur.fetchall()
     conn.close()
     if not rows:
-        return pd.DataFrame(columns=["Kode", "Nama Akun", "Debit", "Kredit"])
-    df = pd.DataFrame(rows)
-    df.columns = ["id", "Kode", "Nama Akun", "Debit", "Kredit"]
-    return df[["Kode", "Nama Akun", "Debit", "Kredit"]]
+        return pd.DataFrame(
+            {c: pd.Series(dtype=str if c in ("Kode", "Nama Akun") else float) for c in WORKSHEET_COLUMNS}
+        )
 
-def trial_balance_after_adjustment():
-    """
-    Return trial balance including all transactions, same as existing trial_balance for clarity.
-    """
-    return trial_balance()
+    df = pd.DataFrame(rows, columns=["Kode", "Nama Akun", "ns_d", "ns_k", "adj_d", "adj_k"])
+    df = df.astype({"Kode": str, "Nama Akun": str, "ns_d": float, "ns_k": float, "adj_d": float, "adj_k": float})
+
+    ns = df["ns_d"] - df["ns_k"]
+    nsd = ns + df["adj_d"] - df["adj_k"]
+    is_lr = df["Kode"].str[:1].isin(["4", "5", "6", "7"])
+
+    df["NS Debit"] = ns.clip(lower=0)
+    df["NS Kredit"] = (-ns).clip(lower=0)
+    df["Penyesuaian Debit"] = df["adj_d"]
+    df["Penyesuaian Kredit"] = df["adj_k"]
+    df["NSD Debit"] = nsd.clip(lower=0)
+    df["NSD Kredit"] = (-nsd).clip(lower=0)
+    df["Laba Rugi Debit"] = df["NSD Debit"].where(is_lr, 0.0)
+    df["Laba Rugi Kredit"] = df["NSD Kredit"].where(is_lr, 0.0)
+    df["Neraca Debit"] = df["NSD Debit"].where(~is_lr, 0.0)
+    df["Neraca Kredit"] = df["NSD Kredit"].where(~is_lr, 0.0)
+    return df[WORKSHEET_COLUMNS].reset_index(drop=True)
 
 def income_statement():
     tb = trial_balance()
@@ -133,12 +310,61 @@ def income_statement():
         "laba_bersih": laba_bersih,
     }
 
-def ledger_per_account():
-    rows = get_transactions()
-    if not rows:
+def ledger_per_account(start_date=None, end_date=None):
+    """
+    Buku besar per akun. Tanpa start_date dimulai dari saldo awal tutup buku
+    terakhir. Dengan start_date, baris "Saldo Awal" adalah saldo awal tutup
+    buku terakhir sebelum tanggal itu ditambah mutasi sampai sehari
+    sebelumnya; arsip tahun lama ikut dibaca bila rentangnya menyentuhnya.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    year, opening_start = latest_opening(cur, as_of=start_date)
+    conn.close()
+    start = str(start_date) if start_date else opening_start
+
+    conn = connect_range(opening_start, start)
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT a.code, a.name, SUM(l.amount) AS balance
+        FROM (
+            SELECT account_id, balance AS amount
+            FROM opening_balances WHERE fiscal_year = ?
+            UNION ALL
+            SELECT debit_account_id, amount
+            FROM transactions WHERE tx_date >= ? AND tx_date < ?
+            UNION ALL
+            SELECT credit_account_id, -amount
+            FROM transactions WHERE tx_date >= ? AND tx_date < ?
+        ) l
+        JOIN accounts a ON a.id = l.account_id
+        GROUP BY a.id, a.code, a.name
+        HAVING ROUND(SUM(l.amount), 2) <> 0
+        ORDER BY a.code
+        """,
+        (year, opening_start or "", start or "", opening_start or "", start or ""),
+    )
+    opening = cur.fetchall()
+    conn.close()
+
+    rows = get_transactions(start_date=start, end_date=end_date)
+    if not rows and not opening:
         return {}
 
     ledger = {}
+    for r in opening:
+        bal = r["balance"]
+        ledger[(r["code"], r["name"])] = [
+            {
+                "Tanggal": start,
+                "ID": None,
+                "Keterangan": "Saldo Awal",
+                "Debit": max(bal, 0.0),
+                "Kredit": max(-bal, 0.0),
+            }
+        ]
+
     for r in rows:
         amt = r["amount"]
 
@@ -170,6 +396,7 @@ def ledger_per_account():
 
 def transactions_to_df(rows):
     """Ubah rows transaksi (JOIN) ke DataFrame rapi."""
+    import pandas as pd
     if not rows:
         return pd.DataFrame(
             columns=[
@@ -199,49 +426,129 @@ def transactions_to_df(rows):
         )
     return pd.DataFrame(data)
 
-def balance_sheet():
+def refresh_balance_daily(cur):
+    """
+    Hitung ulang prefix sum (kolom cum) balance_daily untuk akun yang
+    ditandai balance_dirty, hanya mulai tanggal perubahan paling awal.
+    """
+    cur.execute("SELECT account_id, from_date FROM balance_dirty")
+    for d in cur.fetchall():
+        cur.execute(
+            "SELECT cum FROM balance_daily WHERE account_id = ? AND tx_date < ? ORDER BY tx_date DESC LIMIT 1",
+            (d["account_id"], d["from_date"]),
+        )
+        row = cur.fetchone()
+        cur.execute(
+            """
+            UPDATE balance_daily SET cum = :prev + r.run
+            FROM (
+                SELECT tx_date, SUM(net) OVER (ORDER BY tx_date) AS run
+                FROM balance_daily WHERE account_id = :account AND tx_date >= :from_date
+            ) r
+            WHERE balance_daily.account_id = :account AND balance_daily.tx_date = r.tx_date
+            """,
+            {"prev": row["cum"] if row else 0.0, "account": d["account_id"], "from_date": d["from_date"]},
+        )
+        cur.execute(
+            "DELETE FROM balance_dirty WHERE account_id = ? AND from_date >= ?",
+            (d["account_id"], d["from_date"]),
+        )
+
+def balances_as_of(cur, as_of):
+    """
+    Saldo semua akun (debit positif) per akhir tanggal as_of: saldo awal tutup
+    buku terakhir ditambah selisih prefix sum balance_daily sejak awal tahun
+    itu. Dua lookup indeks per akun, tanpa menjumlah transaksi.
+    """
+    year, start = latest_opening(cur, as_of=as_of)
+    cur.execute(
+        """
+        SELECT a.id, a.code, a.name,
+               COALESCE(ob.balance, 0)
+               + COALESCE((SELECT b.cum FROM balance_daily b
+                           WHERE b.account_id = a.id AND b.tx_date <= :as_of
+                           ORDER BY b.tx_date DESC LIMIT 1), 0)
+               - COALESCE((SELECT b.cum FROM balance_daily b
+                           WHERE b.account_id = a.id AND b.tx_date < :start
+                           ORDER BY b.tx_date DESC LIMIT 1), 0) AS balance
+        FROM accounts a
+        LEFT JOIN opening_balances ob ON ob.account_id = a.id AND ob.fiscal_year = :year
+        ORDER BY a.code
+        """,
+        {"as_of": str(as_of), "start": start or "", "year": year},
+    )
+    return cur.fetchall()
+
+# Kelompok neraca: (kunci, judul, prefix kode, tanda saldo dari debit - kredit)
+BALANCE_SHEET_GROUPS = [
+    ("aset", "Aset", "1", 1),
+    ("kewajiban", "Kewajiban", "2", -1),
+    ("ekuitas", "Ekuitas", "3", -1),
+]
+
+def _balance_frame(rows):
+    import pandas as pd
+    df = pd.DataFrame([tuple(r) for r in rows], columns=["id", "Kode", "Nama Akun", "balance"])
+    df["Kode"] = df["Kode"].astype(str)
+    return df
+
+def balance_sheet(as_of=None):
     """
-    Hitung Laporan Posisi Keuangan (Neraca):
+    Hitung Laporan Posisi Keuangan (Neraca) per tanggal as_of (default:
+    seluruh transaksi yang sudah diposting):
     - Aset  : kode mulai dengan '1'
     - Kewajiban : kode mulai dengan '2'
     - Ekuitas   : kode mulai dengan '3'
     """
-    tb = trial_balance()
-    if tb.empty:
-        return None
-
-    tb["Kode"] = tb["Kode"].astype(str)
-
-    # Kelompok akun
-    aset = tb[tb["Kode"].str.startswith("1")].copy()
-    kewajiban = tb[tb["Kode"].str.startswith("2")].copy()
-    ekuitas = tb[tb["Kode"].str.startswith("3")].copy()
+    conn = get_conn()
+    cur = conn.cursor()
+    refresh_balance_daily(cur)
+    conn.commit()
+    df = _balance_frame(balances_as_of(cur, as_of or "9999-12-31"))
+    conn.close()
 
-    # Hitung saldo (debit - kredit untuk aset, kebalik untuk kewajiban/ekuitas)
-    if not aset.empty:
-        aset["Saldo"] = aset["Debit"] - aset["Kredit"]
-    else:
-        aset["Saldo"] = pd.Series(dtype=float)
+    df = df[df["balance"].round(2) != 0]
+    if df.empty:
+        return None
 
-    if not kewajiban.empty:
-        kewajiban["Saldo"] = kewajiban["Kredit"] - kewajiban["Debit"]
-    else:
-        kewajiban["Saldo"] = pd.Series(dtype=float)
+    result = {}
+    for key, _, prefix, sign in BALANCE_SHEET_GROUPS:
+        group = df[df["Kode"].str.startswith(prefix)].copy()
+        group["Saldo"] = group["balance"] * sign
+        result[key] = group[["Kode", "Nama Akun", "Saldo"]].reset_index(drop=True)
+        result[f"total_{key}"] = float(group["Saldo"].sum())
+    return result
 
-    if not ekuitas.empty:
-        ekuitas["Saldo"] = ekuitas["Kredit"] - ekuitas["Debit"]
-    else:
-        ekuitas["Saldo"] = pd.Series(dtype=float)
+def balance_sheet_comparative(dates):
+    """
+    Posisi keuangan komparatif: satu kolom saldo per tanggal di dates
+    (mis. akhir bulan), dari prefix sum balance_daily.
 
-    total_aset = float(aset["Saldo"].sum()) if not aset.empty else 0.0
-    total_kewajiban = float(kewajiban["Saldo"].sum()) if not kewajiban.empty else 0.0
-    total_ekuitas = float(ekuitas["Saldo"].sum()) if not ekuitas.empty else 0.0
+    Returns:
+    - DataFrame: kolom Kelompok, Kode, Nama Akun, <tanggal...>; baris
+      "Total <kelompok>" (Kode kosong) setelah tiap kelompok.
+    """
+    import pandas as pd
+    labels = [str(d) for d in dates]
+    conn = get_conn()
+    cur = conn.cursor()
+    refresh_balance_daily(cur)
+    conn.commit()
+    frames = [_balance_frame(balances_as_of(cur, d)).set_index(["Kode", "Nama Akun"])["balance"] for d in labels]
+    conn.close()
+    if not frames:
+        return pd.DataFrame(columns=["Kelompok", "Kode", "Nama Akun"])
 
-    return {
-        "aset": aset[["Kode", "Nama Akun", "Saldo"]],
-        "kewajiban": kewajiban[["Kode", "Nama Akun", "Saldo"]],
-        "ekuitas": ekuitas[["Kode", "Nama Akun", "Saldo"]],
-        "total_aset": total_aset,
-        "total_kewajiban": total_kewajiban,
-        "total_ekuitas": total_ekuitas,
-    }
+    wide = pd.concat(frames, axis=1, keys=labels).reset_index()
+    out = []
+    for _, title, prefix, sign in BALANCE_SHEET_GROUPS:
+        group = wide[wide["Kode"].str.startswith(prefix)].copy()
+        group[labels] = group[labels] * sign
+        group = group[(group[labels].round(2) != 0).any(axis=1)]
+        group.insert(0, "Kelompok", title)
+        out.append(group)
+        out.append(pd.DataFrame([[title, "", f"Total {title}", *group[labels].sum()]],
+                                columns=["Kelompok", "Kode", "Nama Akun", *labels]))
+    table = pd.concat(out, ignore_index=True)
+    table[labels] = table[labels].astype(float)
+    return table